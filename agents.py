@@ -1,6 +1,7 @@
 # agents.py
 import autogen
 import streamlit as st
+from llm_cache import LLMResponseCache
 
 GROQ_API_KEY = st.secrets["GROQ_API_KEY"]
 
@@ -140,3 +141,10 @@ Keep your analysis comprehensive but accessible. Think like you're explaining to
 
 # Termination: stop when ChiefStrategist gives both plans
 
+
+# --- Persistent response cache shared by every agent ---
+llm_response_cache = LLMResponseCache.from_env()
+
+for _agent in (RaceEngineerAgent, WeatherForecasterAgent, TireExpertAgent,
+               RivalAnalystAgent, ChiefStrategistAgent, DecisionAnalystAgent):
+    _agent.client_cache = llm_response_cache
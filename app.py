@@ -1,15 +1,17 @@
 # app.py
 import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
 import time
 import pandas as pd
-import plotly.express as px
-from data import load_session_data
-from ui import generate_leaderboard_html_broadcast, format_lap_time, generate_f1_car_tire_display
+from data import start_race_load, LOAD_STAGES, YEARS, RACES
+from ui import (
+    TOWER_STYLESHEET, format_lap_time, generate_f1_car_tire_display, generate_chief_plan_html, generate_outcome_html
+)
 from agents import RaceEngineerAgent # Import the agent
 from agents import llm_config
 from agents import (
     RaceEngineerAgent, WeatherForecasterAgent, TireExpertAgent,
-    RivalAnalystAgent, ChiefStrategistAgent, DecisionAnalystAgent, is_termination_msg
+    RivalAnalystAgent, ChiefStrategistAgent, DecisionAnalystAgent, is_termination_msg, llm_response_cache
 )
 import os
 from PIL import Image
@@ -17,96 +19,38 @@ import autogen
 import base64
 from helpers import (
     analyze_user_decision, run_agent_discussions_with_interruption, initialize_session_state, display_agent_message_with_typing,
-    initialize_session_state, check_strategy_triggers, run_agent_discussions, display_radio_conversation, get_radio_message_for_lap, set_page_background )
+    initialize_session_state, check_strategy_triggers, run_agent_discussions, display_radio_conversation, get_radio_message_for_lap, set_page_background,
+    get_strategy_discussion, failed_discussion )
+from discussions import discussion_service
+from race_store import race_store
+from triggers import compile_triggers
+from typewriter import typewriter, TYPEWRITER_SLOT
+from lap_chart import lap_time_chart
+from streaming import StreamView, log_reply_timings
 
-def generate_simulated_temp(tire_position):
-    """Generate realistic simulated tire temperatures"""
-    # Get current compound to base temperature on
-    try:
-        current_lap_data = laps.loc[(laps['LapNumber'] == st.session_state.current_lap) & (laps['Driver'] == st.session_state.managed_driver)]
-        if not current_lap_data.empty:
-            compound = current_lap_data.iloc[0]['Compound']
-            tire_life = current_lap_data.iloc[0]['TyreLife']
-            
-            # Base temperature by compound
-            if 'SOFT' in str(compound):
-                base_temp = 95
-            elif 'MEDIUM' in str(compound):
-                base_temp = 90
-            else:  # HARD
-                base_temp = 85
-            
-            # Temperature variations by position
-            position_offset = {'FL': 2, 'FR': 4, 'RL': -1, 'RR': 3}
-            
-            # Tire life effect (older tires run hotter)
-            age_effect = int(tire_life) * 0.5 if pd.notna(tire_life) else 0
-            
-            # Lap-based variation
-            lap_variation = (st.session_state.current_lap % 7) * 2
-            
-            return int(base_temp + position_offset[tire_position] + age_effect + lap_variation)
-    except:
-        pass
-    
-    # Ultimate fallback
-    base_temps = {'FL': 88, 'FR': 92, 'RL': 85, 'RR': 90}
-    return base_temps[tire_position] + (st.session_state.current_lap % 5)
+log_reply_timings()
+
+# Laps a team radio exchange stays on screen while it plays
+RADIO_HOLD_LAPS = 2
 
 def update_tire_temperatures():
-    """Updates tire temps using session.car_data with proper error handling."""
-    try:
-        # Get the driver number for the managed driver
-        driver_abbr = st.session_state.managed_driver
-        driver_info = session.results.loc[session.results['Abbreviation'] == driver_abbr].iloc[0]
-        driver_number = str(driver_info['DriverNumber'])
-
-        # Access the telemetry for that specific car from the car_data dictionary
-        if driver_number in session.car_data:
-            car_telemetry = session.car_data[driver_number]
-            
-            # Filter the telemetry data for the current lap
-            lap_telemetry = car_telemetry.loc[car_telemetry['LapNumber'] == st.session_state.current_lap]
+    """Looks up the managed driver's tyre temps for the current lap in the race's tyre model."""
+    driver_abbr = st.session_state.managed_driver
+    tyre_model = race_load.tyre_model
 
-            if not lap_telemetry.empty:
-                # Get the last reading of the lap and update the state
-                latest_temps = lap_telemetry.iloc[-1]
-                
-                # Extract temperatures with fallback
-                fl_temp = latest_temps.get('TyreTempFL', 0)
-                fr_temp = latest_temps.get('TyreTempFR', 0)
-                rl_temp = latest_temps.get('TyreTempRL', 0)
-                rr_temp = latest_temps.get('TyreTempRR', 0)
-                
-                st.session_state.tire_temperatures = {
-                    'FL': int(fl_temp) if pd.notna(fl_temp) and fl_temp > 0 else generate_simulated_temp('FL'),
-                    'FR': int(fr_temp) if pd.notna(fr_temp) and fr_temp > 0 else generate_simulated_temp('FR'),
-                    'RL': int(rl_temp) if pd.notna(rl_temp) and rl_temp > 0 else generate_simulated_temp('RL'),
-                    'RR': int(rr_temp) if pd.notna(rr_temp) and rr_temp > 0 else generate_simulated_temp('RR')
-                }
-                return
-        
-        # Fallback to simulation if no telemetry data
-        st.session_state.tire_temperatures = {
-            'FL': generate_simulated_temp('FL'),
-            'FR': generate_simulated_temp('FR'),
-            'RL': generate_simulated_temp('RL'),
-            'RR': generate_simulated_temp('RR')
-        }
+    # Real telemetry readings replace the modelled ones once the driver's telemetry is in
+    if race_load.ready('telemetry') and not tyre_model.is_blended(driver_abbr):
+        driver_numbers = session.results.loc[session.results['Abbreviation'] == driver_abbr, 'DriverNumber']
+        lap_summary = telemetry.lap_summary(driver_numbers.iloc[0]) if not driver_numbers.empty else None
+        tyre_model.blend(driver_abbr, lap_summary)
 
-    except Exception as e:
-        # Generate simulated temperatures if everything fails
-        st.session_state.tire_temperatures = {
-            'FL': generate_simulated_temp('FL'),
-            'FR': generate_simulated_temp('FR'),
-            'RL': generate_simulated_temp('RL'),
-            'RR': generate_simulated_temp('RR')
-        }
+    st.session_state.tire_temperatures = tyre_model.temperatures(st.session_state.current_lap, driver_abbr)
 
 # --- Control Functions ---
 def start_simulation():
     st.session_state.simulation_running = True
     st.session_state.current_lap = 1
+    st.session_state.lap_on_screen = 0
     st.session_state.simulation_phase = 'normal'
     st.session_state.strategy_chat_history = {}
     st.session_state.strategy_choice = None
@@ -126,7 +70,255 @@ def advance_lap():
         stop_simulation()
         st.success("Race Finished!")
 
+# --- Live Dashboard ---
+# While the race runs, lap ticks rerun only the live fragments (dashboard and sidebar); the
+# page setup, sidebar widgets and race loading above them run again only on a full app run.
+LAP_SECONDS = 2
+# Per-lap CPU samples kept for the refresh cost caption
+LAP_CPU_SAMPLES = 20
+
+def fragment_rerun():
+    """True when only fragments are rerunning (the live fragments' timers), not the whole app."""
+    ctx = get_script_run_ctx()
+    return bool(ctx and ctx.fragment_ids_this_run)
+
+def tick_lap():
+    """
+    The race's lap clock, shared by every live fragment; returns the lap to show.
+
+    Whichever fragment's timer fires first moves the race on once the lap has been up
+    for LAP_SECONDS and works out that lap's triggers, radio and tyres; the others then
+    draw the same lap from session state. Triggers and the race end rerun the whole app.
+    """
+    # Weather finishing mid-race recompiles the triggers, which happens on a full app run
+    if st.session_state.trigger_plan_key != (year, race_name, race_load.ready('weather')):
+        st.rerun()
+
+    # Only a timer tick moves the race on; a full app run (a widget, a new stage) redraws the lap on screen
+    if (fragment_rerun() and st.session_state.lap_on_screen == st.session_state.current_lap
+            and time.time() - st.session_state.lap_shown_at >= LAP_SECONDS * 0.9):
+        advance_lap()
+        if not st.session_state.simulation_running:
+            st.rerun()
+    lap_num = st.session_state.current_lap
+    if st.session_state.lap_on_screen == lap_num:
+        return lap_num
+
+    # Check for strategy triggers
+    trigger_reasons = check_strategy_triggers(lap_num, managed_driver, st.session_state.trigger_plan)
+    st.session_state.trigger_reasons = trigger_reasons
+    # Interruption context (SC / VSC / Rain) is precompiled with the triggers; store it
+    # BEFORE running agent discussions so the run_agent_discussions wrapper can use it
+    st.session_state['current_interruption'] = st.session_state.trigger_plan.interruption_at(lap_num)
+
+    # If triggers found and we haven't processed this lap yet, pause for the pit wall (full app run)
+    if trigger_reasons and st.session_state.last_strategy_lap != lap_num:
+        st.session_state.last_strategy_lap = lap_num
+        st.session_state.simulation_phase = 'strategy_discussion'
+        st.session_state.discussion_completed = False  # Reset discussion flag
+        st.rerun()
+
+    update_tire_temperatures()
+
+    if (lap_num % 10 == 0 or lap_num % 10 == 3 or lap_num % 10 == 7) and st.session_state.last_radio_lap != lap_num:
+        # Get driver position for context
+        driver_lap_data_df = lap_store.driver_lap(lap_num, managed_driver)
+        if not driver_lap_data_df.empty:
+            driver_position = int(driver_lap_data_df.iloc[0]['Position']) if pd.notna(driver_lap_data_df.iloc[0]['Position']) else 10
+            
+            # Get radio message
+            st.session_state.radio_message = get_radio_message_for_lap(lap_num, total_laps, driver_position)
+            st.session_state.last_radio_lap = lap_num
+
+    st.session_state.lap_on_screen = lap_num
+    st.session_state.lap_shown_at = time.time()
+    return lap_num
+
+# --- Race Data Panel ---
+# While a race loads only this sidebar panel polls; the page reruns once a stage has landed
+LOAD_POLL_SECONDS = 0.5
+LOAD_STAGE_ICONS = {'pending': "⏳", 'running': "🔄", 'done': "✅", 'failed': "⚠️"}
+
+def race_data_panel():
+    """Load progress of the selected race; reruns the app when a stage finishes, unless a race is live."""
+    with st.expander("Race Data", expanded=not race_load.finished):
+        st.progress(sum(race_load.ready(stage) for stage in LOAD_STAGES) / len(LOAD_STAGES))
+        for stage, label in LOAD_STAGES.items():
+            seconds = race_load.stage_seconds.get(stage)
+            st.caption(f"{LOAD_STAGE_ICONS[race_load.status[stage]]} {label}" + (f" ({seconds}s)" if seconds is not None else ""))
+
+    # A running race picks finished stages up from its own lap clock (see tick_lap)
+    if race_load.status != st.session_state.load_status_on_page and not st.session_state.simulation_running:
+        st.rerun(scope="app")
+
+@st.fragment(run_every=LAP_SECONDS)
+def live_dashboard():
+    """Redraws the lap-dependent panels for the lap on the shared clock."""
+    cpu_started = time.thread_time()
+    lap_num = tick_lap()
+
+    # Header
+    st.subheader(f"Lap {lap_num}/{total_laps}")
+
+    # Event Detection
+    current_lap_data = lap_store.lap(lap_num)
+    if not current_lap_data.empty:
+        track_status = timeline.track_status[lap_num]
+        if track_status in ['4', '5']: 
+            st.error("⚠️ SAFETY CAR / RED FLAG", icon="🚨")
+        elif track_status in ['6', '7']: 
+            st.warning("🟡 VIRTUAL SAFETY CAR", icon="⚠️")
+        
+        if timeline.weather.rainfall[lap_num]: 
+            st.info("🌧️ RAIN DETECTED", icon="💧")
+
+    # Tire degradation model, fitted once when the race was loaded
+    degradation_model = race_load.degradation
+
+    col1, col2, col3 = st.columns([2, 1, 2])
+
+    # Leaderboard
+    with col1:
+        st.markdown("##### Timing Tower")
+        
+        valid_leaderboard = timeline.leaderboard(lap_num)
+
+        if not valid_leaderboard.empty:
+            # Rendered once per race and lap, shared by every viewer; styled by TOWER_STYLESHEET
+            st.html(race_load.tower.html(lap_num))
+
+    # Driver Panel
+    with col2:
+        driver_lap_data_df = lap_store.driver_lap(lap_num, managed_driver)
+        if not driver_lap_data_df.empty:
+            driver_lap_data = driver_lap_data_df.iloc[0]
+            driver_pos = driver_lap_data['Position']
+            st.subheader(f"Managing: {managed_driver}")
+            status = "IN PIT" if pd.isna(driver_pos) else "Racing"
+            st.metric("Status", status)
+            if status == "Racing":
+                st.metric("Position", int(driver_pos))
+            if race_load.ready('telemetry'):
+                driver_number = str(session.results.loc[session.results['Abbreviation'] == managed_driver, 'DriverNumber'].iloc[0])
+                lap_summary = telemetry.lap_summary(driver_number)
+                if lap_summary is not None and lap_summary.describe(lap_num):
+                    st.caption(lap_summary.describe(lap_num))
+            
+            st.markdown("---")
+            
+            # Tire Expert Panel
+            st.subheader("Tire Expert Intel")
+            current_compound = driver_lap_data['Compound']
+            
+            if pd.notna(driver_lap_data['TyreLife']):
+                tyre_age = int(driver_lap_data['TyreLife'])
+                degradation = round(degradation_model.rate(current_compound, managed_driver), 3)
+                predicted_lifespan = degradation_model.remaining_laps(current_compound, tyre_age, managed_driver)
+                if predicted_lifespan is None:
+                    predicted_lifespan = "No measurable wear"
+                
+                st.metric(f"{current_compound} Tire Status", f"{tyre_age} Laps Old")
+                st.write(f"Predicted Remaining Laps: **{predicted_lifespan}**")
+                st.write(f"Est. Time Loss/Lap: **{degradation}s**")
+            else:
+                st.metric(f"{current_compound} Tire Status", "Data Unavailable")
+
+            st.markdown("---")
+
+            # Rival Analyst Panel
+            st.subheader("Rival Analyst Intel")
+            if status == "Racing" and not valid_leaderboard.empty:
+                # Real intervals from the race's precomputed gap matrix
+                car_ahead, car_behind = timeline.neighbours(lap_num, managed_driver)
+
+                gap_ahead_str = "Clear Track"
+                if car_ahead:
+                    rival, gap = car_ahead
+                    gap_ahead_str = f"{rival} (+{gap:.1f}s)" if pd.notna(gap) else rival
+
+                gap_behind_str = "Clear Track"
+                if car_behind:
+                    rival, gap = car_behind
+                    gap_behind_str = f"{rival} (-{gap:.1f}s)" if pd.notna(gap) else rival
+                
+                st.metric("Car Ahead", gap_ahead_str)
+                st.metric("Car Behind", gap_behind_str)
+
+            st.markdown("---")
+
+            # Strategy Simulation Panel
+            st.subheader("Strategy Simulation")
+            pit_stop_time_loss = race_load.rejoin.pit_loss
+            rejoin = race_load.rejoin.predict(lap_num, managed_driver) if status == "Racing" else None
+            
+            st.metric("Pit Stop Time Loss", f"~{pit_stop_time_loss:.0f} seconds")
+            st.metric("Predicted Re-join Position", f"P{rejoin['Position']}" if rejoin else "N/A")
+            if rejoin:
+                st.caption(f"Rejoins behind {rejoin['Behind'] or '-'}, ahead of {rejoin['AheadOf'] or '-'}")
+
+    # Plot
+    with col3:
+        if not valid_leaderboard.empty:
+            # Every driver is charted; the current top 5 are shown, the rest can be toggled in the legend
+            top_5_drivers = valid_leaderboard.head(5)['Driver'].tolist()
+            lap_time_chart(race_load.lap_chart, lap_num, visible=top_5_drivers)
+            
+            st.markdown("---")
+            car_html = generate_f1_car_tire_display(st.session_state.tire_temperatures, managed_driver)
+            st.html(car_html)
+
+    # Server CPU per lap: this fragment alone vs. re-running the whole script as well
+    st.session_state.lap_cpu_ms = st.session_state.lap_cpu_ms[-(LAP_CPU_SAMPLES - 1):] + [(time.thread_time() - cpu_started) * 1000]
+    fragment_ms = sum(st.session_state.lap_cpu_ms) / len(st.session_state.lap_cpu_ms)
+    st.caption(
+        f"Per-lap server CPU: {fragment_ms:.1f} ms (fragment rerun) vs ~{fragment_ms + st.session_state.script_cpu_ms:.1f} ms (full script rerun)"
+    )
+
+@st.fragment(run_every=LAP_SECONDS)
+def pit_wall_sidebar():
+    """Team radio and trigger status for the lap on the shared clock."""
+    lap_num = tick_lap()
+
+    # The browser types the exchange out over the next laps, so keep it up for RADIO_HOLD_LAPS
+    radio_msg = st.session_state.radio_message
+    if radio_msg and 0 <= lap_num - st.session_state.last_radio_lap < RADIO_HOLD_LAPS:
+        display_radio_conversation(
+            st.empty(),
+            radio_msg["engineer"],
+            radio_msg["driver"],
+            managed_driver,
+            key=f"radio_{st.session_state.last_radio_lap}"
+        )
+    else:
+        # Show empty radio when no conversation
+        st.markdown(
+            """
+            <div style="
+                background-color: #1a1a1a;
+                padding: 15px;
+                border-radius: 8px;
+                text-align: center;
+                color: #666;
+                font-style: italic;
+            ">
+                📻 Team Radio - Standby
+            </div>
+            """, 
+            unsafe_allow_html=True
+        )
+
+    # Display trigger info
+    trigger_reasons = st.session_state.trigger_reasons
+    if trigger_reasons:
+        st.write("🛑 Triggered by:", ", ".join(trigger_reasons))
+    else:
+        st.write("✅ No trigger this lap")
+
+    if st.session_state.get('current_interruption'):
+        st.warning(f"Interruption detected: {st.session_state['current_interruption']}")
+
 # --- Page Configuration ---
+script_cpu_started = time.thread_time()
 st.set_page_config(page_title="Project Pit Wall | F1 Strategy", layout="wide")
 
 # Initialize session state
@@ -257,6 +449,9 @@ else:
     }
     </style>
     """, unsafe_allow_html=True)
+
+    # Timing tower styles, sent once per page rather than with every tower
+    st.html(TOWER_STYLESHEET)
     
     # --- Main Application ---
     st.title("Project Pit Wall 🏎️")
@@ -264,14 +459,27 @@ else:
 
     # --- Sidebar for Session Selection ---
     st.sidebar.header("Race Selection")
-    year = st.sidebar.selectbox("Select Year", [2023, 2022, 2021], index=0)
-    races = ["Bahrain", "Jeddah", "Monaco", "Silverstone", "Monza", "Suzuka", "Las Vegas"]
-    race_name = st.sidebar.selectbox("Select Race", races, index=0)
+    year = st.sidebar.selectbox("Select Year", YEARS, index=0)
+    race_name = st.sidebar.selectbox("Select Race", RACES, index=0)
 
     # --- Load Data ---
+    # Races load in the background stage by stage; the dashboard appears as soon as laps are in
+    race_load = start_race_load(year, race_name, 'R')
+    st.session_state.load_status_on_page = dict(race_load.status)
+    with st.sidebar:
+        st.fragment(race_data_panel, run_every=None if race_load.finished else LOAD_POLL_SECONDS)()
+
+    if race_load.status['laps'] == 'failed':
+        st.error(f"Could not load data for {year} {race_name}. Error: {race_load.errors.get('laps')}")
+        st.stop()
+    if not race_load.ready('laps'):
+        # The Race Data panel reruns the page once the laps are in
+        st.info(f"Loading timing data for {year} {race_name}...")
+        st.stop()
+
     try:
-        session, laps = load_session_data(year, race_name, 'R')
-        total_laps = int(laps['LapNumber'].max())
+        session, laps, lap_store, timeline, telemetry = race_load.session, race_load.laps, race_load.lap_store, race_load.timeline, race_load.telemetry
+        total_laps = lap_store.total_laps
         driver_list = session.results['Abbreviation'].unique().tolist()
         default_driver_index = driver_list.index('HAM') if 'HAM' in driver_list else 0
         managed_driver = st.sidebar.selectbox("Select Driver to Manage", driver_list, index=default_driver_index)
@@ -280,6 +488,17 @@ else:
         st.stop()
 
     st.session_state.managed_driver = managed_driver
+    store_stats = race_store.stats()
+    st.sidebar.caption(
+        f"Race store: {store_stats['races']} races, {store_stats['resident_bytes'] / 1e6:.0f} / {store_stats['max_bytes'] / 1e6:.0f} MB"
+        f" · hit rate {store_stats['hit_rate']:.0%} · {store_stats['evictions']} evictions"
+    )
+
+    # Compile every trigger lap of the race once per race selection, again once weather (rain) is in
+    trigger_key = (year, race_name, race_load.ready('weather'))
+    if st.session_state.trigger_plan_key != trigger_key:
+        st.session_state.trigger_plan = compile_triggers(lap_store, timeline)
+        st.session_state.trigger_plan_key = trigger_key
 
 
     # --- Sidebar Controls ---
@@ -294,18 +513,11 @@ else:
             start_simulation()
             st.rerun()
 
-    # --- Main Dashboard Placeholders ---
-    header_placeholder = st.empty()
-    event_placeholder = st.empty()
-
-    # Create main layout
-    col1, col2, col3 = st.columns([2, 1, 2])
-    with col1:
-        leaderboard_placeholder = st.empty()
-    with col2:
-        driver_panel_placeholder = st.empty()
-    with col3:
-        plot_placeholder = st.empty()
+    # --- Main Dashboard ---
+    if st.session_state.simulation_running and st.session_state.simulation_phase == 'normal':
+        # What a full app run costs before it gets to the dashboard
+        st.session_state.script_cpu_ms = (time.thread_time() - script_cpu_started) * 1000
+        live_dashboard()
 
     # Strategy phase placeholders - separate for each phase
     strategy_discussion_placeholder = st.empty()
@@ -313,129 +525,43 @@ else:
 
     # Sidebar elements
     st.sidebar.header("Team Radio 📻")
-    radio_placeholder = st.sidebar.empty()
-    dialog_placeholder = st.sidebar.empty()
+    if st.session_state.simulation_running and st.session_state.simulation_phase == 'normal':
+        with st.sidebar:
+            pit_wall_sidebar()
 
     # --- MAIN SIMULATION LOGIC ---
     if st.session_state.simulation_running:
         lap_num = st.session_state.current_lap
-        
-        # Pre-calculate Tire Degradation Model
-        degradation_model = {}
-        for compound in laps['Compound'].unique():
-            compound_laps = laps[laps['Compound'] == compound]
-            if not compound_laps.empty:
-                degradation_model[compound] = round(compound_laps['LapTime'].dt.total_seconds().std() * 0.1, 3)
-
-        # Get current lap data
-        current_lap_data = laps.loc[laps['LapNumber'] == lap_num]
-        lap_start_time = current_lap_data['LapStartTime'].min() if not current_lap_data.empty else None
-
-        # --- PHASE CONTROL LOGIC ---
-        if st.session_state.simulation_phase == 'normal':
-            # Check for strategy triggers
-            trigger_reasons = check_strategy_triggers(lap_num, current_lap_data, session, laps, lap_start_time)
-            # --- NEW: Detect interruption context (SC / VSC / Rain) and store it BEFORE running agent discussions ---
-            interruption = None
-            try:
-                if not current_lap_data.empty and 'TrackStatus' in current_lap_data.columns:
-                    track_status = str(current_lap_data['TrackStatus'].iloc[0])
-                    if track_status in ['4', '5']:
-                        interruption = "Safety Car / Red Flag"
-                    elif track_status in ['6', '7']:
-                        interruption = "Virtual Safety Car"
-
-                # Rain detection (reuse existing weather logic)
-                if pd.notna(lap_start_time) and hasattr(session, 'weather_data'):
-                    try:
-                        weather_data = session.weather_data.loc[session.weather_data['Time'] <= lap_start_time]
-                        if (not weather_data.empty) and weather_data.iloc[-1].get('Rainfall'):
-                            interruption = "Rainfall / Wet Track"
-                    except Exception:
-                        # ignore weather parsing errors
-                        pass
-            except Exception:
-                interruption = None
-
-            # Store interruption to session_state so downstream code (run_agent_discussions wrapper) can use it
-            st.session_state['current_interruption'] = interruption
-
-            # Store interruption in session state so downstream functions can access it
-            if interruption:
-                st.session_state['current_interruption'] = interruption
-                # Add it to trigger reasons only if it's not a generic periodic trigger
-                if interruption not in trigger_reasons:
-                    trigger_reasons.append(interruption)
-            else:
-                # clear previous interruption if none currently detected
-                st.session_state['current_interruption'] = None
 
-            update_tire_temperatures()
-
-            if (lap_num % 10 == 0 or lap_num % 10 == 3 or lap_num % 10 == 7) and st.session_state.last_radio_lap != lap_num:
-                # Get driver position for context
-                driver_lap_data_df = laps.loc[(laps['LapNumber'] == lap_num) & (laps['Driver'] == managed_driver)]
-                if not driver_lap_data_df.empty:
-                    driver_position = int(driver_lap_data_df.iloc[0]['Position']) if pd.notna(driver_lap_data_df.iloc[0]['Position']) else 10
-                    
-                    # Get radio message
-                    radio_msg = get_radio_message_for_lap(lap_num, total_laps, driver_position)
-                    
-                    # Display radio conversation
-                    with radio_placeholder.container():
-                        display_radio_conversation(
-                            radio_placeholder, 
-                            radio_msg["engineer"], 
-                            radio_msg["driver"], 
-                            managed_driver
-                        )
-                    
-                    st.session_state.last_radio_lap = lap_num
-            else:
-                # Show empty radio when no conversation
-                with radio_placeholder.container():
-                    st.markdown(
-                        """
-                        <div style="
-                            background-color: #1a1a1a;
-                            padding: 15px;
-                            border-radius: 8px;
-                            text-align: center;
-                            color: #666;
-                            font-style: italic;
-                        ">
-                            📻 Team Radio - Standby
-                        </div>
-                        """, 
-                        unsafe_allow_html=True
-                    )
-
-            # Display trigger info in sidebar
-            if trigger_reasons:
-                st.sidebar.write("🛑 Triggered by:", ", ".join(trigger_reasons))
-            else:
-                st.sidebar.write("✅ No trigger this lap")
-            
-            if st.session_state.get('current_interruption'):
-                st.sidebar.warning(f"Interruption detected: {st.session_state['current_interruption']}")
-            
-            # If triggers found and we haven't processed this lap yet
-            if trigger_reasons and st.session_state.last_strategy_lap != lap_num:
-                st.session_state.last_strategy_lap = lap_num
-                st.session_state.simulation_phase = 'strategy_discussion'
-                st.session_state.discussion_completed = False  # Reset discussion flag
-                st.rerun()
-        
-        elif st.session_state.simulation_phase == 'strategy_discussion':
+        # --- PHASE CONTROL LOGIC ('normal' laps run in live_dashboard) ---
+        if st.session_state.simulation_phase == 'strategy_discussion':
             # Only run agent discussions if not already completed
             if not st.session_state.discussion_completed:
-                with st.spinner("Pit wall is deliberating..."):
-                    agent_responses = run_agent_discussions(laps, session, lap_num, managed_driver)
+                # The Chief Strategist's reply is shown as it streams in
+                with strategy_discussion_placeholder.container():
+                    st.markdown("**👑 Chief Strategist - Strategic Options**")
+                    chief_live = st.empty()
+                show_chief_chunk = StreamView(
+                    lambda text: chief_live.markdown(generate_chief_plan_html(text, typing=True), unsafe_allow_html=True)
+                )
 
-                    # Use the wrapper to ensure interruption context is attached
+                with st.spinner("Pit wall is deliberating..."):
+                    # One shared, memoized run per (race, lap, driver, interruption); the wrapper attaches the interruption context
                     interruption = st.session_state.get('current_interruption', None)
-                    agent_responses = run_agent_discussions_with_interruption(laps, session, lap_num, managed_driver, interruption=interruption)
+                    try:
+                        agent_responses, agent_timings = get_strategy_discussion(
+                            year, race_name, lap_store, timeline, session, lap_num, managed_driver, interruption=interruption,
+                            telemetry=telemetry if race_load.ready('telemetry') else None, degradation=race_load.degradation,
+                            rejoin=race_load.rejoin, on_chief_chunk=show_chief_chunk
+                        )
+                    except Exception as e:
+                        # Not cached: the next viewer (or a restart) asks the pit wall again
+                        agent_responses, agent_timings = failed_discussion(e)
+                        if interruption:
+                            agent_responses['InterruptionContext'] = interruption
                     st.session_state.strategy_chat_history = agent_responses
+                    st.session_state.chief_streamed = show_chief_chunk.chunks > 1
+                    st.session_state.agent_timings = agent_timings
                     st.session_state.discussion_completed = True  # Mark as completed
                     
                     # Update tire temperatures for the car display
@@ -480,6 +606,16 @@ else:
                     
                     with left_col:
                         st.markdown("### Team Communications")
+                        agent_timings = st.session_state.agent_timings
+                        if agent_timings.get("Total"):
+                            slowest = max((t for name, t in agent_timings.items() if name not in ("Chief Strategist", "Chief first word", "Total")), default=0)
+                            first_word = f", first word {agent_timings['Chief first word']}s" if "Chief first word" in agent_timings else ""
+                            st.caption(
+                                f"Pit wall briefed in {agent_timings['Total']}s (slowest specialist {slowest}s, Chief Strategist {agent_timings['Chief Strategist']}s{first_word})"
+                                f" · LLM calls saved by shared discussions: {discussion_service.llm_calls_saved}"
+                            )
+                        cache_stats = llm_response_cache.stats()
+                        st.caption(f"Response cache: {cache_stats['hits']} hits / {cache_stats['misses']} misses, {cache_stats['entries']} entries on disk")
                         
                         # Create 2x2 grid for agent messages
                         agent_row1_col1, agent_row1_col2 = st.columns(2)
@@ -492,57 +628,23 @@ else:
                             (agent_row2_col2, "Rival Analyst", "🎯")
                         ]
 
-                        # Display agent messages with typewriter effect sequentially
+                        # Display agent messages with typewriter effect sequentially (played in the browser)
+                        typing_ends_ms = 0
                         for container, agent_name, icon in agent_containers:
                             if agent_name in st.session_state.strategy_chat_history:
                                 message_content = st.session_state.strategy_chat_history[agent_name]
-                                display_agent_message_with_typing(container, agent_name, icon, message_content)
+                                typing_ends_ms = display_agent_message_with_typing(
+                                    container, agent_name, icon, message_content, start_after_ms=typing_ends_ms
+                                )
 
-                        # Chief Strategist with typewriter effect
+                        # Chief Strategist: typed in the browser unless it already streamed in live
                         st.markdown("---")
                         st.markdown("**👑 Chief Strategist - Strategic Options**")
                         if "Chief Strategist" in st.session_state.strategy_chat_history:
-                            chief_placeholder = st.empty()
                             chief_content = st.session_state.strategy_chat_history["Chief Strategist"]
-                            
-                            # Typewriter for Chief Strategist
-                            typed_text = ""
-                            for word in chief_content.split(" "):
-                                typed_text += word + " "
-                                chief_placeholder.markdown(
-                                    f"""
-                                    <div style="
-                                        background-color: #1a472a;
-                                        color: #FFFFFF;
-                                        padding: 15px;
-                                        border-radius: 8px;
-                                        border-left: 4px solid #4CAF50;
-                                        margin: 10px 0;
-                                        font-size: 14px;
-                                    ">
-                                        {typed_text}<span style="opacity: 0.7;">|</span>
-                                    </div>
-                                    """, 
-                                    unsafe_allow_html=True
-                                )
-                                time.sleep(0.03)
-                            
-                            # Final version
-                            chief_placeholder.markdown(
-                                f"""
-                                <div style="
-                                    background-color: #1a472a;
-                                    color: #FFFFFF;
-                                    padding: 15px;
-                                    border-radius: 8px;
-                                    border-left: 4px solid #4CAF50;
-                                    margin: 10px 0;
-                                    font-size: 14px;
-                                ">
-                                    {typed_text.strip()}
-                                </div>
-                                """, 
-                                unsafe_allow_html=True
+                            typewriter(
+                                [{'html': generate_chief_plan_html(TYPEWRITER_SLOT), 'text': chief_content}],
+                                key=f"chief_{lap_num}", caret="|", animate=not st.session_state.chief_streamed
                             )
                         
                         st.markdown("---")
@@ -564,14 +666,10 @@ else:
                         st.markdown("### Current Race Situation")
                         
                         # Show current leaderboard (paused at this lap)
-                        leaderboard_data = laps.loc[laps['LapNumber'] == lap_num][['Driver', 'Position', 'Time', 'Compound', 'TeamColor']]
-                        valid_leaderboard = leaderboard_data.dropna(subset=['Position']).sort_values(by='Position')
+                        valid_leaderboard = timeline.leaderboard(lap_num)
                         
                         if not valid_leaderboard.empty:
-                            valid_leaderboard['Time'] = pd.to_timedelta(valid_leaderboard['Time'])
-                            valid_leaderboard['Interval'] = valid_leaderboard['Time'].diff()
-                            leaderboard_html = generate_leaderboard_html_broadcast(valid_leaderboard)
-                            st.html(leaderboard_html)
+                            st.html(race_load.tower.html(lap_num))
                         
                         st.markdown("---")
                         st.markdown(f"### {managed_driver} - Car Status")
@@ -580,6 +678,12 @@ else:
                         car_html = generate_f1_car_tire_display(st.session_state.tire_temperatures, managed_driver)
                         st.html(car_html)
 
+                        # Where a stop now or in the next few laps would put the car back out
+                        pit_options = race_load.rejoin.table(lap_num, managed_driver)
+                        if not pit_options.empty:
+                            st.markdown(f"### Pit Window ({race_load.rejoin.pit_loss:.0f}s loss)")
+                            st.dataframe(pit_options, hide_index=True, use_container_width=True)
+
                 # Don't render normal dashboard when in this phase
                 st.session_state.simulation_phase = 'chosen'
                 st.stop()
@@ -602,34 +706,12 @@ else:
             plan_b_image_path = os.path.join("planb.gif")   # image to show when decision is incorrect (Plan B)
 
             if st.session_state.simulation_phase == 'showing_outcome':
-                # First time entering this phase: produce paragraphs via the LLM
-                if not st.session_state.choice_processed:
-                    st.session_state.strategy_log.append((lap_num, st.session_state.strategy_choice))
-
-                    with st.spinner("Analyzing your strategic decision with the Decision Analyst..."):
-                        try:
-                            paragraphs = analyze_user_decision(
-                                laps, session, lap_num, managed_driver,
-                                st.session_state.strategy_choice,
-                                st.session_state.strategy_chat_history
-                            )
-                        except Exception as e:
-                            paragraphs = [f"Analysis failed to run: {e}"]
-
-                        if not isinstance(paragraphs, (list, tuple)):
-                            paragraphs = [str(paragraphs)]
-
-                        st.session_state.outcome_paragraphs = paragraphs
-                        st.session_state.choice_processed = True
-
-                # Now render the result + image
+                # Render the image and the analysis; the first time through, the analysis streams in from the LLM
                 with outcome_placeholder.container():
                     st.markdown("---")
                     st.title("📊 DECISION IMPACT ANALYSIS")
                     st.markdown("---")
 
-                    paragraphs = st.session_state.get('outcome_paragraphs', [])
-
                     # Decide which image to show (Plan A is treated as historical/correct)
                     user_choice = st.session_state.get('strategy_choice', None)
 
@@ -687,51 +769,42 @@ else:
                             candidate = os.path.join("planb.jpg")
                         _show_image(candidate)
 
-                    full_text = "\n\n".join(paragraphs) if paragraphs else "No analysis available."
                     block_placeholder = st.empty()
-                    typed = ""
-                    # Typewriter per character for the full message
-                    for ch in full_text:
-                        typed += ch
-                        # convert newlines to <br> for HTML display
-                        html_text = typed.replace("\n", "<br>")
-                        block_placeholder.markdown(
-                            f"""
-                            <div style="
-                                background-color: #0b1220;
-                                color: #eaf2fb;
-                                padding: 16px;
-                                border-radius: 10px;
-                                margin: 8px 0;
-                                font-size: 14px;
-                                line-height:1.5;
-                            ">
-                                {html_text}<span style="opacity:0.6">|</span>
-                            </div>
-                            """,
-                            unsafe_allow_html=True
+                    if not st.session_state.choice_processed:
+                        st.session_state.strategy_log.append((lap_num, st.session_state.strategy_choice))
+                        block_placeholder.markdown(generate_outcome_html("", typing=True), unsafe_allow_html=True)
+                        show_analysis_chunk = StreamView(
+                            lambda text: block_placeholder.markdown(generate_outcome_html(text, typing=True), unsafe_allow_html=True)
+                        )
+
+                        try:
+                            paragraphs = analyze_user_decision(
+                                lap_store, session, lap_num, managed_driver,
+                                st.session_state.strategy_choice,
+                                st.session_state.strategy_chat_history,
+                                on_chunk=show_analysis_chunk, year=year, race_name=race_name
+                            )
+                        except Exception as e:
+                            paragraphs = [f"Analysis failed to run: {e}"]
+
+                        if not isinstance(paragraphs, (list, tuple)):
+                            paragraphs = [str(paragraphs)]
+
+                        st.session_state.outcome_paragraphs = paragraphs
+                        st.session_state.choice_processed = True
+
+                        # A cached analysis arrives in one piece; type that one out in the browser instead
+                        st.session_state.outcome_streamed = show_analysis_chunk.chunks > 1
+
+                    # Final text, split into paragraphs
+                    paragraphs = st.session_state.get('outcome_paragraphs', [])
+                    full_text = "\n\n".join(paragraphs) if paragraphs else "No analysis available."
+                    with block_placeholder.container():
+                        typewriter(
+                            [{'html': generate_outcome_html(TYPEWRITER_SLOT), 'text': full_text}],
+                            key=f"outcome_{lap_num}", unit='char', delay_ms=8, caret="|",
+                            animate=not st.session_state.outcome_streamed
                         )
-                        # you can tune speed here (increase to slow down)
-                        time.sleep(0.008)
-
-                    # Replace with final text without caret
-                    final_html = full_text.replace("\n", "<br>")
-                    block_placeholder.markdown(
-                        f"""
-                        <div style="
-                            background-color: #0b1220;
-                            color: #eaf2fb;
-                            padding: 16px;
-                            border-radius: 10px;
-                            margin: 8px 0;
-                            font-size: 14px;
-                            line-height:1.5;
-                        ">
-                            {final_html}
-                        </div>
-                        """,
-                        unsafe_allow_html=True
-                    )
 
                     # Continue button
                     if st.button("Continue Race", type="primary", use_container_width=True, key=f"continue_{lap_num}"):
@@ -757,116 +830,4 @@ else:
                 outcome_placeholder.empty()
                 advance_lap()
                 st.rerun()
-                
-        # --- NORMAL DASHBOARD RENDERING (only in 'normal' phase) ---
-        if st.session_state.simulation_phase == 'normal':
-            # Event Detection
-            with event_placeholder.container():
-                if not current_lap_data.empty:
-                    track_status = current_lap_data['TrackStatus'].iloc[0]
-                    if track_status in ['4', '5']: 
-                        st.error("⚠️ SAFETY CAR / RED FLAG", icon="🚨")
-                    elif track_status in ['6', '7']: 
-                        st.warning("🟡 VIRTUAL SAFETY CAR", icon="⚠️")
-                    
-                    if pd.notna(lap_start_time):
-                        weather_data = session.weather_data.loc[session.weather_data['Time'] <= lap_start_time]
-                        if not weather_data.empty and weather_data.iloc[-1]['Rainfall']: 
-                            st.info("🌧️ RAIN DETECTED", icon="💧")
-
-            # Header
-            with header_placeholder.container():
-                st.subheader(f"Lap {lap_num}/{total_laps}")
-
-            # Leaderboard
-            with leaderboard_placeholder.container():
-                st.markdown("##### Timing Tower")
-                
-                leaderboard_data = laps.loc[laps['LapNumber'] == lap_num][['Driver', 'Position', 'Time', 'Compound', 'TeamColor']]
-                valid_leaderboard = leaderboard_data.dropna(subset=['Position']).sort_values(by='Position')
-
-                if not valid_leaderboard.empty:
-                    valid_leaderboard['Time'] = pd.to_timedelta(valid_leaderboard['Time'])
-                    valid_leaderboard['Interval'] = valid_leaderboard['Time'].diff()
-                    leaderboard_html = generate_leaderboard_html_broadcast(valid_leaderboard)
-                    st.html(leaderboard_html)
-
-            # Driver Panel
-            with driver_panel_placeholder.container():
-                driver_lap_data_df = laps.loc[(laps['LapNumber'] == lap_num) & (laps['Driver'] == managed_driver)]
-                if not driver_lap_data_df.empty:
-                    driver_lap_data = driver_lap_data_df.iloc[0]
-                    driver_pos = driver_lap_data['Position']
-                    st.subheader(f"Managing: {managed_driver}")
-                    status = "IN PIT" if pd.isna(driver_pos) else "Racing"
-                    st.metric("Status", status)
-                    if status == "Racing":
-                        st.metric("Position", int(driver_pos))
-                    
-                    st.markdown("---")
-                    
-                    # Tire Expert Panel
-                    st.subheader("Tire Expert Intel")
-                    current_compound = driver_lap_data['Compound']
-                    
-                    if pd.notna(driver_lap_data['TyreLife']):
-                        tyre_age = int(driver_lap_data['TyreLife'])
-                        degradation = degradation_model.get(current_compound, 0.150)
-                        predicted_lifespan = max(0, 25 - tyre_age) if 'SOFT' in str(current_compound) else max(0, 35 - tyre_age)
-                        
-                        st.metric(f"{current_compound} Tire Status", f"{tyre_age} Laps Old")
-                        st.write(f"Predicted Remaining Laps: **{predicted_lifespan}**")
-                        st.write(f"Est. Time Loss/Lap: **{degradation}s**")
-                    else:
-                        st.metric(f"{current_compound} Tire Status", "Data Unavailable")
-
-                    st.markdown("---")
-
-                    # Rival Analyst Panel
-                    st.subheader("Rival Analyst Intel")
-                    if status == "Racing" and not valid_leaderboard.empty:
-                        car_ahead = valid_leaderboard[valid_leaderboard['Position'] == driver_pos - 1]
-                        car_behind = valid_leaderboard[valid_leaderboard['Position'] == driver_pos + 1]
-                        
-                        gap_ahead_str = "Clear Track"
-                        if not car_ahead.empty:
-                            gap_ahead_str = f"{car_ahead.iloc[0]['Driver']} (+{round(2.5 + (lap_num % 4) * 0.1, 1)}s)"
-
-                        gap_behind_str = "Clear Track"
-                        if not car_behind.empty:
-                            gap_behind_str = f"{car_behind.iloc[0]['Driver']} (-{round(1.5 + (lap_num % 3) * 0.1, 1)}s)"
-                        
-                        st.metric("Car Ahead", gap_ahead_str)
-                        st.metric("Car Behind", gap_behind_str)
-
-                    st.markdown("---")
-
-                    # Strategy Simulation Panel
-                    st.subheader("Strategy Simulation")
-                    pit_stop_time_loss = 23
-                    predicted_rejoin_pos = int(driver_pos + 5) if status == "Racing" else "N/A"
-                    
-                    st.metric("Pit Stop Time Loss", f"~{pit_stop_time_loss} seconds")
-                    st.metric("Predicted Re-join Position", f"P{predicted_rejoin_pos}")
-
-                    
-
-            # Plot
-            with plot_placeholder.container():
-                if not valid_leaderboard.empty:
-                    top_5_drivers = valid_leaderboard.head(5)['Driver'].tolist()
-                    plot_data = laps[laps['Driver'].isin(top_5_drivers) & (laps['LapNumber'] <= lap_num)][['Driver', 'LapNumber', 'LapTime']]
-                    if not plot_data.empty:
-                        plot_data['LapTimeSeconds'] = plot_data['LapTime'].dt.total_seconds()
-                        fig = px.line(plot_data, x='LapNumber', y='LapTimeSeconds', color='Driver', 
-                                    labels={'LapNumber': 'Lap', 'LapTimeSeconds': 'Lap Time (s)'})
-                        st.plotly_chart(fig, use_container_width=True)
-                    
-                    st.markdown("---")
-                    car_html = generate_f1_car_tire_display(st.session_state.tire_temperatures, managed_driver)
-                    st.html(car_html)
 
-            # Advance lap after a delay (only in normal phase)
-            time.sleep(2)
-            advance_lap()
-            st.rerun()
\ No newline at end of file
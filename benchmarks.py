@@ -0,0 +1,268 @@
+# benchmarks.py
+"""
+Micro-benchmarks for the work the app repeats on every Streamlit rerun.
+
+Usage:
+    python benchmarks.py                          # synthetic 57-lap, 20-car race
+    python benchmarks.py --year 2023 --race Bahrain
+"""
+import argparse
+import json
+import time
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+
+from data import LapStore
+from timeline import RaceTimeline
+from lap_chart import LapTimeChart
+from lean_laps import to_seconds
+from typewriter import TYPEWRITER_SLOT, payload_bytes, typewriter_args
+from ui import (
+    TOWER_STYLESHEET, TimingTower, format_interval, generate_chief_plan_html, generate_leaderboard_html_broadcast, get_tire_info
+)
+
+
+def synthetic_session(n_laps=57, n_drivers=20, seed=0):
+    """Builds a FastF1-shaped (session, laps) pair so benchmarks run offline."""
+    rng = np.random.default_rng(seed)
+    drivers = [f"D{i:02d}" for i in range(n_drivers)]
+    numbers = [str(i + 1) for i in range(n_drivers)]
+    base_pace = rng.uniform(92.0, 95.0, n_drivers)
+
+    rows = []
+    race_time = np.full(n_drivers, 60.0)
+    for lap in range(1, n_laps + 1):
+        lap_times = base_pace + rng.normal(0, 0.3, n_drivers) + 0.05 * ((lap - 1) % 20)
+        lap_start = race_time.copy()
+        race_time = race_time + lap_times
+        positions = np.empty(n_drivers)
+        positions[np.argsort(race_time)] = np.arange(1, n_drivers + 1)
+        stint = 1 + int(lap > n_laps // 3) + int(lap > 2 * n_laps // 3)
+        for i, driver in enumerate(drivers):
+            rows.append({
+                'Time': pd.to_timedelta(race_time[i], unit='s'),
+                'Driver': driver,
+                'DriverNumber': numbers[i],
+                'LapTime': pd.to_timedelta(lap_times[i], unit='s'),
+                'LapNumber': float(lap),
+                'Stint': float(stint),
+                'PitOutTime': pd.NaT,
+                'PitInTime': pd.NaT,
+                'Compound': ['SOFT', 'MEDIUM', 'HARD'][stint - 1],
+                'TyreLife': float(lap - (stint - 1) * (n_laps // 3)),
+                'TrackStatus': '1',
+                'Position': positions[i],
+                'LapStartTime': pd.to_timedelta(lap_start[i], unit='s'),
+                'TeamName': f"Team {i // 2}",
+                'TeamColor': '3671C6',
+            })
+    laps = pd.DataFrame(rows).sort_values(['Driver', 'LapNumber']).reset_index(drop=True)
+
+    weather_time = np.arange(0.0, race_time.max() + 60.0, 60.0)
+    weather_data = pd.DataFrame({
+        'Time': pd.to_timedelta(weather_time, unit='s'),
+        'AirTemp': 25.0, 'TrackTemp': 40.0, 'Humidity': 50.0,
+        'Rainfall': np.zeros(len(weather_time), dtype=bool),
+    })
+    results = pd.DataFrame({
+        'DriverNumber': numbers, 'Abbreviation': drivers,
+        'TeamName': [f"Team {i // 2}" for i in range(n_drivers)], 'TeamColor': '3671C6',
+    })
+    session = SimpleNamespace(laps=laps, results=results, weather_data=weather_data, car_data={},
+                              event={'EventName': 'Synthetic Grand Prix', 'EventDate': ''})
+    return session, laps
+
+
+def timeit(fn, repeat=5):
+    """Returns the best wall time of `repeat` calls to fn, in milliseconds."""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+# --- Lap lookups (LapStore) ---
+
+# One rerun looks up the current lap once and the managed driver's row about
+# six times (tyre temps x4, radio, driver panel).
+DRIVER_LOOKUPS_PER_RERUN = 6
+
+
+def _masked_rerun(laps, lap_num, driver):
+    laps.loc[laps['LapNumber'] == lap_num]
+    for _ in range(DRIVER_LOOKUPS_PER_RERUN):
+        laps.loc[(laps['LapNumber'] == lap_num) & (laps['Driver'] == driver)]
+
+
+def _indexed_rerun(lap_store, lap_num, driver):
+    lap_store.lap(lap_num)
+    for _ in range(DRIVER_LOOKUPS_PER_RERUN):
+        lap_store.driver_lap(lap_num, driver)
+
+
+def bench_lap_lookups(laps):
+    driver = laps['Driver'].iloc[0]
+    total_laps = int(laps['LapNumber'].max())
+    build_ms = timeit(lambda: LapStore(laps), repeat=3)
+    lap_store = LapStore(laps)
+
+    masked_ms = timeit(lambda: [_masked_rerun(laps, lap, driver) for lap in range(1, total_laps + 1)]) / total_laps
+    indexed_ms = timeit(lambda: [_indexed_rerun(lap_store, lap, driver) for lap in range(1, total_laps + 1)]) / total_laps
+
+    print(f"LapStore build (once per session): {build_ms:8.3f} ms")
+    print(f"Per-rerun lookups, boolean masks:  {masked_ms:8.3f} ms")
+    print(f"Per-rerun lookups, LapStore:       {indexed_ms:8.3f} ms  ({masked_ms / indexed_ms:.1f}x)")
+
+
+# --- Timing tower (RaceTimeline) ---
+
+def _legacy_leaderboard(laps, lap_num):
+    leaderboard_data = laps.loc[laps['LapNumber'] == lap_num][['Driver', 'Position', 'Time', 'Compound', 'TeamColor']]
+    valid_leaderboard = leaderboard_data.dropna(subset=['Position']).sort_values(by='Position')
+    valid_leaderboard['Time'] = pd.to_timedelta(valid_leaderboard['Time'])
+    valid_leaderboard['Interval'] = valid_leaderboard['Time'].diff()
+    return valid_leaderboard
+
+
+def bench_timeline(laps):
+    lap_store = LapStore(laps)
+    total_laps = lap_store.total_laps
+    mid_lap = total_laps // 2
+
+    legacy_ms = timeit(lambda: _legacy_leaderboard(laps, mid_lap))
+    build_ms = timeit(lambda: RaceTimeline(lap_store), repeat=3)
+    timeline = RaceTimeline(lap_store)
+    lookup_ms = timeit(lambda: timeline.leaderboard(mid_lap))
+    all_frames_ms = timeit(lambda: [timeline.frame(lap) for lap in range(1, total_laps + 1)], repeat=3)
+
+    print(f"Timing tower, legacy single render:   {legacy_ms:8.3f} ms")
+    print(f"RaceTimeline build (once per session): {build_ms:8.3f} ms")
+    print(f"Timing tower, RaceTimeline DataFrame: {lookup_ms:8.3f} ms")
+    print(f"All {total_laps} frames from RaceTimeline:  {all_frames_ms:8.3f} ms")
+
+
+# --- Lap-time chart ---
+
+def _legacy_lap_chart(laps, timeline, lap_num):
+    import plotly.express as px
+    top_5_drivers = timeline.leaderboard(lap_num).head(5)['Driver'].tolist()
+    plot_data = laps[laps['Driver'].isin(top_5_drivers) & (laps['LapNumber'] <= lap_num)][['Driver', 'LapNumber', 'LapTime']]
+    plot_data['LapTimeSeconds'] = to_seconds(plot_data['LapTime'])
+    fig = px.line(plot_data, x='LapNumber', y='LapTimeSeconds', color='Driver',
+                  labels={'LapNumber': 'Lap', 'LapTimeSeconds': 'Lap Time (s)'})
+    return fig.to_json()
+
+
+def _incremental_lap_chart(chart, timeline, lap_num):
+    """Args for a lap after the first draw: just that lap's points."""
+    top_5_drivers = timeline.leaderboard(lap_num).head(5)['Driver'].tolist()
+    return json.dumps(chart.payload(lap_num, top_5_drivers, from_lap=lap_num))
+
+
+def bench_lap_chart(laps):
+    lap_store = LapStore(laps)
+    timeline = RaceTimeline(lap_store)
+    total_laps = lap_store.total_laps
+    build_ms = timeit(lambda: LapTimeChart(lap_store), repeat=3)
+    chart = LapTimeChart(lap_store)
+
+    print(f"LapTimeChart build (once per race):  {build_ms:8.3f} ms")
+    for lap_num in (max(2, total_laps // 4), total_laps // 2, total_laps):
+        legacy_ms = timeit(lambda: _legacy_lap_chart(laps, timeline, lap_num), repeat=3)
+        legacy_kb = len(_legacy_lap_chart(laps, timeline, lap_num)) / 1024
+        incremental_ms = timeit(lambda: _incremental_lap_chart(chart, timeline, lap_num))
+        incremental_kb = len(_incremental_lap_chart(chart, timeline, lap_num)) / 1024
+        print(
+            f"Lap {lap_num:>2} chart, px.line top 5: {legacy_ms:7.2f} ms {legacy_kb:6.1f} KB"
+            f" | incremental, all {len(chart.drivers)} drivers: {incremental_ms:5.2f} ms {incremental_kb:6.1f} KB"
+        )
+
+
+# --- Strategy overlay text (typewriter) ---
+
+# Four specialist reports and the Chief Strategist's plan, as (words, seconds slept per word)
+OVERLAY_MESSAGES = [(80, 0.02)] * 4 + [(180, 0.03)]
+
+
+def _server_typewriter(n_words):
+    """Bytes the server-side loop sent for one message: the whole growing block after every word."""
+    typed, sent = "", 0
+    for i in range(n_words):
+        typed += f"word{i} "
+        sent += len(generate_chief_plan_html(typed, typing=True).encode('utf-8'))
+    return sent + len(generate_chief_plan_html(typed).encode('utf-8'))
+
+
+def bench_typewriter():
+    server_bytes = sum(_server_typewriter(n_words) for n_words, _ in OVERLAY_MESSAGES)
+    blocked_s = sum(0.5 * (delay == 0.02) + n_words * delay for n_words, delay in OVERLAY_MESSAGES)
+    client_bytes = sum(
+        payload_bytes(typewriter_args([{'html': generate_chief_plan_html(TYPEWRITER_SLOT), 'text': " ".join(f"word{i}" for i in range(n_words))}]))
+        for n_words, _ in OVERLAY_MESSAGES
+    )
+
+    print(f"Overlay text, server-side typewriter: {server_bytes / 1024:8.1f} KB sent, script blocked {blocked_s:.1f} s")
+    print(f"Overlay text, browser typewriter:     {client_bytes / 1024:8.1f} KB sent, script blocked 0.0 s  ({server_bytes / client_bytes:.0f}x less)")
+
+# --- Timing tower ---
+
+def _legacy_tower_html(leaderboard_data):
+    """The tower as it was rendered every lap: stylesheet plus one f-string per iterrows() row."""
+    html = TOWER_STYLESHEET + '<div class="tower-container">'
+    for _, row in leaderboard_data.iterrows():
+        position = int(row['Position'])
+        tire_letter, tire_color = get_tire_info(row['Compound'])
+        html += f"""
+        <div class="driver-row" style="--order: {position}; border-left-color: #{row['TeamColor']};">
+            <div class="pos">{position}</div>
+            <div class="driver-name">{row['Driver']}</div>
+            <div class="interval">{format_interval([row['Interval']])[0]}</div>
+            <div class="tire" style="background-color: {tire_color}; color: black;">{tire_letter}</div>
+        </div>
+        """
+    return html + "</div>"
+
+
+def bench_tower(laps):
+    timeline = RaceTimeline(LapStore(laps))
+    lap_num = timeline.total_laps // 2
+    n_cars = len(timeline.frame(lap_num)['Driver'])
+    tower = TimingTower(timeline)
+    tower.html(lap_num)
+
+    legacy_ms = timeit(lambda: _legacy_tower_html(timeline.leaderboard(lap_num)))
+    legacy_kb = len(_legacy_tower_html(timeline.leaderboard(lap_num))) / 1024
+    template_ms = timeit(lambda: generate_leaderboard_html_broadcast(timeline.frame(lap_num), include_style=False))
+    memo_ms = timeit(lambda: tower.html(lap_num))
+    memo_kb = len(tower.html(lap_num)) / 1024
+    print(f"Timing tower, {n_cars} cars, iterrows + <style>: {legacy_ms:8.3f} ms {legacy_kb:5.1f} KB")
+    print(f"Timing tower, row template:                {template_ms:8.3f} ms")
+    print(f"Timing tower, memoized (per race/lap):     {memo_ms:8.4f} ms {memo_kb:5.1f} KB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--year', type=int)
+    parser.add_argument('--race')
+    args = parser.parse_args()
+
+    if args.year and args.race:
+        from data import load_session_data
+        session, laps, *_ = load_session_data(args.year, args.race, 'R')
+    else:
+        session, laps = synthetic_session()
+    print(f"{len(laps)} lap rows, {laps['Driver'].nunique()} drivers")
+
+    bench_lap_lookups(laps)
+    bench_timeline(laps)
+    bench_lap_chart(laps)
+    bench_typewriter()
+    bench_tower(laps)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,180 @@
+# briefings.py
+"""
+Offline pre-generation of pit-wall briefings for every trigger lap of a race.
+
+The bundle is a gzipped JSON file per race holding the agent responses for each
+(lap, driver) decision point, plus the Decision Analyst's reply to either plan.
+When a bundle exists, the strategy overlay and the outcome read from it instead
+of calling the LLM, so a kiosk can run a whole race offline. Briefings where an
+agent gave no response are left out, and a resumed run generates them again.
+
+Usage:
+    python briefings.py --year 2023 --race Bahrain
+    python briefings.py --year 2023 --race Monaco --driver HAM --driver VER --workers 2
+"""
+import argparse
+import gzip
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from discussions import missing_agents
+
+BRIEFINGS_DIR = os.environ.get('PITWALL_BRIEFINGS_DIR', 'briefings')
+# The plans a viewer can pick; the Decision Analyst's reply to each is bundled
+DECISION_CHOICES = ('A', 'B')
+
+_bundle_cache = {}
+_bundle_lock = threading.Lock()
+
+
+def bundle_path(year, race_name):
+    slug = race_name.lower().replace(' ', '_')
+    return os.path.join(BRIEFINGS_DIR, f"{year}_{slug}.json.gz")
+
+
+def _entry_key(lap_num, driver):
+    return f"{int(lap_num)}:{driver}"
+
+
+def _entry_complete(entry):
+    """True when a bundled briefing has every agent's reply and both Decision Analyst replies."""
+    decisions = entry.get('decisions', {})
+    return not missing_agents(entry['responses']) and all(decisions.get(choice) for choice in DECISION_CHOICES)
+
+
+def load_bundle(year, race_name):
+    """Returns the race's briefing bundle (re-read only when the file changes), or None."""
+    path = bundle_path(year, race_name)
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
+        return None
+    with _bundle_lock:
+        cached = _bundle_cache.get(path)
+        if cached and cached[0] == mtime:
+            return cached[1]
+    with gzip.open(path, 'rt', encoding='utf-8') as f:
+        bundle = json.load(f)
+    with _bundle_lock:
+        _bundle_cache[path] = (mtime, bundle)
+    return bundle
+
+
+def get_bundled_briefing(year, race_name, lap_num, driver):
+    """Returns (agent_responses, agent_timings) from the race bundle, or None if absent."""
+    bundle = load_bundle(year, race_name)
+    if not bundle:
+        return None
+    entry = bundle['briefings'].get(_entry_key(lap_num, driver))
+    # Older bundles may hold failed briefings; those go to the live pipeline instead
+    if entry is None or missing_agents(entry['responses']):
+        return None
+    return dict(entry['responses']), dict(entry['timings'])
+
+
+def get_bundled_decision(year, race_name, lap_num, driver, choice):
+    """Returns the bundled Decision Analyst reply to Plan `choice` at a decision point, or None."""
+    bundle = load_bundle(year, race_name)
+    if not bundle:
+        return None
+    entry = bundle['briefings'].get(_entry_key(lap_num, driver))
+    if entry is None:
+        return None
+    return entry.get('decisions', {}).get(choice) or None
+
+
+def write_bundle(year, race_name, briefings):
+    """Atomically writes a race bundle."""
+    path = bundle_path(year, race_name)
+    if not os.path.exists(BRIEFINGS_DIR):
+        os.makedirs(BRIEFINGS_DIR)
+    bundle = {'year': year, 'race': race_name, 'generated_at': time.time(), 'briefings': briefings}
+    tmp_path = path + '.tmp'
+    with gzip.open(tmp_path, 'wt', encoding='utf-8') as f:
+        json.dump(bundle, f, separators=(',', ':'))
+    os.replace(tmp_path, path)
+    return path
+
+
+def pregenerate_race(year, race_name, drivers=None, workers=2, refresh=False):
+    """Runs the agent pipeline for every trigger lap of a race and writes the bundle."""
+    from data import load_session_data
+    from triggers import compile_triggers
+    from degradation import fit_degradation
+    from rejoin import RejoinPredictor
+    from pit_loss import pit_loss_for
+    from helpers import run_agent_discussions_with_interruption, decision_analysis_text
+
+    session, laps, lap_store, timeline, telemetry = load_session_data(year, race_name, 'R')
+    plan = compile_triggers(lap_store, timeline)
+    degradation = fit_degradation(lap_store.laps)
+    rejoin = RejoinPredictor(timeline, pit_loss_for(race_name))
+
+    existing = {} if refresh else (load_bundle(year, race_name) or {}).get('briefings', {})
+    # Only finished briefings are kept; the rest are generated again
+    briefings = {key: entry for key, entry in existing.items() if _entry_complete(entry)}
+    jobs = [
+        (lap, driver, existing.get(_entry_key(lap, driver)))
+        for driver in (drivers or plan.drivers)
+        for lap in plan.trigger_laps(driver)
+        if _entry_key(lap, driver) not in briefings and lap_store.driver_row(lap, driver) is not None
+    ]
+    print(f"{year} {race_name}: {len(jobs)} briefings to generate ({len(briefings)} already bundled)")
+
+    def _run(lap, driver, previous):
+        # A complete discussion from an older bundle only needs its Decision Analyst replies
+        if previous and not missing_agents(previous['responses']):
+            responses, timings = previous['responses'], previous['timings']
+        else:
+            responses, timings = run_agent_discussions_with_interruption(
+                lap_store, timeline, session, lap, driver, interruption=plan.interruption_at(lap),
+                telemetry=telemetry, degradation=degradation, rejoin=rejoin
+            )
+            missing = missing_agents(responses)
+            if missing:
+                raise RuntimeError(f"lap {lap} {driver}: no response from {', '.join(missing)}")
+        decisions = {
+            choice: decision_analysis_text(lap_store, session, lap, driver, choice, responses)
+            for choice in DECISION_CHOICES
+        }
+        missing = [choice for choice, text in decisions.items() if not text]
+        if missing:
+            raise RuntimeError(f"lap {lap} {driver}: no decision analysis for Plan {', '.join(missing)}")
+        return lap, driver, {'responses': responses, 'timings': timings, 'decisions': decisions}
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="briefing") as executor:
+        futures = [executor.submit(_run, lap, driver, previous) for lap, driver, previous in jobs]
+        for done, future in enumerate(as_completed(futures), 1):
+            try:
+                lap, driver, entry = future.result()
+            except Exception as e:
+                print(f"  briefing failed: {e}")
+                continue
+            briefings[_entry_key(lap, driver)] = entry
+            print(f"  [{done}/{len(jobs)}] lap {lap} {driver} ({entry['timings'].get('Total', 0)}s)")
+
+    path = write_bundle(year, race_name, briefings)
+    print(f"Wrote {len(briefings)} briefings to {path} in {time.perf_counter() - started:.1f} s")
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--year', type=int, required=True)
+    parser.add_argument('--race', required=True)
+    parser.add_argument('--driver', action='append', help="Driver to pre-generate (repeatable); defaults to the whole grid")
+    parser.add_argument('--workers', type=int, default=2, help="Decision points briefed in parallel")
+    parser.add_argument('--refresh', action='store_true', help="Regenerate briefings already in the bundle")
+    args = parser.parse_args()
+
+    from streaming import log_reply_timings
+    log_reply_timings()
+    pregenerate_race(args.year, args.race, drivers=args.driver, workers=args.workers, refresh=args.refresh)
+
+
+if __name__ == '__main__':
+    main()
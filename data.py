@@ -1,24 +1,267 @@
 # data.py
-import streamlit as st
 import fastf1 as ff1
+from fastf1 import _api as ff1_api
 import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
 import pandas as pd
+from timeline import RaceTimeline
+from snapshot import load_snapshot, write_snapshot
+from race_store import race_store
+from lean_laps import LEAN_LAPS, compact_laps
+from telemetry import TELEMETRY_MODE, DriverTelemetry
+from tyre_model import TyreTemperatureModel
+from degradation import fit_degradation
+from rejoin import RejoinPredictor
+from pit_loss import pit_loss_for
+from lap_chart import LapTimeChart
+from ui import TimingTower
 
-@st.cache_data(ttl=3600)
-def load_session_data(year, race, session_type):
-    """Loads session data, ensuring telemetry is included."""
+# Race catalogue offered in the sidebar
+YEARS = [2023, 2022, 2021]
+RACES = ["Bahrain", "Jeddah", "Monaco", "Silverstone", "Monza", "Suzuka", "Las Vegas"]
+
+
+class LapStore:
+    """
+    Laps sorted by (LapNumber, Position) with precomputed row offsets, so that
+    a whole lap or a single (lap, driver) row is a positional slice instead of
+    a boolean-mask scan over the full laps frame.
+    """
+
+    def __init__(self, laps):
+        self.laps = laps.sort_values(by=['LapNumber', 'Position'], na_position='last', kind='stable').reset_index(drop=True)
+
+        lap_numbers = self.laps['LapNumber'].to_numpy(dtype=float, na_value=np.nan)
+        drivers = self.laps['Driver'].to_numpy()
+
+        # lap -> (start, stop) row offsets into the sorted frame
+        self._lap_bounds = {}
+        valid = ~pd.isna(lap_numbers)
+        if valid.any():
+            unique_laps, starts, counts = np.unique(lap_numbers[valid], return_index=True, return_counts=True)
+            for lap, start, count in zip(unique_laps, starts, counts):
+                self._lap_bounds[int(lap)] = (int(start), int(start + count))
+
+        # (lap, driver) -> row offset into the sorted frame
+        self._row_index = {}
+        for row, (lap, driver) in enumerate(zip(lap_numbers, drivers)):
+            if not pd.isna(lap):
+                self._row_index.setdefault((int(lap), driver), row)
+
+        self.total_laps = max(self._lap_bounds) if self._lap_bounds else 0
+
+    def lap(self, lap_number):
+        """Returns every driver's row for a lap, ordered by position."""
+        start, stop = self._lap_bounds.get(int(lap_number), (0, 0))
+        return self.laps.iloc[start:stop]
+
+    def driver_lap(self, lap_number, driver):
+        """Returns a one-row frame for (lap, driver), or an empty frame."""
+        row = self._row_index.get((int(lap_number), driver))
+        if row is None:
+            return self.laps.iloc[0:0]
+        return self.laps.iloc[row:row + 1]
+
+    def driver_row(self, lap_number, driver):
+        """Returns the row for (lap, driver) as a Series, or None."""
+        row = self._row_index.get((int(lap_number), driver))
+        return None if row is None else self.laps.iloc[row]
+
+
+def _enable_fastf1_cache():
     cache_dir = 'fastf1_cache'
     if not os.path.exists(cache_dir):
         os.makedirs(cache_dir)
     ff1.Cache.enable_cache(cache_dir)
-    
+
+
+def load_fastf1_session(year, race, session_type, telemetry=None, weather=True):
+    """Loads a session through FastF1 and merges team info into its laps."""
+    _enable_fastf1_cache()
     session = ff1.get_session(year, race, session_type)
-    
-    # This loads the data needed for session.car_data
-    session.load(telemetry=True) 
-    
+
+    # Lazy mode skips car/position data for the whole grid; see load_grid_car_data
+    if telemetry is None:
+        telemetry = TELEMETRY_MODE == 'eager'
+    session.load(laps=True, telemetry=telemetry, weather=weather, messages=True)
+
     laps = session.laps
     drivers_info = session.results[['DriverNumber', 'Abbreviation', 'TeamName', 'TeamColor']].rename(columns={'Abbreviation': 'Driver'})
     laps = pd.merge(laps, drivers_info, on=['DriverNumber', 'Driver'])
-    
-    return session, laps
\ No newline at end of file
+    return session, laps
+
+
+def load_weather_data(session):
+    """Fetches the weather samples of an already created FastF1 session."""
+    return pd.DataFrame(ff1_api.weather_data(session.api_path))
+
+
+def load_grid_car_data(year, race, session_type):
+    """Returns {driver number: car data (session-time stamped)} for the whole grid from FastF1."""
+    _enable_fastf1_cache()
+    session = ff1.get_session(year, race, session_type)
+    try:
+        # FastF1 only serves the whole grid's stream; RaceLoad parses it once per race and slices it per driver
+        car_data = ff1_api.car_data(session.api_path)
+    except ff1_api.SessionNotAvailableError:
+        return {}
+    return {number: telemetry.assign(SessionTime=telemetry['Time']) for number, telemetry in car_data.items()}
+
+
+# --- Staged loading ---
+LOAD_STAGES = {
+    'laps': "Timing & results",
+    'weather': "Weather",
+    'telemetry': "Telemetry",
+}
+
+_load_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="race-load")
+
+
+class RaceLoad:
+    """
+    A race loading on a background worker, published one stage at a time.
+
+    Once the 'laps' stage is done, `session`, `laps`, `lap_store`, `timeline`,
+    `tyre_model`, `degradation`, `rejoin`, `lap_chart`, `tower` and `telemetry` are usable; the weather stage then maps weather onto the timeline
+    and the telemetry stage makes car data available. `status` maps each stage
+    to 'pending', 'running', 'done' or 'failed'.
+    """
+
+    def __init__(self, year, race, session_type):
+        self.key = (year, race, session_type)
+        self.status = {stage: 'pending' for stage in LOAD_STAGES}
+        self.stage_seconds = {}
+        self.errors = {}
+        self.session = self.laps = self.lap_store = self.timeline = self.telemetry = None
+        self.tyre_model = self.degradation = self.rejoin = self.lap_chart = self.tower = None
+        self._finished = threading.Event()
+        self._started = False
+        self._start_lock = threading.Lock()
+
+    def start(self):
+        """Starts the background load once; later calls are no-ops."""
+        with self._start_lock:
+            if not self._started:
+                self._started = True
+                _load_executor.submit(self._run)
+        return self
+
+    def ready(self, stage):
+        return self.status[stage] == 'done'
+
+    @property
+    def finished(self):
+        return self._finished.is_set()
+
+    def wait(self, timeout=None):
+        """Blocks until every stage has finished or failed."""
+        return self._finished.wait(timeout)
+
+    def _grew(self, nbytes):
+        # Lazy caches fill during the race; keep the store's byte budget honest
+        race_store.grow(self.key, nbytes)
+
+    def _stage(self, stage, work):
+        self.status[stage] = 'running'
+        start = time.perf_counter()
+        try:
+            work()
+        except Exception as e:
+            self.errors[stage] = e
+            self.status[stage] = 'failed'
+            print(f"Loading {stage} for {self.key[0]} {self.key[1]} failed: {e}")
+            return False
+        self.stage_seconds[stage] = round(time.perf_counter() - start, 2)
+        self.status[stage] = 'done'
+        return True
+
+    def _run(self):
+        year, race, session_type = self.key
+        # Warm start: memory-map a columnar snapshot instead of re-parsing with FastF1
+        snapshot = load_snapshot(year, race, session_type)
+        loaded = {}
+
+        def _laps():
+            if snapshot is not None:
+                session, laps = snapshot
+            else:
+                session, laps = load_fastf1_session(year, race, session_type, telemetry=False, weather=False)
+            loaded['laps'] = laps
+            if LEAN_LAPS:
+                laps = compact_laps(laps)
+
+            # Build the lap index and running order once per session; the sorted frame doubles as `laps`
+            lap_store = LapStore(laps)
+            try:
+                car_data = session.car_data
+            except Exception:
+                car_data = None
+            self.telemetry = DriverTelemetry(lap_store.laps, car_data, on_grow=self._grew)
+            self.timeline = RaceTimeline(lap_store)
+            self.tyre_model = TyreTemperatureModel(lap_store, on_grow=self._grew)
+            self.degradation = fit_degradation(lap_store.laps)
+            self.rejoin = RejoinPredictor(self.timeline, pit_loss_for(race))
+            self.lap_chart = LapTimeChart(lap_store, race_key=f"{year}-{race}-{session_type}")
+            self.tower = TimingTower(self.timeline, on_grow=self._grew)
+            self.session, self.laps, self.lap_store = session, lap_store.laps, lap_store
+
+        def _weather():
+            weather_data = self.session.weather_data if snapshot is not None else load_weather_data(self.session)
+            loaded['weather'] = weather_data
+            self.timeline.attach_weather(weather_data)
+
+        def _telemetry():
+            # Snapshots and eagerly loaded sessions arrive with the grid's car data
+            if self.telemetry.has_car_data:
+                return
+            # One parse of the whole grid; each driver's slice is processed when first viewed
+            loaded['car_data'] = load_grid_car_data(year, race, session_type)
+            self.telemetry.preload(loaded['car_data'])
+
+        try:
+            if not self._stage('laps', _laps):
+                for stage in ('weather', 'telemetry'):
+                    self.status[stage] = 'failed'
+                race_store.discard(self.key)
+                return
+            self._stage('weather', _weather)
+            self._stage('telemetry', _telemetry)
+
+            if snapshot is None and 'weather' in loaded:
+                try:
+                    write_snapshot(
+                        self.session, loaded['laps'], year, race, session_type,
+                        weather_data=loaded['weather'], car_data=loaded.get('car_data')
+                    )
+                except Exception as e:
+                    # A failed snapshot only costs the next cold load
+                    print(f"Could not write snapshot for {year} {race}: {e}")
+            # Unprocessed drivers live on in the telemetry's own raw pool
+            loaded.pop('car_data', None)
+            race_store.remeasure(self.key)
+        finally:
+            self._finished.set()
+
+
+def start_race_load(year, race, session_type):
+    """Returns the shared RaceLoad for a race, starting it in the background if needed."""
+    # Started only once stored, so a failed load can't discard itself before it is stored
+    return race_store.get((year, race, session_type), lambda: RaceLoad(year, race, session_type)).start()
+
+
+def load_session_data(year, race, session_type):
+    """
+    Returns (session, laps, lap_store, timeline, telemetry) for a race, waiting for every stage.
+
+    Every caller gets the same objects from the shared race store, so nothing is
+    copied per lap; callers must treat them as read-only.
+    """
+    race_load = start_race_load(year, race, session_type)
+    race_load.wait()
+    if not race_load.ready('laps'):
+        raise race_load.errors.get('laps') or RuntimeError(f"Could not load {year} {race}")
+    return race_load.session, race_load.laps, race_load.lap_store, race_load.timeline, race_load.telemetry
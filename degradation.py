@@ -0,0 +1,103 @@
+# degradation.py
+"""
+Tyre degradation fitted once per race.
+
+Lap times are fuel-corrected (later laps run lighter), restricted to clean
+green-flag laps and regressed on TyreLife within each stint, so every stint
+contributes its own baseline and only the slope is pooled: per compound, and
+per (compound, driver) where a driver has enough laps.
+"""
+import numpy as np
+import pandas as pd
+
+from lean_laps import to_seconds
+
+# Lap time gained per lap from burning fuel (~1.7 kg/lap at ~0.035 s/kg)
+FUEL_EFFECT_PER_LAP = 0.06
+# A tyre is considered done once it is this much slower than when new
+DEGRADATION_LIMIT = 2.0
+# Laps slower than this fraction over the stint median are traffic, mistakes or damage
+OUTLIER_FACTOR = 1.07
+MIN_STINT_LAPS = 4
+MIN_DRIVER_LAPS = 8
+# Fallback rate (s/lap) when a compound has no usable stints
+DEFAULT_RATE = 0.150
+
+
+class DegradationModel:
+    """Fitted degradation rates in seconds per lap of tyre age."""
+
+    def __init__(self, compound_rates, driver_rates, compound_laps):
+        self.compound_rates = compound_rates
+        self.driver_rates = driver_rates
+        self.compound_laps = compound_laps
+
+    def rate(self, compound, driver=None):
+        """Returns the s/lap rate for a compound, the driver's own where it was fitted."""
+        compound = str(compound)
+        if driver is not None and (compound, driver) in self.driver_rates:
+            return self.driver_rates[(compound, driver)]
+        return self.compound_rates.get(compound, DEFAULT_RATE)
+
+    def remaining_laps(self, compound, tyre_age, driver=None):
+        """Laps until the tyre is DEGRADATION_LIMIT seconds off its new pace."""
+        rate = self.rate(compound, driver)
+        if rate <= 0:
+            return None
+        return max(0, int(DEGRADATION_LIMIT / rate - tyre_age))
+
+    def describe(self, compound, tyre_age, driver=None):
+        """One-line degradation summary for agent prompts."""
+        compound = str(compound)
+        rate = self.rate(compound, driver)
+        remaining = self.remaining_laps(compound, tyre_age, driver)
+        source = f"fitted on {self.compound_laps[compound]} clean laps" if compound in self.compound_laps else "default estimate"
+        outlook = f"about {remaining} laps before it is {DEGRADATION_LIMIT:.1f}s off its new pace" if remaining is not None else "no measurable wear"
+        return f"Degradation {rate:+.3f}s/lap ({source}), {outlook}."
+
+
+def _pooled_slopes(stints, keys):
+    """Within-stint pooled least-squares slope of Corrected on TyreLife per group of keys."""
+    products = stints.assign(xy=stints['x'] * stints['y'], xx=stints['x'] ** 2)
+    sums = products.groupby(keys, observed=True)[['xy', 'xx']].sum()
+    counts = products.groupby(keys, observed=True).size()
+    sums = sums[sums['xx'] > 0]
+    return (sums['xy'] / sums['xx']).round(3), counts.loc[sums.index]
+
+
+def fit_degradation(laps):
+    """Fits a DegradationModel from the merged laps frame."""
+    frame = pd.DataFrame({
+        'Driver': laps['Driver'].astype(object),
+        'Compound': laps['Compound'].astype(object),
+        'Stint': pd.to_numeric(laps['Stint'], errors='coerce') if 'Stint' in laps.columns else np.nan,
+        'LapNumber': pd.to_numeric(laps['LapNumber'], errors='coerce'),
+        'TyreLife': pd.to_numeric(laps['TyreLife'], errors='coerce'),
+        'LapTime': to_seconds(laps['LapTime']).to_numpy(),
+    })
+    clean = laps['TrackStatus'].astype(str).isin(['1', '']) if 'TrackStatus' in laps.columns else pd.Series(True, index=laps.index)
+    clean &= laps['PitInTime'].isna() & laps['PitOutTime'].isna() & (frame['LapNumber'] > 1)
+    frame = frame[clean.to_numpy()].dropna(subset=['Compound', 'Stint', 'TyreLife', 'LapTime'])
+
+    stint = frame.groupby(['Driver', 'Stint'], sort=False)
+    frame = frame[frame['LapTime'] <= stint['LapTime'].transform('median') * OUTLIER_FACTOR]
+    frame = frame[frame.groupby(['Driver', 'Stint'], sort=False)['LapTime'].transform('size') >= MIN_STINT_LAPS]
+    if frame.empty:
+        return DegradationModel({}, {}, {})
+
+    # Fuel-correct, then demean within each stint so every stint keeps its own baseline
+    corrected = frame['LapTime'] + FUEL_EFFECT_PER_LAP * (frame['LapNumber'] - 1)
+    stint = frame.assign(Corrected=corrected).groupby(['Driver', 'Stint'], sort=False)
+    frame = frame.assign(
+        x=frame['TyreLife'] - stint['TyreLife'].transform('mean'),
+        y=corrected - stint['Corrected'].transform('mean'),
+    )
+
+    compound_rates, compound_laps = _pooled_slopes(frame, ['Compound'])
+    driver_rates, driver_laps = _pooled_slopes(frame, ['Compound', 'Driver'])
+    driver_rates = driver_rates[driver_laps >= MIN_DRIVER_LAPS]
+    return DegradationModel(
+        {str(compound): float(rate) for compound, rate in compound_rates.items()},
+        {(str(compound), driver): float(rate) for (compound, driver), rate in driver_rates.items()},
+        {str(compound): int(count) for compound, count in compound_laps.items()},
+    )
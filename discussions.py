@@ -0,0 +1,105 @@
+# discussions.py
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+
+# Four specialists plus the Chief Strategist
+LLM_CALLS_PER_DISCUSSION = 5
+DISCUSSION_AGENTS = ("Race Engineer", "Tire Expert", "Weather Forecaster", "Rival Analyst", "Chief Strategist")
+# A reply starting with this stands in for an agent that failed or timed out
+NO_RESPONSE = "No response"
+# Handed to waiting sessions when the running session was interrupted before finishing
+_ABANDONED = object()
+
+
+def missing_agents(agent_responses):
+    """Agents of a discussion that gave no usable reply."""
+    missing = []
+    for name in DISCUSSION_AGENTS:
+        reply = str(agent_responses.get(name) or "").strip()
+        if not reply or reply.startswith(NO_RESPONSE):
+            missing.append(name)
+    return missing
+
+
+class DiscussionService:
+    """
+    Single-flight, memoized pit-wall discussions shared by every session in the process.
+
+    Requests for the same key while a discussion is running wait on that run instead
+    of starting another; finished results are kept (LRU) and served from memory.
+    Failed runs are not cached, so the next request retries: a run fails when compute
+    raises or when `complete(result)` is false (e.g. a specialist gave no response).
+    Only errors (Exception) reach the waiting sessions; if the running session is
+    interrupted (a BaseException such as a Streamlit rerun), one of them runs it instead.
+    """
+
+    def __init__(self, max_entries=512):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._results = OrderedDict()
+        self._in_flight = {}
+        self.computed = 0
+        self.cache_hits = 0
+        self.joined_in_flight = 0
+
+    @property
+    def llm_calls_saved(self):
+        return (self.cache_hits + self.joined_in_flight) * LLM_CALLS_PER_DISCUSSION
+
+    def get(self, key, compute, complete=None):
+        """Returns the (agent_responses, agent_timings) for key, computing it at most once."""
+        while True:
+            with self._lock:
+                if key in self._results:
+                    self._results.move_to_end(key)
+                    self.cache_hits += 1
+                    return self._copy(self._results[key])
+                future = self._in_flight.get(key)
+                owner = future is None
+                if owner:
+                    future = Future()
+                    self._in_flight[key] = future
+            if owner:
+                break
+
+            result = future.result()
+            if result is _ABANDONED:
+                continue
+            if complete is None or complete(result):
+                with self._lock:
+                    self.joined_in_flight += 1
+            return self._copy(result)
+
+        try:
+            result = compute()
+        except Exception as e:
+            future.set_exception(e)
+            with self._lock:
+                self._in_flight.pop(key, None)
+            raise
+        except BaseException:
+            # Interrupted, not failed: a waiting session takes the run over
+            with self._lock:
+                self._in_flight.pop(key, None)
+            future.set_result(_ABANDONED)
+            raise
+
+        with self._lock:
+            self.computed += 1
+            if complete is None or complete(result):
+                self._results[key] = result
+                while len(self._results) > self.max_entries:
+                    self._results.popitem(last=False)
+            self._in_flight.pop(key, None)
+        future.set_result(result)
+        return self._copy(result)
+
+    @staticmethod
+    def _copy(result):
+        # Callers annotate the response dict, so hand each one its own copy
+        responses, timings = result
+        return dict(responses), dict(timings)
+
+
+discussion_service = DiscussionService()
@@ -1,6 +1,7 @@
 import streamlit as st
 import time
 import pandas as pd
+import numpy as np
 import plotly.express as px
 from data import load_session_data
 from ui import generate_leaderboard_html_broadcast, format_lap_time, generate_f1_car_tire_display
@@ -8,11 +9,20 @@ from agents import RaceEngineerAgent # Import the agent
 from agents import llm_config
 from agents import (
     RaceEngineerAgent, WeatherForecasterAgent, TireExpertAgent, DecisionAnalystAgent,
-    RivalAnalystAgent, ChiefStrategistAgent, is_termination_msg
+    RivalAnalystAgent, ChiefStrategistAgent, is_termination_msg, llm_response_cache
 )
 import autogen
+import logging
 import re
 import base64
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeoutError
+from streamlit.runtime.scriptrunner_utils.exceptions import ScriptControlException
+from discussions import discussion_service, missing_agents, DISCUSSION_AGENTS, NO_RESPONSE
+from streaming import ReplyStream
+from typewriter import typewriter, TYPEWRITER_SLOT
+from briefings import get_bundled_briefing, get_bundled_decision
+
+logger = logging.getLogger(__name__)
 
 
 def get_base64_of_bin_file(bin_file):
@@ -36,26 +46,12 @@ def set_page_background(png_file):
     '''
     st.markdown(page_bg_img, unsafe_allow_html=True)
 
-def typewriter_generator_single(text: str, delay: float = 0.05):
-    """A generator function that yields words from a single text with a delay."""
-    # Handle if the item is a dict from an agent message
-    if isinstance(text, dict) and 'content' in text:
-        content = text['content']
-    else:
-        content = str(text)
-        
-    # Yield word by word
-    for word in content.split(" "):
-        yield word + " "
-        time.sleep(delay)
-
-def display_agent_message_with_typing(container, agent_name, icon, message_content, delay=0.02):
-    """Display agent message with typewriter effect"""
-    placeholder = container.empty()
-    
-    # Show "thinking" state
-    placeholder.markdown(
-        f"""
+def display_agent_message_with_typing(container, agent_name, icon, message_content, delay=0.02, start_after_ms=0):
+    """
+    Display agent message with a typewriter effect played in the browser.
+    Returns when the animation ends (ms), so the next box can start after it.
+    """
+    shell = f"""
         <div style="
             background-color: #2d2d2d;
             color: #FFFFFF;
@@ -70,82 +66,81 @@ def display_agent_message_with_typing(container, agent_name, icon, message_conte
                 {icon} {agent_name}
             </div>
             <div>
-                <span style="opacity: 0.5;">Analyzing data...</span>
+                {TYPEWRITER_SLOT}
             </div>
         </div>
-        """, 
-        unsafe_allow_html=True
-    )
-    
-    time.sleep(0.5)
-    
-    # Type out the message
-    typed_text = ""
-    words = message_content.split()
-    for i, word in enumerate(words):
-        typed_text += word + " "
-        placeholder.markdown(
-            f"""
-            <div style="
-                background-color: #2d2d2d;
-                color: #FFFFFF;
-                padding: 10px;
-                border-radius: 8px;
-                border-left: 4px solid #ff6b6b;
-                margin: 5px 0;
-                font-size: 12px;
-                min-height: 140px;
-            ">
-                <div style="font-weight: bold; margin-bottom: 8px; padding-bottom: 5px; border-bottom: 1px solid #444;">
-                    {icon} {agent_name}
-                </div>
-                <div>
-                    {typed_text}{"▌" if i < len(words)-1 else ""}
-                </div>
-            </div>
-            """, 
-            unsafe_allow_html=True
-        )
-        time.sleep(delay)
+        """
+    message = {
+        'html': shell, 'text': message_content, 'pause_ms': 500,
+        'waiting': '<span style="opacity: 0.5;">Analyzing data...</span>',
+    }
+    with container:
+        return typewriter([message], key=f"agent_{agent_name}", delay_ms=int(delay * 1000), start_after_ms=start_after_ms)
 
-def build_strategy_prompts(laps_df, session_obj, current_lap, driver_abbr):
+def build_strategy_prompts(lap_store, timeline, session_obj, current_lap, driver_abbr, telemetry=None, degradation=None, rejoin=None):
     """Gathers data and builds a dictionary of targeted prompts for each agent."""
-    driver_lap_data = laps_df.loc[(laps_df['LapNumber'] == current_lap) & (laps_df['Driver'] == driver_abbr)].iloc[0]
+    driver_lap_data = lap_store.driver_lap(current_lap, driver_abbr).iloc[0]
     position = driver_lap_data['Position']
     tyre_life = int(driver_lap_data['TyreLife']) if pd.notna(driver_lap_data['TyreLife']) else 0
     compound = driver_lap_data['Compound']
     
-    next_lap_data = laps_df.loc[(laps_df['LapNumber'] == current_lap + 1) & (laps_df['Driver'] == driver_abbr)]
+    next_lap_data = lap_store.driver_row(current_lap + 1, driver_abbr)
     historic_pit_stop = "No"
-    if not next_lap_data.empty and pd.notna(next_lap_data.iloc[0]['PitInTime']):
-        historic_pit_stop = f"Yes, pitted for {next_lap_data.iloc[0]['Compound']} tires."
+    if next_lap_data is not None and pd.notna(next_lap_data['PitInTime']):
+        historic_pit_stop = f"Yes, pitted for {next_lap_data['Compound']} tires."
 
-    lap_start_time = driver_lap_data['LapStartTime']
-    future_weather_df = session_obj.weather_data[session_obj.weather_data['Time'] > lap_start_time]
+    weather = timeline.weather
     rain_msg = "No rain expected in the next few laps."
-    if not future_weather_df.empty and future_weather_df['Rainfall'].any():
-        rain_time = future_weather_df[future_weather_df['Rainfall']].iloc[0]['Time']
-        rain_lap_df = laps_df[laps_df['LapStartTime'] >= rain_time]
-        if not rain_lap_df.empty:
-            rain_lap = int(rain_lap_df.iloc[0]['LapNumber'])
-            rain_msg = f"Rain is possible around lap {rain_lap}."
-
-    leaderboard = laps_df.loc[laps_df['LapNumber'] == current_lap].sort_values(by='Position')
+    rain_lap = weather.rain_lap_from(current_lap)
+    if rain_lap:
+        rain_msg = f"Rain is possible around lap {rain_lap}."
+    conditions_msg = ""
+    if pd.notna(weather.air_temp[current_lap]):
+        conditions_msg = (f" Air {weather.air_temp[current_lap]:.0f}°C, track {weather.track_temp[current_lap]:.0f}°C,"
+                          f" humidity {weather.humidity[current_lap]:.0f}%.")
+    weather_state = "The track is wet." if weather.rainfall[current_lap] else "The weather is clear."
+
+    leaderboard = timeline.leaderboard(current_lap)
     rivals_df = leaderboard[
         (leaderboard['Position'].between(position - 5, position + 5)) & (leaderboard['Position'] != position)
     ]
-    rivals_df = rivals_df.dropna(subset=['Position', 'TyreLife'])
-    rival_intel_lines = [f"- P{int(r['Position'])} {r['Driver']} on {r['Compound']} ({int(r['TyreLife'])} laps old)." for _, r in rivals_df.iterrows()]
+    rivals_df = rivals_df.dropna(subset=['TyreLife'])
+    # Gaps relative to our driver, from the race's gap-to-leader matrix
+    driver_col = timeline.driver_column.get(driver_abbr)
+    our_gap = timeline.gap_matrix[current_lap, driver_col] if driver_col is not None else np.nan
+    rival_intel_lines = []
+    for _, r in rivals_df.iterrows():
+        gap = r['GapToLeader'] - our_gap
+        gap_msg = f", {abs(gap):.1f}s {'behind' if gap > 0 else 'ahead'}" if pd.notna(gap) else ""
+        rival_intel_lines.append(f"- P{int(r['Position'])} {r['Driver']} on {r['Compound']} ({int(r['TyreLife'])} laps old){gap_msg}.")
     rival_intel = "\n".join(rival_intel_lines)
+
+    # Degradation fitted over the whole race for this compound (and driver, where there is enough data)
+    degradation_msg = f" {degradation.describe(compound, tyre_life, driver_abbr)}" if degradation is not None else ""
+
+    # Cost of stopping now at this circuit's calibrated pit loss
+    pit_msg = ""
+    prediction = rejoin.predict(current_lap, driver_abbr) if rejoin is not None else None
+    if prediction:
+        behind_msg = f" behind {prediction['Behind']}" if prediction['Behind'] else ""
+        pit_msg = f" A stop this lap costs about {rejoin.pit_loss:.0f}s and would rejoin P{prediction['Position']}{behind_msg}."
+
+    # Precomputed per-lap telemetry summary, when the race's telemetry is available
+    telemetry_msg = ""
+    if telemetry is not None:
+        driver_numbers = session_obj.results.loc[session_obj.results['Abbreviation'] == driver_abbr, 'DriverNumber']
+        lap_summary = telemetry.lap_summary(driver_numbers.iloc[0]) if not driver_numbers.empty else None
+        if lap_summary is not None and lap_summary.describe(current_lap):
+            telemetry_msg = f" {lap_summary.describe(current_lap)}"
     
     # Create a dictionary of prompts
     prompts = {
-        "RaceEngineerAgent": f"Driver: {driver_abbr}, Position: P{int(position)}, Lap: {current_lap}. Give your standard technical update.",
-        "TireExpertAgent": f"Driver: {driver_abbr} is on {compound} tires that are {tyre_life} laps old. Report on wear, degradation, and temperature.",
-        "WeatherForecasterAgent": f"Current forecast is: {rain_msg}. Confirm the outlook.",
+        "RaceEngineerAgent": f"Driver: {driver_abbr}, Position: P{int(position)}, Lap: {current_lap}.{telemetry_msg} Give your standard technical update.",
+        "TireExpertAgent": f"Driver: {driver_abbr} is on {compound} tires that are {tyre_life} laps old.{degradation_msg} Report on wear, degradation, and temperature.",
+        "WeatherForecasterAgent": f"Current forecast is: {rain_msg}{conditions_msg} Confirm the outlook.",
         "RivalAnalystAgent": f"Our driver {driver_abbr} is P{int(position)}. Nearby rivals:\n{rival_intel}\nAnalyze the immediate threats.",
         "ChiefStrategistAgent": {
-            "briefing": f"You have received reports from your team. Your driver {driver_abbr} is P{int(position)} on {int(tyre_life)}-lap-old {compound} tires. The weather is clear.",
+            "briefing": f"You have received reports from your team. Your driver {driver_abbr} is P{int(position)} on {int(tyre_life)}-lap-old {compound} tires. {weather_state}{pit_msg}",
             "historical_fact": f"CRITICAL INFO: In the real race, did {driver_abbr} pit at the end of this lap? **{historic_pit_stop}**"
         }
     }
@@ -159,10 +154,13 @@ def initialize_session_state():
         'current_lap': 0,
         'simulation_phase': 'normal',  # 'normal', 'strategy_discussion', 'awaiting_choice', 'showing_outcome'
         'strategy_chat_history': {},  # Changed to dict to store individual agent messages
+        'agent_timings': {},  # Seconds per agent for the last discussion
         'strategy_choice': None,
         'strategy_log': [],
         'last_strategy_lap': 0,
         'predicted_rain_lap': None,
+        'trigger_plan': None,  # Compiled TriggerPlan for the selected race
+        'trigger_plan_key': None,
         'decision_mode': False,
         'decision_timer_start': 0,
         'pit_approved': None,
@@ -171,6 +169,15 @@ def initialize_session_state():
         'discussion_completed': False,  # NEW: Track if discussion is done for this lap
         'tire_temperatures': {'FL': 85, 'FR': 88, 'RL': 82, 'RR': 86},  # Mock tire temperatures
         'last_radio_lap': 0,
+        'trigger_reasons': [],  # Strategy triggers on the lap on screen
+        'lap_on_screen': 0,  # Lap the live fragments are showing, and when the race reached it
+        'lap_shown_at': 0.0,
+        'lap_cpu_ms': [],  # Server CPU per live dashboard refresh
+        'script_cpu_ms': 0.0,  # Server CPU a full app run spends before the dashboard
+        'load_status_on_page': {},  # Race load stages as of the last full app run
+        'radio_message': None,  # Last radio exchange, kept up while the browser plays it
+        'chief_streamed': False,  # Chief Strategist's plan was streamed live to this session
+        'outcome_streamed': False,  # Decision analysis was streamed live to this session
         'radio_conversation_active': False,
         'radio_messages_shown': [],  # Track which messages we've used
         'show_guide': True,  # Controls guide visibility
@@ -181,41 +188,41 @@ def initialize_session_state():
         if key not in st.session_state:
             st.session_state[key] = default_value
 
-def check_strategy_triggers(lap_num, current_lap_data, session, laps, lap_start_time):
-    """Check if any strategy triggers are active for this lap"""
-    trigger_reasons = []
-    
-    # 1) 10-lap interval
-    if lap_num > 1 and lap_num % 10 == 0:
-        trigger_reasons.append(f"lap_interval({lap_num})")
-
-    # 2) Safety Car / Red Flag
-    if not current_lap_data.empty:
-        status = current_lap_data['TrackStatus'].iloc[0]
-        if status in ['4', '5']:
-            trigger_reasons.append(f"track_status({status})")
-
-    # 3) Rain forecast: only two laps before
-    if pd.notna(lap_start_time):
-        weather_slice = session.weather_data[session.weather_data['Time'] <= lap_start_time]
-        if st.session_state.predicted_rain_lap is None and not weather_slice.empty and weather_slice['Rainfall'].any():
-            rain_time = weather_slice[weather_slice['Rainfall']].iloc[0]['Time']
-            rain_lap_df = laps[laps['LapStartTime'] >= rain_time]
-            if not rain_lap_df.empty:
-                rain_lap = int(rain_lap_df.iloc[0]['LapNumber'])
-                st.session_state.predicted_rain_lap = rain_lap
-
-        prl = st.session_state.predicted_rain_lap
-        if prl and lap_num in [prl - 2, prl - 1]:
-            trigger_reasons.append(f"rain_warning(lap {prl})")
-    
-    return trigger_reasons
+def check_strategy_triggers(lap_num, driver_abbr, trigger_plan):
+    """Check if any strategy triggers are active for this lap (precompiled in triggers.py)"""
+    return trigger_plan.reasons_at(lap_num, driver_abbr)
+
+# Specialists report concurrently; each gets this long before the Chief goes without it
+SPECIALIST_TIMEOUT = 45  # seconds
+SPECIALIST_WORKERS = 4
+
+def _ask_specialist(agent, message):
+    """Runs a one-turn chat with a specialist agent; returns (reply text, seconds taken)."""
+    started = time.perf_counter()
+    ephemeral_proxy = autogen.UserProxyAgent(
+        "EphemeralProxy", 
+        human_input_mode="NEVER", 
+        code_execution_config=False
+    )
+    # initiate_chat swaps in its own `cache`, so pass the shared response cache explicitly
+    ephemeral_proxy.initiate_chat(recipient=agent, message=message, max_turns=1, cache=llm_response_cache)
+    return ephemeral_proxy.last_message()['content'], round(time.perf_counter() - started, 2)
+
+def run_agent_discussions(lap_store, timeline, session, lap_num, managed_driver, telemetry=None, degradation=None, rejoin=None,
+                          on_chief_chunk=None):
+    """
+    Run the agent discussions and return (agent_responses, agent_timings).
 
-def run_agent_discussions(laps, session, lap_num, managed_driver):
-    """Run the agent discussions and return individual agent responses"""
-    prompts = build_strategy_prompts(laps, session, lap_num, managed_driver)
+    The four specialists are queried in parallel; only the Chief Strategist waits on
+    them, so latency is roughly max(specialists) + chief. The Chief's reply is streamed
+    and each chunk passed to on_chief_chunk as it arrives. Timings are in seconds.
+    """
+    prompts = build_strategy_prompts(
+        lap_store, timeline, session, lap_num, managed_driver, telemetry=telemetry, degradation=degradation, rejoin=rejoin
+    )
     
     agent_responses = {}
+    agent_timings = {}
     
     # Use a dictionary to explicitly link prompt keys to agents and their display names
     agent_map = {
@@ -225,28 +232,29 @@ def run_agent_discussions(laps, session, lap_num, managed_driver):
         "RivalAnalystAgent": (RivalAnalystAgent, "Rival Analyst")
     }
     
-    # Get specialist reports by iterating through the map
-    for prompt_key, (agent, display_name) in agent_map.items():
-        ephemeral_proxy = autogen.UserProxyAgent(
-            "EphemeralProxy", 
-            human_input_mode="NEVER", 
-            code_execution_config=False
-        )
-        # Use the reliable 'prompt_key' to get the message
-        ephemeral_proxy.initiate_chat(recipient=agent, message=prompts[prompt_key], max_turns=1)
-        report = ephemeral_proxy.last_message()
-        agent_responses[display_name] = report['content']
+    # Fan out the specialist reports; collect them back in agent_map order
+    executor = ThreadPoolExecutor(max_workers=SPECIALIST_WORKERS, thread_name_prefix="specialist")
+    started = time.perf_counter()
+    futures = {
+        display_name: executor.submit(_ask_specialist, agent, prompts[prompt_key])
+        for prompt_key, (agent, display_name) in agent_map.items()
+    }
+    for display_name, future in futures.items():
+        remaining = max(0.0, started + SPECIALIST_TIMEOUT - time.perf_counter())
+        try:
+            agent_responses[display_name], agent_timings[display_name] = future.result(timeout=remaining)
+        except FuturesTimeoutError:
+            agent_responses[display_name] = "No response (timed out)"
+            agent_timings[display_name] = SPECIALIST_TIMEOUT
+        except Exception as e:
+            agent_responses[display_name] = f"No response ({e})"
+            agent_timings[display_name] = round(time.perf_counter() - started, 2)
+    # Don't hold the pit wall up on a specialist that timed out
+    executor.shutdown(wait=False, cancel_futures=True)
 
     # Get Chief Strategist final decision
     reports_text = "\n".join([f"**{name} Report:**\n{content}\n" for name, content in agent_responses.items()])
     
-    user_proxy = autogen.UserProxyAgent(
-        name="TeamPrincipal",
-        human_input_mode="NEVER",
-        code_execution_config=False,
-        is_termination_msg=is_termination_msg
-    )
-    
     chief_briefing = (
         f"{prompts['ChiefStrategistAgent']['briefing']}\n\n"
         f"{prompts['ChiefStrategistAgent']['historical_fact']}\n\n"
@@ -255,11 +263,16 @@ def run_agent_discussions(laps, session, lap_num, managed_driver):
         "Chief Strategist, using all the above information, provide Plan A and Plan B."
     )
 
-    user_proxy.initiate_chat(recipient=ChiefStrategistAgent, message=chief_briefing, max_turns=1)
-    final_plan = user_proxy.last_message()
-    agent_responses["Chief Strategist"] = final_plan['content']
+    chief_stream = ReplyStream(ChiefStrategistAgent, chief_briefing)
+    for chunk in chief_stream:
+        if on_chief_chunk is not None:
+            on_chief_chunk(chunk)
+    agent_responses["Chief Strategist"] = chief_stream.text
+    agent_timings["Chief Strategist"] = round(chief_stream.total, 2)
+    agent_timings["Chief first word"] = round(chief_stream.first_word or chief_stream.total, 2)
+    agent_timings["Total"] = round(time.perf_counter() - started, 2)
     
-    return agent_responses
+    return agent_responses, agent_timings
 
 
 def get_radio_messages():
@@ -311,316 +324,204 @@ def get_radio_message_for_lap(lap_num, total_laps, driver_position):
     
     return message
 
-def display_radio_conversation(radio_placeholder, engineer_msg, driver_msg, driver_abbr):
-    """Display radio conversation with typing effect"""
-    
-    # Clear and show engineer message first
-    radio_placeholder.markdown(
-        f"""
+def _radio_shell(speaker, color):
+    return f"""
         <div style="
             background-color: #1a1a1a;
             padding: 10px;
             border-radius: 8px;
             margin: 5px 0;
-            border-left: 3px solid #00ff00;
+            border-left: 3px solid {color};
         ">
-            <div style="color: #00ff00; font-size: 12px; margin-bottom: 5px;">
-                📻 RACE ENGINEER
+            <div style="color: {color}; font-size: 12px; margin-bottom: 5px;">
+                {speaker}
             </div>
             <div style="color: white; font-size: 14px;">
-                Connecting...
+                {TYPEWRITER_SLOT}
             </div>
         </div>
-        """, 
-        unsafe_allow_html=True
-    )
-    
-    time.sleep(0.5)
-    
-    # Type engineer message
-    typed_engineer = ""
-    for word in engineer_msg.split():
-        typed_engineer += word + " "
-        radio_placeholder.markdown(
-            f"""
-            <div style="
-                background-color: #1a1a1a;
-                padding: 10px;
-                border-radius: 8px;
-                margin: 5px 0;
-                border-left: 3px solid #00ff00;
-            ">
-                <div style="color: #00ff00; font-size: 12px; margin-bottom: 5px;">
-                    📻 RACE ENGINEER
-                </div>
-                <div style="color: white; font-size: 14px;">
-                    {typed_engineer}▌
-                </div>
-            </div>
-            """, 
-            unsafe_allow_html=True
-        )
-        time.sleep(0.03)
-    
-    # Complete engineer message
-    radio_placeholder.markdown(
-        f"""
-        <div style="
-            background-color: #1a1a1a;
-            padding: 10px;
-            border-radius: 8px;
-            margin: 5px 0;
-            border-left: 3px solid #00ff00;
-        ">
-            <div style="color: #00ff00; font-size: 12px; margin-bottom: 5px;">
-                📻 RACE ENGINEER
-            </div>
-            <div style="color: white; font-size: 14px;">
-                {typed_engineer.strip()}
-            </div>
-        </div>
-        """, 
-        unsafe_allow_html=True
-    )
-    
-    time.sleep(1.0)
-    
-    # Add driver response
-    radio_placeholder.markdown(
-        f"""
-        <div style="
-            background-color: #1a1a1a;
-            padding: 10px;
-            border-radius: 8px;
-            margin: 5px 0;
-            border-left: 3px solid #00ff00;
-        ">
-            <div style="color: #00ff00; font-size: 12px; margin-bottom: 5px;">
-                📻 RACE ENGINEER
-            </div>
-            <div style="color: white; font-size: 14px;">
-                {typed_engineer.strip()}
-            </div>
-        </div>
-        <div style="
-            background-color: #1a1a1a;
-            padding: 10px;
-            border-radius: 8px;
-            margin: 5px 0;
-            border-left: 3px solid #ff6b35;
-        ">
-            <div style="color: #ff6b35; font-size: 12px; margin-bottom: 5px;">
-                🏎️ {driver_abbr}
-            </div>
-            <div style="color: white; font-size: 14px;">
-                Responding...
-            </div>
-        </div>
-        """, 
-        unsafe_allow_html=True
-    )
-    
-    time.sleep(0.5)
-    
-    # Type driver response
-    typed_driver = ""
-    for word in driver_msg.split():
-        typed_driver += word + " "
-        radio_placeholder.markdown(
-            f"""
-            <div style="
-                background-color: #1a1a1a;
-                padding: 10px;
-                border-radius: 8px;
-                margin: 5px 0;
-                border-left: 3px solid #00ff00;
-            ">
-                <div style="color: #00ff00; font-size: 12px; margin-bottom: 5px;">
-                    📻 RACE ENGINEER
-                </div>
-                <div style="color: white; font-size: 14px;">
-                    {typed_engineer.strip()}
-                </div>
-            </div>
-            <div style="
-                background-color: #1a1a1a;
-                padding: 10px;
-                border-radius: 8px;
-                margin: 5px 0;
-                border-left: 3px solid #ff6b35;
-            ">
-                <div style="color: #ff6b35; font-size: 12px; margin-bottom: 5px;">
-                    🏎️ {driver_abbr}
-                </div>
-                <div style="color: white; font-size: 14px;">
-                    {typed_driver}▌
-                </div>
-            </div>
-            """, 
-            unsafe_allow_html=True
-        )
-        time.sleep(0.03)
-    
-    # Final complete conversation
-    radio_placeholder.markdown(
-        f"""
-        <div style="
-            background-color: #1a1a1a;
-            padding: 10px;
-            border-radius: 8px;
-            margin: 5px 0;
-            border-left: 3px solid #00ff00;
-        ">
-            <div style="color: #00ff00; font-size: 12px; margin-bottom: 5px;">
-                📻 RACE ENGINEER
-            </div>
-            <div style="color: white; font-size: 14px;">
-                {typed_engineer.strip()}
-            </div>
-        </div>
-        <div style="
-            background-color: #1a1a1a;
-            padding: 10px;
-            border-radius: 8px;
-            margin: 5px 0;
-            border-left: 3px solid #ff6b35;
-        ">
-            <div style="color: #ff6b35; font-size: 12px; margin-bottom: 5px;">
-                🏎️ {driver_abbr}
-            </div>
-            <div style="color: white; font-size: 14px;">
-                {typed_driver.strip()}
-            </div>
-        </div>
-        """, 
-        unsafe_allow_html=True
-    )
+        """
+
+def display_radio_conversation(radio_placeholder, engineer_msg, driver_msg, driver_abbr, key=None):
+    """Display radio conversation with a typing effect played in the browser"""
+    messages = [
+        {'html': _radio_shell("📻 RACE ENGINEER", "#00ff00"), 'text': engineer_msg, 'waiting': "Connecting...", 'pause_ms': 500, 'hold_ms': 1000},
+        {'html': _radio_shell(f"🏎️ {driver_abbr}", "#ff6b35"), 'text': driver_msg, 'waiting': "Responding...", 'pause_ms': 500},
+    ]
+    with radio_placeholder.container():
+        typewriter(messages, key=key)
+
+def discussion_complete(result):
+    """True when every agent in an (agent_responses, agent_timings) result actually replied."""
+    agent_responses, _ = result
+    return not missing_agents(agent_responses)
 
-def run_agent_discussions_with_interruption(laps, session, lap_num, managed_driver, interruption=None):
+def failed_discussion(error):
+    """Stand-in (agent_responses, agent_timings) shown when a discussion could not run at all."""
+    return {name: f"{NO_RESPONSE} ({error})" for name in DISCUSSION_AGENTS}, {}
+
+def run_agent_discussions_with_interruption(lap_store, timeline, session, lap_num, managed_driver, interruption=None, telemetry=None, degradation=None, rejoin=None,
+                                           on_chief_chunk=None):
     """
     Wrapper around run_agent_discussions(...) that ensures the interruption context is attached
     to the returned agent messages. This keeps the original run_agent_discussions implementation
     intact while guaranteeing agents downstream (esp. DecisionAnalyst) receive the interruption.
+    Returns (agent_responses, agent_timings) like run_agent_discussions; errors are logged and
+    re-raised so callers can tell a failed run from a real one (see failed_discussion).
     """
-    # Call the existing function (assumes it exists in this module)
     try:
-        agent_responses = run_agent_discussions(laps, session, lap_num, managed_driver)
-    except Exception as e:
-        # If the original fails, return a minimal fallback dict
-        agent_responses = {"Race Engineer": "No response", "Tire Expert": "No response", "Weather Forecaster": "No response", "Rival Analyst": "No response", "Chief Strategist": "No response"}
+        agent_responses, agent_timings = run_agent_discussions(
+            lap_store, timeline, session, lap_num, managed_driver, telemetry=telemetry, degradation=degradation, rejoin=rejoin,
+            on_chief_chunk=on_chief_chunk
+        )
+    except Exception:
+        logger.exception("Agent discussion failed for %s on lap %s", managed_driver, lap_num)
+        raise
 
     # Attach interruption context into the returned dict so analyze_user_decision can pick it up
     if interruption:
         agent_responses['InterruptionContext'] = interruption
 
-    return agent_responses
+    return agent_responses, agent_timings
 
 
-def analyze_user_decision(laps, session, lap_num, managed_driver, user_choice, agent_context):
+def get_strategy_discussion(year, race_name, lap_store, timeline, session, lap_num, managed_driver, interruption=None, telemetry=None, degradation=None, rejoin=None,
+                            on_chief_chunk=None):
     """
-    Use the DecisionAnalyst LLM to produce a paragraph-style analysis.
-    Returns: list[str]  -> a list of paragraphs (strings) in order to be shown sequentially.
+    Single-flight, memoized run_agent_discussions_with_interruption(...) keyed by
+    (year, race, lap, driver, interruption): repeated or concurrent requests share one run.
+    Served from the race's pre-generated briefing bundle when one covers this lap.
+    Only the session that runs the discussion sees the Chief's reply stream in.
+    Runs where an agent gave no response are returned but not memoized; errors propagate.
     """
-    import pandas as pd
-    import re
-    from agents import DecisionAnalystAgent
-
-    # helper normalizer (keeps/extends your earlier normalizer)
-    def _normalize_agent_response_to_text(resp):
-        import ast, re
-        if resp is None:
-            return ""
-        # If list, take assistant message or first item
-        if isinstance(resp, (list, tuple)):
-            for item in resp:
-                if isinstance(item, dict) and item.get("role") == "assistant" and item.get("content"):
-                    resp = item
-                    break
-            else:
-                resp = resp[0] if len(resp) > 0 else resp
-
-        # extract content
-        content = None
-        if isinstance(resp, dict):
-            content = resp.get("content") or resp.get("message") or resp.get("text") or str(resp)
+    # A pre-generated bundle (see briefings.py) answers without any live inference
+    bundled = get_bundled_briefing(year, race_name, lap_num, managed_driver)
+    if bundled is not None:
+        return bundled
+
+    # Other sessions may be waiting on this run, so a rerun or stop of this page (raised
+    # from its redraw) stops the drawing only; the page gets it once the run is done
+    interrupted = []
+
+    def show_chunk(chunk):
+        if on_chief_chunk is None or interrupted:
+            return
+        try:
+            on_chief_chunk(chunk)
+        except ScriptControlException as e:
+            interrupted.append(e)
+
+    key = (year, race_name, lap_num, managed_driver, interruption)
+    result = discussion_service.get(
+        key,
+        lambda: run_agent_discussions_with_interruption(
+            lap_store, timeline, session, lap_num, managed_driver, interruption=interruption,
+            telemetry=telemetry, degradation=degradation, rejoin=rejoin, on_chief_chunk=show_chunk
+        ),
+        complete=discussion_complete,
+    )
+    if interrupted:
+        raise interrupted[0]
+    return result
+
+
+def _normalize_agent_response_to_text(resp):
+    """Coerces whatever an agent returned (dict, list, object or string) into plain text."""
+    import ast, re
+    if resp is None:
+        return ""
+    # If list, take assistant message or first item
+    if isinstance(resp, (list, tuple)):
+        for item in resp:
+            if isinstance(item, dict) and item.get("role") == "assistant" and item.get("content"):
+                resp = item
+                break
         else:
-            content = getattr(resp, "content", None) or getattr(resp, "text", None) or getattr(resp, "message", None) or str(resp)
+            resp = resp[0] if len(resp) > 0 else resp
 
-        # if looks like dict-string, try parse
-        if isinstance(content, str) and content.strip().startswith("{") and ("'content'" in content or '"content"' in content):
-            try:
-                parsed = ast.literal_eval(content)
-                if isinstance(parsed, dict):
-                    content = parsed.get("content") or parsed.get("message") or parsed.get("text") or str(parsed)
-            except Exception:
-                pass
+    # extract content
+    content = None
+    if isinstance(resp, dict):
+        content = resp.get("content") or resp.get("message") or resp.get("text") or str(resp)
+    else:
+        content = getattr(resp, "content", None) or getattr(resp, "text", None) or getattr(resp, "message", None) or str(resp)
 
-        content = "" if content is None else str(content).strip()
+    # if looks like dict-string, try parse
+    if isinstance(content, str) and content.strip().startswith("{") and ("'content'" in content or '"content"' in content):
+        try:
+            parsed = ast.literal_eval(content)
+            if isinstance(parsed, dict):
+                content = parsed.get("content") or parsed.get("message") or parsed.get("text") or str(parsed)
+        except Exception:
+            pass
 
-        # Clean extraneous object wrappers (simple)
-        content = re.sub(r"^\s*Assistant Response:\s*", "", content, flags=re.I)
+    content = "" if content is None else str(content).strip()
 
-        return content
+    # Clean extraneous object wrappers (simple)
+    content = re.sub(r"^\s*Assistant Response:\s*", "", content, flags=re.I)
 
-    try:
-        # --- Build contextual info (same as you did earlier) ---
-        current_lap_data = laps.loc[laps['LapNumber'] == lap_num]
-        driver_data = laps.loc[(laps['LapNumber'] == lap_num) & (laps['Driver'] == managed_driver)]
-
-        if driver_data.empty:
-            driver_position = "Unknown"
-            tire_info = "Unknown"
-            tire_age = "Unknown"
-        else:
-            driver_row = driver_data.iloc[0]
-            driver_position = f"P{int(driver_row['Position'])}" if pd.notna(driver_row['Position']) else "Pit Lane"
-            tire_info = str(driver_row['Compound']) if pd.notna(driver_row['Compound']) else "Unknown"
-            tire_age = f"{int(driver_row['TyreLife'])} laps" if pd.notna(driver_row['TyreLife']) else "Unknown"
+    return content
 
-        total_laps = int(laps['LapNumber'].max()) if 'LapNumber' in laps.columns else 0
-        race_progress = f"{lap_num}/{total_laps} ({round((lap_num/total_laps*100),1) if total_laps else 0}%)"
 
-        # Compute a simple historical choice (you already mark A as historical)
-        # We keep your original heuristic but force Plan A = historical by default if you'd prefer
-        historical_choice = 'A'  # your convention: Plan A == historical
-        interruption_note = ""
-        try:
-            interruption = None
-            if isinstance(agent_context, dict):
-                interruption = agent_context.get('InterruptionContext') or agent_context.get('interruption') or None
+def _decision_analysis_prompt(lap_store, session, lap_num, managed_driver, user_choice, agent_context):
+    """Builds the DecisionAnalyst prompt from the race context and the team communications."""
+    # --- Build contextual info (same as you did earlier) ---
+    driver_data = lap_store.driver_lap(lap_num, managed_driver)
 
-            if interruption:
-                # Make a short, prominent section for the LLM prompt
-                interruption_note = f"\nINTERRUPTION CONTEXT:\n- {interruption}\n\n"
-        except Exception:
-            interruption_note = ""
-        
-        # Build the team communications excerpt but exclude the interruption key so it doesn't duplicate
-        communications_lines = []
+    if driver_data.empty:
+        driver_position = "Unknown"
+        tire_info = "Unknown"
+        tire_age = "Unknown"
+    else:
+        driver_row = driver_data.iloc[0]
+        driver_position = f"P{int(driver_row['Position'])}" if pd.notna(driver_row['Position']) else "Pit Lane"
+        tire_info = str(driver_row['Compound']) if pd.notna(driver_row['Compound']) else "Unknown"
+        tire_age = f"{int(driver_row['TyreLife'])} laps" if pd.notna(driver_row['TyreLife']) else "Unknown"
+
+    total_laps = lap_store.total_laps
+    race_progress = f"{lap_num}/{total_laps} ({round((lap_num/total_laps*100),1) if total_laps else 0}%)"
+
+    # Compute a simple historical choice (you already mark A as historical)
+    # We keep your original heuristic but force Plan A = historical by default if you'd prefer
+    historical_choice = 'A'  # your convention: Plan A == historical
+    interruption_note = ""
+    try:
+        interruption = None
         if isinstance(agent_context, dict):
-            for agent, message in agent_context.items():
-                if agent in ('InterruptionContext', 'interruption'):
-                    continue
-                try:
-                    # truncate long messages for prompt brevity
-                    if isinstance(message, str) and len(message) > 300:
-                        communications_lines.append(f"- {agent}: {message[:300]}...")
-                    else:
-                        communications_lines.append(f"- {agent}: {message}")
-                except Exception:
-                    communications_lines.append(f"- {agent}: (unreadable message)")
-        else:
-            # Fallback: try to stringify
+            interruption = agent_context.get('InterruptionContext') or agent_context.get('interruption') or None
+
+        if interruption:
+            # Make a short, prominent section for the LLM prompt
+            interruption_note = f"\nINTERRUPTION CONTEXT:\n- {interruption}\n\n"
+    except Exception:
+        interruption_note = ""
+    
+    # Build the team communications excerpt but exclude the interruption key so it doesn't duplicate
+    communications_lines = []
+    if isinstance(agent_context, dict):
+        for agent, message in agent_context.items():
+            if agent in ('InterruptionContext', 'interruption'):
+                continue
             try:
-                communications_lines = [f"- {str(agent_context)[:400]}"]
-            except:
-                communications_lines = ["- No agent communications available"]
+                # truncate long messages for prompt brevity
+                if isinstance(message, str) and len(message) > 300:
+                    communications_lines.append(f"- {agent}: {message[:300]}...")
+                else:
+                    communications_lines.append(f"- {agent}: {message}")
+            except Exception:
+                communications_lines.append(f"- {agent}: (unreadable message)")
+    else:
+        # Fallback: try to stringify
+        try:
+            communications_lines = [f"- {str(agent_context)[:400]}"]
+        except:
+            communications_lines = ["- No agent communications available"]
 
-        communications_text = chr(10).join(communications_lines)
+    communications_text = chr(10).join(communications_lines)
 
-        # --- Build a detailed prompt for the DecisionAnalyst LLM ---
-        # We ask the LLM to produce paragraph-format reasoning and to tailor responses
-        analysis_prompt = f"""
+    # --- Build a detailed prompt for the DecisionAnalyst LLM ---
+    # We ask the LLM to produce paragraph-format reasoning and to tailor responses
+    analysis_prompt = f"""
 You are an expert Formula 1 Decision Analyst. Use the following race context and team communications to produce a **clear, human-friendly, paragraph-based** explanation about the user's decision.
 
 Important:
@@ -652,33 +553,60 @@ Write 3–4 paragraphs that:
 
 Return plain text only (no JSON or dict wrappers).
 """
-        # Call the DecisionAnalyst LLM
-        decision_analyst = DecisionAnalystAgent
-        raw_response = decision_analyst.generate_reply([{"role": "user", "content": analysis_prompt}])
+    return analysis_prompt
+
+
+def split_analysis_paragraphs(outcome_text):
+    """Splits the DecisionAnalyst reply into the paragraphs shown on the outcome card."""
+    # Split into paragraphs (preserve order); remove empty fragments
+    paragraphs = [p.strip() for p in re.split(r'\n{2,}', outcome_text) if p.strip()]
+
+    # If only one long paragraph, try splitting by sentence groups to make display nicer
+    if len(paragraphs) == 1:
+        # split on periods followed by two spaces/newline or on newline
+        sent_groups = re.split(r'(?<=\.)\s{2,}|\n', paragraphs[0])
+        sent_groups = [s.strip() for s in sent_groups if s.strip()]
+        # limit the groups to max 5 to avoid too many tiny paragraphs
+        if 1 < len(sent_groups) <= 5:
+            paragraphs = sent_groups
+
+    return paragraphs
+
+
+def decision_analysis_text(lap_store, session, lap_num, managed_driver, user_choice, agent_context, on_chunk=None):
+    """
+    Streams the DecisionAnalyst's reply to Plan user_choice, passing each chunk to on_chunk.
+    Returns the reply as plain text ("" if nothing usable came back); errors propagate.
+    """
+    prompt = _decision_analysis_prompt(lap_store, session, lap_num, managed_driver, user_choice, agent_context)
+    analysis = ReplyStream(DecisionAnalystAgent, prompt)
+    for chunk in analysis:
+        if on_chunk is not None:
+            on_chunk(chunk)
+    return _normalize_agent_response_to_text(analysis.text)
 
-        # Normalize to text
-        outcome_text = _normalize_agent_response_to_text(raw_response)
 
-        # If the LLM returned nothing usable, fallback to raw string
+def analyze_user_decision(lap_store, session, lap_num, managed_driver, user_choice, agent_context, on_chunk=None, year=None, race_name=None):
+    """
+    Use the DecisionAnalyst LLM to produce a paragraph-style analysis.
+    The reply is streamed; each chunk is passed to on_chunk as it arrives. Given year and
+    race_name, a reply pre-generated in the race's briefing bundle is used instead.
+    Returns: list[str]  -> a list of paragraphs (strings) in order to be shown sequentially.
+    """
+    # A pre-generated bundle (see briefings.py) answers without any live inference
+    if year is not None:
+        bundled = get_bundled_decision(year, race_name, lap_num, managed_driver, user_choice)
+        if bundled:
+            return split_analysis_paragraphs(bundled)
+
+    try:
+        outcome_text = decision_analysis_text(
+            lap_store, session, lap_num, managed_driver, user_choice, agent_context, on_chunk=on_chunk
+        )
+        # Fall back to a note if the LLM returned nothing usable
         if not outcome_text:
-            try:
-                outcome_text = str(raw_response)
-            except:
-                outcome_text = f"Decision analysis returned no text for Plan {user_choice}."
-
-        # Split into paragraphs (preserve order); remove empty fragments
-        paragraphs = [p.strip() for p in re.split(r'\n{2,}', outcome_text) if p.strip()]
-
-        # If only one long paragraph, try splitting by sentence groups to make display nicer
-        if len(paragraphs) == 1:
-            # split on periods followed by two spaces/newline or on newline
-            sent_groups = re.split(r'(?<=\.)\s{2,}|\n', paragraphs[0])
-            sent_groups = [s.strip() for s in sent_groups if s.strip()]
-            # limit the groups to max 5 to avoid too many tiny paragraphs
-            if 1 < len(sent_groups) <= 5:
-                paragraphs = sent_groups
-
-        return paragraphs
+            outcome_text = f"Decision analysis returned no text for Plan {user_choice}."
+        return split_analysis_paragraphs(outcome_text)
 
     except Exception as e:
         # Fallback: single paragraph error message
@@ -0,0 +1,133 @@
+# lap_chart.py
+"""
+Lap-time chart that grows by one point per driver per lap.
+
+Every driver's lap times are laid out once per race as (driver, lap) arrays,
+with pit in/out laps, laps behind a Safety Car / VSC / red flag, the opening
+lap and other slow outliers removed. The browser component
+(frontend/lap_chart/index.html) draws the race up to the current lap and then
+extends each trace by the new lap's point with Plotly.extendTraces, so the
+page never redraws the whole race. After the first draw each lap sends only
+its own points; a new race, a lap jump or a remounted chart gets laps 1..lap
+again. The page never holds laps the viewer hasn't reached, and plotly.js comes
+from the installed plotly package, not a CDN.
+"""
+import functools
+import os
+import shutil
+import warnings
+
+import numpy as np
+import pandas as pd
+import plotly
+import streamlit as st
+import streamlit.components.v1 as components
+from plotly.offline import get_plotlyjs_version
+
+from degradation import OUTLIER_FACTOR
+from lean_laps import to_seconds
+
+# Track status codes for Safety Car, red flag and Virtual Safety Car
+NEUTRALISED_STATUS = ('4', '5', '6', '7')
+FRONTEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "frontend", "lap_chart")
+
+
+@functools.lru_cache(maxsize=None)
+def plotly_js_url():
+    """Copies the installed plotly.min.js next to the component on first use; returns its URL relative to index.html."""
+    name = f"plotly-{get_plotlyjs_version()}.min.js"
+    target = os.path.join(FRONTEND_DIR, name)
+    if not os.path.exists(target):
+        source = os.path.join(os.path.dirname(plotly.__file__), "package_data", "plotly.min.js")
+        try:
+            shutil.copyfile(source, target + ".tmp")
+            os.replace(target + ".tmp", target)
+        except OSError:
+            # Read-only install: fall back to the CDN build of the same version
+            return f"https://cdn.plot.ly/{name}"
+    return name
+
+
+_component = components.declare_component("lap_chart", path=FRONTEND_DIR)
+
+
+class LapTimeChart:
+    """
+    Per-driver lap-time series for a race, built once.
+
+    `seconds` is a float array [driver, lap] (column 0 unused so lap numbers
+    index directly) with NaN wherever a lap is missing or filtered out.
+    """
+
+    def __init__(self, lap_store, race_key=None):
+        laps = lap_store.laps.dropna(subset=['LapNumber'])
+        n_rows = lap_store.total_laps + 1
+        self.race_key = race_key
+
+        driver_index, drivers = pd.factorize(laps['Driver'].astype(object))
+        self.drivers = list(drivers)
+        lap_index = laps['LapNumber'].to_numpy(dtype=int)
+        seconds = to_seconds(laps['LapTime']).to_numpy(dtype=float)
+
+        # Pit in/out laps, neutralised laps and the standing start aren't representative pace
+        status = laps['TrackStatus'].astype(str) if 'TrackStatus' in laps.columns else pd.Series('1', index=laps.index)
+        neutralised = status.str.contains('|'.join(NEUTRALISED_STATUS)).to_numpy()
+        in_pit = laps['PitInTime'].notna().to_numpy() | laps['PitOutTime'].notna().to_numpy()
+        seconds[neutralised | in_pit | (lap_index <= 1)] = np.nan
+
+        self.seconds = np.full((len(self.drivers), n_rows), np.nan)
+        self.seconds[driver_index, lap_index] = seconds
+
+        # Anything still well off the driver's typical pace is traffic, a mistake or damage
+        with warnings.catch_warnings():
+            # Drivers without a single clean lap have an all-NaN row
+            warnings.simplefilter('ignore', RuntimeWarning)
+            median = np.nanmedian(self.seconds, axis=1)
+        with np.errstate(invalid='ignore'):
+            self.seconds[self.seconds > median[:, None] * OUTLIER_FACTOR] = np.nan
+
+        colors = laps.groupby(driver_index)['TeamColor'].first() if 'TeamColor' in laps.columns else pd.Series(dtype=object)
+        self.colors = [f"#{colors.get(i)}" if pd.notna(colors.get(i)) else None for i in range(len(self.drivers))]
+
+        # JSON-ready once: component args are re-sent every lap, so build them only here
+        self._series = [[None if np.isnan(v) else round(float(v), 3) for v in row[1:]] for row in self.seconds]
+
+    def payload(self, lap_num, visible, from_lap=1):
+        """
+        Component args for the chart at lap_num; drivers not in `visible` start hidden in the legend.
+        `seconds` holds laps from_lap..lap_num: from_lap=1 draws the chart afresh, a later
+        from_lap extends a chart already drawn up to from_lap - 1 (empty if nothing is new).
+        """
+        visible = set(visible)
+        lap_num = int(lap_num)
+        return {
+            'race_key': self.race_key,
+            'from_lap': int(from_lap),
+            'lap': lap_num,
+            'drivers': self.drivers,
+            'colors': self.colors,
+            'seconds': [series[from_lap - 1:lap_num] for series in self._series],
+            'visible': [driver in visible for driver in self.drivers],
+            'plotly_js': plotly_js_url(),
+        }
+
+
+def lap_time_chart(chart, lap_num, visible, key="lap_chart", height=400):
+    """
+    Draws `chart` up to lap_num, sending only the laps the browser doesn't have yet.
+
+    The session remembers the last lap sent to this chart. If the page can't extend
+    what it has (e.g. the chart was remounted), it asks for a resync through its
+    component value and the next lap sends the whole race so far.
+    """
+    lap_num = int(lap_num)
+    sent_key = f"{key}_sent"
+    sent_race, sent_lap, resyncs = st.session_state.get(sent_key, (None, 0, 0))
+    page = st.session_state.get(key) or {}
+    resync = page.get('resync', 0) != resyncs
+    if resync or sent_race != chart.race_key or not 0 < sent_lap <= lap_num:
+        from_lap = 1
+    else:
+        from_lap = sent_lap + 1
+    st.session_state[sent_key] = (chart.race_key, lap_num, page.get('resync', 0))
+    _component(**chart.payload(lap_num, visible, from_lap=from_lap), height=height, key=key, default=None)
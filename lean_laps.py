@@ -0,0 +1,86 @@
+# lean_laps.py
+"""
+Compact ("lean") dtype layout for the merged laps frame.
+
+String columns become categoricals, lap and sector times become float32 seconds
+and lap / position / tyre counters become small nullable integers. Enable it
+with PITWALL_LEAN_LAPS=1; code that reads lap times goes through `to_seconds`,
+which accepts either layout.
+
+Usage (bytes per race before and after):
+    python lean_laps.py --year 2023
+"""
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+LEAN_LAPS = os.environ.get('PITWALL_LEAN_LAPS', '0') == '1'
+
+CATEGORY_COLUMNS = ['Driver', 'Team', 'TeamName', 'Compound', 'TeamColor', 'TrackStatus']
+SECONDS_COLUMNS = ['LapTime', 'Sector1Time', 'Sector2Time', 'Sector3Time']
+# Signed 16-bit so arithmetic like `position - 5` can't wrap
+COUNTER_COLUMNS = ['LapNumber', 'Position', 'TyreLife']
+
+
+def to_seconds(values):
+    """Returns a lap-time column as float seconds, whichever layout it is stored in."""
+    values = pd.Series(values)
+    if pd.api.types.is_timedelta64_dtype(values):
+        return values.dt.total_seconds()
+    return values.astype(float)
+
+
+def compact_laps(laps):
+    """Returns a copy of the laps frame in the lean layout."""
+    lean = laps.copy()
+    for column in CATEGORY_COLUMNS:
+        if column in lean.columns:
+            lean[column] = lean[column].astype('category')
+    for column in SECONDS_COLUMNS:
+        if column in lean.columns:
+            lean[column] = to_seconds(lean[column]).astype(np.float32)
+    for column in COUNTER_COLUMNS:
+        if column in lean.columns:
+            lean[column] = pd.to_numeric(lean[column]).round().astype('Int16')
+    return lean
+
+
+def memory_report(laps):
+    """Returns {column: (bytes before, bytes after)} plus a 'TOTAL' row."""
+    before = laps.memory_usage(deep=True, index=True)
+    after = compact_laps(laps).memory_usage(deep=True, index=True)
+    report = {column: (int(before[column]), int(after[column])) for column in before.index}
+    report['TOTAL'] = (int(before.sum()), int(after.sum()))
+    return report
+
+
+def main():
+    from data import RACES, load_fastf1_session
+    from snapshot import load_snapshot
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--year', type=int, required=True)
+    parser.add_argument('--race', action='append', help="Race to measure (repeatable); defaults to the app's race list")
+    parser.add_argument('--columns', action='store_true', help="Break the saving down per column")
+    args = parser.parse_args()
+
+    print(f"{'Race':<14}{'before':>10}{'lean':>10}{'saved':>8}")
+    for race in args.race or RACES:
+        try:
+            snapshot = load_snapshot(args.year, race, 'R')
+            session, laps = snapshot if snapshot is not None else load_fastf1_session(args.year, race, 'R')
+        except Exception as e:
+            print(f"{race:<14}failed: {e}")
+            continue
+        report = memory_report(laps)
+        before, after = report.pop('TOTAL')
+        print(f"{race:<14}{before / 1e6:>8.2f}MB{after / 1e6:>8.2f}MB{1 - after / before:>8.0%}")
+        if args.columns:
+            for column, (col_before, col_after) in sorted(report.items(), key=lambda item: item[1][1] - item[1][0]):
+                print(f"    {column:<22}{col_before / 1e3:>9.1f}kB{col_after / 1e3:>9.1f}kB")
+
+
+if __name__ == '__main__':
+    main()
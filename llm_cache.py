@@ -0,0 +1,197 @@
+# llm_cache.py
+"""
+Persistent, content-addressed cache for agent LLM responses.
+
+Plugs into autogen as an agent's `client_cache`: autogen hands us the full
+request (model, temperature, messages including the system message) as the key,
+as a dict or as its JSON, and the completion object as the value. Entries live in a local SQLite file,
+expire after a TTL and are evicted least-recently-used once the file grows past
+its byte budget.
+
+Settings come from the environment:
+    PITWALL_LLM_CACHE_PATH     SQLite file (default llm_cache/responses.sqlite)
+    PITWALL_LLM_CACHE_MAX_MB   size budget in MB (default 64)
+    PITWALL_LLM_CACHE_TTL_H    time to live in hours (default 720, 0 disables)
+    PITWALL_LLM_CACHE_REFRESH  "1" to bypass reads and overwrite entries
+"""
+import contextlib
+import hashlib
+import json
+import os
+import pickle
+import sqlite3
+import threading
+import time
+
+
+def _digest(value):
+    return hashlib.sha256(value.encode('utf-8')).hexdigest()
+
+
+class LLMResponseCache:
+    """SQLite-backed LRU + TTL response cache implementing autogen's AbstractCache protocol."""
+
+    def __init__(self, path, max_bytes=64 * 1024 * 1024, ttl_seconds=30 * 24 * 3600, force_refresh=False):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.force_refresh = force_refresh
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.evictions = 0
+
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS responses (
+                    key TEXT PRIMARY KEY,
+                    model TEXT,
+                    temperature REAL,
+                    system_hash TEXT,
+                    prompt_hash TEXT,
+                    value BLOB NOT NULL,
+                    size INTEGER NOT NULL,
+                    created_at REAL NOT NULL,
+                    last_access REAL NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS responses_last_access ON responses (last_access)")
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            path=os.environ.get('PITWALL_LLM_CACHE_PATH', os.path.join('llm_cache', 'responses.sqlite')),
+            max_bytes=int(float(os.environ.get('PITWALL_LLM_CACHE_MAX_MB', '64')) * 1024 * 1024),
+            ttl_seconds=float(os.environ.get('PITWALL_LLM_CACHE_TTL_H', '720')) * 3600,
+            force_refresh=os.environ.get('PITWALL_LLM_CACHE_REFRESH', '0') == '1',
+        )
+
+    @contextlib.contextmanager
+    def _connect(self):
+        # One short-lived connection per operation keeps the cache safe across threads
+        conn = sqlite3.connect(self.path, timeout=10)
+        try:
+            with conn:  # commits, or rolls back on error
+                yield conn
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _describe(key):
+        """Splits an autogen request into (key digest, model, temperature, system hash, prompt hash)."""
+        if isinstance(key, str):
+            # Some autogen releases hand the request over already serialized with json.dumps
+            try:
+                key = json.loads(key)
+            except ValueError:
+                pass
+        if not isinstance(key, dict):
+            return _digest(str(key)), None, None, None, None
+        messages = key.get('messages') or []
+        system = [m.get('content') for m in messages if isinstance(m, dict) and m.get('role') == 'system']
+        prompt = [m for m in messages if not (isinstance(m, dict) and m.get('role') == 'system')]
+        temperature = key.get('temperature')
+        return (
+            _digest(json.dumps(key, sort_keys=True, default=str)),
+            key.get('model'),
+            float(temperature) if temperature is not None else None,
+            _digest(json.dumps(system, default=str)),
+            _digest(json.dumps(prompt, sort_keys=True, default=str)),
+        )
+
+    def get(self, key, default=None):
+        if self.force_refresh:
+            with self._lock:
+                self.misses += 1
+            return default
+
+        digest = self._describe(key)[0]
+        now = time.time()
+        with self._connect() as conn:
+            row = conn.execute("SELECT value, created_at FROM responses WHERE key = ?", (digest,)).fetchone()
+            if row is not None and self.ttl_seconds and now - row[1] > self.ttl_seconds:
+                conn.execute("DELETE FROM responses WHERE key = ?", (digest,))
+                with self._lock:
+                    self.expired += 1
+                row = None
+            if row is not None:
+                conn.execute("UPDATE responses SET last_access = ? WHERE key = ?", (now, digest))
+
+        if row is None:
+            with self._lock:
+                self.misses += 1
+            return default
+        try:
+            value = pickle.loads(row[0])
+        except Exception:
+            with self._lock:
+                self.misses += 1
+            return default
+        with self._lock:
+            self.hits += 1
+        return value
+
+    def set(self, key, value):
+        try:
+            blob = pickle.dumps(value)
+        except Exception:
+            # Some responses carry unpicklable client handles; just don't cache those
+            return
+        digest, model, temperature, system_hash, prompt_hash = self._describe(key)
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (digest, model, temperature, system_hash, prompt_hash, blob, len(blob), now, now),
+            )
+            self._evict(conn)
+
+    def _evict(self, conn):
+        """Drops least-recently-used entries until the cache fits its byte budget."""
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        evicted = 0
+        for key, size in conn.execute("SELECT key, size FROM responses ORDER BY last_access").fetchall():
+            if total <= self.max_bytes:
+                break
+            conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            total -= size
+            evicted += 1
+        with self._lock:
+            self.evictions += evicted
+
+    def clear(self):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM responses")
+
+    def stats(self):
+        """Returns hit/miss counters for this process plus the on-disk entry count and size."""
+        with self._connect() as conn:
+            entries, size = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / lookups, 3) if lookups else 0.0,
+            'expired': self.expired,
+            'evictions': self.evictions,
+            'entries': entries,
+            'bytes': size,
+        }
+
+    # autogen opens the cache in a `with` block around every request; connections are
+    # per operation, so there is nothing to hold open or release here.
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
@@ -0,0 +1,137 @@
+# pit_loss.py
+"""
+Per-circuit pit-lane time loss, calibrated from historical pit stops.
+
+For every green-flag stop the loss is the in-lap plus the out-lap minus the
+laps either side of them, so the driver's own pace cancels out. The median per
+circuit over every cached season is stored in a small JSON table that the app
+reads at runtime; circuits without a calibration use DEFAULT_PIT_LOSS.
+
+Usage (calibrate from the snapshots on disk; --fetch loads missing races via FastF1):
+    python pit_loss.py
+    python pit_loss.py --year 2023 --fetch
+"""
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from lean_laps import to_seconds
+from rejoin import DEFAULT_PIT_LOSS
+
+PIT_LOSS_TABLE = os.environ.get('PITWALL_PIT_LOSS_TABLE', 'pit_loss.json')
+# Anything outside this range is a drive-through, a long repair or a timing glitch
+PLAUSIBLE_LOSS = (8.0, 45.0)
+
+_table_cache = {}
+
+
+def pit_stop_losses(laps):
+    """Returns the time lost (s) to each green-flag pit stop in a race, one vectorized pass."""
+    frame = pd.DataFrame({
+        'Driver': laps['Driver'].astype(object),
+        'LapNumber': pd.to_numeric(laps['LapNumber'], errors='coerce'),
+        'LapTime': to_seconds(laps['LapTime']).to_numpy(),
+        'PitIn': laps['PitInTime'].notna().to_numpy(),
+        'PitOut': laps['PitOutTime'].notna().to_numpy(),
+        'Green': laps['TrackStatus'].astype(str).isin(['1', '']).to_numpy() if 'TrackStatus' in laps.columns else True,
+    }).dropna(subset=['LapNumber']).sort_values(by=['Driver', 'LapNumber'])
+
+    by_driver = frame.groupby('Driver', sort=False)
+    before, out_lap, after = (by_driver[['LapNumber', 'LapTime', 'PitOut', 'Green']].shift(n) for n in (1, -1, -2))
+
+    # In-lap followed by its out-lap, with the lap before and after both present and green
+    stops = (
+        frame['PitIn'] & (out_lap['PitOut'] == True)
+        & (before['LapNumber'] == frame['LapNumber'] - 1)
+        & (out_lap['LapNumber'] == frame['LapNumber'] + 1)
+        & (after['LapNumber'] == frame['LapNumber'] + 2)
+        & frame['Green'] & (before['Green'] == True) & (out_lap['Green'] == True) & (after['Green'] == True)
+    )
+    loss = frame['LapTime'] + out_lap['LapTime'] - before['LapTime'] - after['LapTime']
+    loss = loss[stops].dropna()
+    return loss[loss.between(*PLAUSIBLE_LOSS)].rename('PitLoss')
+
+
+def load_pit_loss_table(path=None):
+    """Returns {race: {'pit_loss', 'stops', 'seasons'}} from the calibration file (re-read when it changes)."""
+    path = path or PIT_LOSS_TABLE
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
+        return {}
+    cached = _table_cache.get(path)
+    if cached and cached[0] == mtime:
+        return cached[1]
+    with open(path) as f:
+        table = json.load(f)['circuits']
+    _table_cache[path] = (mtime, table)
+    return table
+
+
+def pit_loss_for(race):
+    """Returns the calibrated pit loss (s) for a race, or DEFAULT_PIT_LOSS if it has none."""
+    entry = load_pit_loss_table().get(race)
+    return float(entry['pit_loss']) if entry else DEFAULT_PIT_LOSS
+
+
+def calibrate(years, races, fetch=False):
+    """Computes the median pit loss per race over every season with data on disk."""
+    from data import load_fastf1_session
+    from snapshot import load_snapshot
+
+    losses = {}
+    for race in races:
+        for year in years:
+            snapshot = load_snapshot(year, race, 'R')
+            if snapshot is None and not fetch:
+                continue
+            try:
+                session, laps = snapshot if snapshot is not None else load_fastf1_session(year, race, 'R', telemetry=False, weather=False)
+            except Exception as e:
+                print(f"  {year} {race}: could not load ({e})")
+                continue
+            race_losses = pit_stop_losses(laps)
+            print(f"  {year} {race}: {len(race_losses)} stops, median {race_losses.median():.1f}s" if len(race_losses) else f"  {year} {race}: no clean stops")
+            losses.setdefault(race, {})[year] = race_losses.to_numpy()
+
+    circuits = {}
+    for race, seasons in losses.items():
+        values = np.concatenate(list(seasons.values()))
+        if len(values):
+            circuits[race] = {'pit_loss': round(float(np.median(values)), 2), 'stops': int(len(values)), 'seasons': sorted(seasons)}
+    return circuits
+
+
+def main():
+    from data import YEARS, RACES
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--year', type=int, action='append', help="Season to include (repeatable); defaults to the sidebar years")
+    parser.add_argument('--race', action='append', help="Race to calibrate (repeatable); defaults to the sidebar races")
+    parser.add_argument('--fetch', action='store_true', help="Load races without a snapshot through FastF1")
+    parser.add_argument('--output', default=PIT_LOSS_TABLE)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    circuits = calibrate(args.year or YEARS, args.race or RACES, fetch=args.fetch)
+
+    # Keep calibrations for circuits not re-run this time
+    table = dict(load_pit_loss_table(args.output))
+    table.update(circuits)
+    tmp_path = args.output + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump({'generated_at': time.time(), 'circuits': table}, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, args.output)
+
+    print(f"\n{'Circuit':<14}{'pit loss':>10}{'stops':>7}  seasons")
+    for race, entry in sorted(table.items()):
+        print(f"{race:<14}{entry['pit_loss']:>9.1f}s{entry['stops']:>7}  {', '.join(map(str, entry['seasons']))}")
+    print(f"\nCalibrated {len(circuits)} circuits in {time.perf_counter() - start:.1f} s -> {args.output}")
+
+
+if __name__ == '__main__':
+    main()
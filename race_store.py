@@ -0,0 +1,159 @@
+# race_store.py
+"""
+Process-wide store of loaded races, shared by every Streamlit session.
+
+Works like st.cache_resource (callers get the stored objects, never a copy), but
+with a memory budget: each race is measured once when it is loaded, its lazy caches
+(per-driver telemetry, blended tyre temperatures, rendered towers) report what they
+add as they fill, and whole races are evicted least-recently-used once the resident
+total passes the budget.
+Stored races are treated as read-only by the app.
+
+Settings come from the environment:
+    PITWALL_RACE_STORE_MB   memory budget in MB (default 2048)
+"""
+import os
+import sys
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+
+import numpy as np
+import pandas as pd
+
+
+def measure_nbytes(obj, _seen=None, _depth=0):
+    """Approximate resident bytes of a loaded race: frames, arrays, containers and plain objects."""
+    if _seen is None:
+        _seen = set()
+    if id(obj) in _seen or _depth > 6:
+        return 0
+    _seen.add(id(obj))
+
+    if isinstance(obj, (pd.DataFrame, pd.Series)):
+        usage = obj.memory_usage(deep=True, index=True)
+        return int(usage.sum() if isinstance(obj, pd.DataFrame) else usage)
+    if isinstance(obj, np.ndarray):
+        size = obj.nbytes
+        if obj.dtype == object:
+            size += sum(sys.getsizeof(value) for value in obj.ravel())
+        return size
+    if isinstance(obj, dict):
+        return sys.getsizeof(obj) + sum(measure_nbytes(value, _seen, _depth + 1) for value in obj.values())
+    if isinstance(obj, (list, tuple, set)):
+        return sys.getsizeof(obj) + sum(measure_nbytes(value, _seen, _depth + 1) for value in obj)
+    if hasattr(obj, '__dict__') and not isinstance(obj, type):
+        return sys.getsizeof(obj) + measure_nbytes(vars(obj), _seen, _depth + 1)
+    return sys.getsizeof(obj)
+
+
+class RaceStore:
+    """Single-flight, byte-bounded LRU of loaded races keyed by (year, race, session)."""
+
+    def __init__(self, max_bytes=2048 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._races = OrderedDict()
+        self._sizes = {}
+        self._in_flight = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @classmethod
+    def from_env(cls):
+        return cls(max_bytes=int(float(os.environ.get('PITWALL_RACE_STORE_MB', '2048')) * 1024 * 1024))
+
+    @property
+    def resident_bytes(self):
+        return sum(self._sizes.values())
+
+    def get(self, key, load):
+        """Returns the stored race for key, loading it at most once across sessions."""
+        with self._lock:
+            if key in self._races:
+                self._races.move_to_end(key)
+                self.hits += 1
+                return self._races[key]
+            future = self._in_flight.get(key)
+            owner = future is None
+            if owner:
+                future = Future()
+                self._in_flight[key] = future
+                self.misses += 1
+            else:
+                self.hits += 1
+
+        if not owner:
+            return future.result()
+
+        try:
+            race = load()
+            size = measure_nbytes(race)
+        except BaseException as e:
+            future.set_exception(e)
+            with self._lock:
+                self._in_flight.pop(key, None)
+            raise
+
+        with self._lock:
+            self._races[key] = race
+            self._sizes[key] = size
+            self._evict()
+            self._in_flight.pop(key, None)
+        future.set_result(race)
+        return race
+
+    def _evict(self):
+        # Always keep the newest race, even if it alone is over budget
+        while len(self._races) > 1 and self.resident_bytes > self.max_bytes:
+            key, _ = self._races.popitem(last=False)
+            del self._sizes[key]
+            self.evictions += 1
+
+    def remeasure(self, key):
+        """Re-measures a stored race that grew after it was stored (e.g. finished loading)."""
+        with self._lock:
+            race = self._races.get(key)
+        if race is None:
+            return
+        size = measure_nbytes(race)
+        with self._lock:
+            if key in self._sizes:
+                self._sizes[key] = size
+                self._evict()
+
+    def grow(self, key, nbytes):
+        """Adds bytes a stored race took on after it was measured (a lazy cache filling)."""
+        with self._lock:
+            if key in self._sizes:
+                self._sizes[key] += nbytes
+                self._evict()
+
+    def discard(self, key):
+        """Drops a race, e.g. one whose load failed, so the next request loads it afresh."""
+        with self._lock:
+            self._races.pop(key, None)
+            self._sizes.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._races.clear()
+            self._sizes.clear()
+
+    def stats(self):
+        """Returns hit/miss/eviction counters and the resident size of the stored races."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 3) if lookups else 0.0,
+                'evictions': self.evictions,
+                'races': len(self._races),
+                'resident_bytes': self.resident_bytes,
+                'max_bytes': self.max_bytes,
+            }
+
+
+race_store = RaceStore.from_env()
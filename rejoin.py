@@ -0,0 +1,89 @@
+# rejoin.py
+import numpy as np
+import pandas as pd
+
+# Pit-lane time loss used until a circuit has a calibrated value
+DEFAULT_PIT_LOSS = 23.0
+
+
+class RejoinPredictor:
+    """
+    Where every driver would rejoin after a stop on every lap, in one pass.
+
+    A stop adds the pit loss to the driver's gap to the leader; binary-searching
+    that into the lap's sorted gap vector gives the re-entry position and the
+    cars the driver would come out behind and ahead of. Arrays are laid out
+    [lap, driver] like the timeline's gap matrix (NaN / '' where unknown).
+    """
+
+    def __init__(self, timeline, pit_loss=DEFAULT_PIT_LOSS):
+        self.timeline = timeline
+        self.pit_loss = pit_loss
+        gaps = timeline.gap_to_leader
+        n_rows, n_slots = gaps.shape
+
+        # Each lap's gaps in ascending order with the matching drivers; unknown gaps sort last
+        order = np.argsort(np.where(np.isnan(gaps), np.inf, gaps), axis=1, kind='stable')
+        sorted_gaps = np.take_along_axis(gaps, order, axis=1)
+        self._sorted_drivers = np.take_along_axis(timeline.drivers, order, axis=1)
+
+        # Offset every lap into its own range so one searchsorted covers all laps
+        finite = sorted_gaps[~np.isnan(sorted_gaps)]
+        span = (finite.max() if len(finite) else 0.0) + pit_loss + 1.0
+        offsets = np.arange(n_rows)[:, None] * 2 * span
+        keyed = (np.where(np.isnan(sorted_gaps), span, sorted_gaps) + offsets).ravel()
+
+        gap_matrix = timeline.gap_matrix
+        targets = gap_matrix + pit_loss + offsets
+        known = ~np.isnan(targets)
+        # Cars with a smaller gap than ours after the stop, ourselves included, = new position
+        insert_at = np.zeros(gap_matrix.shape, dtype=int)
+        insert_at[known] = np.searchsorted(keyed, targets[known], side='left') - (np.nonzero(known)[0] * n_slots)
+
+        self.position = np.where(known, insert_at, np.nan)
+
+        # Our own sorted index; the car ahead is the one before the insertion point, skipping ourselves
+        own = np.full(gap_matrix.shape, -1)
+        lap_index, driver_col = np.nonzero(timeline.slot_matrix >= 0)
+        own_sorted = np.argsort(order, axis=1)
+        own[lap_index, driver_col] = own_sorted[lap_index, timeline.slot_matrix[lap_index, driver_col]]
+        ahead = np.where(insert_at - 1 == own, own - 1, insert_at - 1)
+        behind = insert_at
+        # Cars without a gap sort last but aren't on track to rejoin ahead of
+        timed = (~np.isnan(sorted_gaps)).sum(axis=1)[:, None]
+
+        self.rejoin_behind = np.full(gap_matrix.shape, '', dtype=object)
+        self.rejoin_ahead_of = np.full(gap_matrix.shape, '', dtype=object)
+        rows = np.arange(n_rows)[:, None].repeat(gap_matrix.shape[1], axis=1)
+        has_ahead = known & (ahead >= 0)
+        has_behind = known & (behind < timed)
+        self.rejoin_behind[has_ahead] = self._sorted_drivers[rows[has_ahead], ahead[has_ahead]]
+        self.rejoin_ahead_of[has_behind] = self._sorted_drivers[rows[has_behind], behind[has_behind]]
+
+    def predict(self, lap_num, driver):
+        """Returns {'Position', 'Behind', 'AheadOf'} for a stop on this lap, or None if unknown."""
+        col = self.timeline.driver_column.get(driver)
+        if col is None or not 0 < lap_num < len(self.position) or np.isnan(self.position[lap_num, col]):
+            return None
+        return {
+            'Position': int(self.position[lap_num, col]),
+            'Behind': self.rejoin_behind[lap_num, col] or None,
+            'AheadOf': self.rejoin_ahead_of[lap_num, col] or None,
+        }
+
+    def table(self, lap_num, driver, horizons=(0, 1, 3, 5)):
+        """Pit-now / next-lap / in-N-laps options as a small DataFrame."""
+        rows = []
+        for laps_ahead in horizons:
+            prediction = self.predict(lap_num + laps_ahead, driver)
+            if prediction is None:
+                continue
+            label = "Now" if laps_ahead == 0 else "Next lap" if laps_ahead == 1 else f"In {laps_ahead} laps"
+            rows.append({
+                'Pit': label,
+                'Lap': lap_num + laps_ahead,
+                'Rejoin': f"P{prediction['Position']}",
+                'Behind': prediction['Behind'] or "-",
+                'Ahead of': prediction['AheadOf'] or "-",
+            })
+        return pd.DataFrame(rows)
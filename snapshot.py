@@ -0,0 +1,175 @@
+# snapshot.py
+"""
+Columnar race snapshots: the merged laps, results, weather and per-driver car
+data of a session written as Arrow IPC files, so later loads memory-map them
+back instead of re-parsing the session with FastF1.
+
+Usage (report cold vs warm load times for the app's race list):
+    python snapshot.py --year 2023
+"""
+import argparse
+import json
+import os
+import shutil
+import time
+
+import pandas as pd
+import pyarrow as pa
+
+SNAPSHOT_DIR = os.environ.get('PITWALL_SNAPSHOT_DIR', 'snapshots')
+SNAPSHOT_VERSION = 1
+
+
+def snapshot_path(year, race, session_type):
+    slug = race.lower().replace(' ', '_')
+    return os.path.join(SNAPSHOT_DIR, f"{year}_{slug}_{session_type}")
+
+
+def _to_table(df):
+    """Converts a frame to Arrow, stringifying object columns Arrow can't type."""
+    df = pd.DataFrame(df).reset_index(drop=True)
+    try:
+        return pa.Table.from_pandas(df, preserve_index=False)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        for column in df.columns[df.dtypes == object]:
+            df[column] = df[column].map(lambda v: None if pd.isna(v) else str(v))
+        return pa.Table.from_pandas(df, preserve_index=False)
+
+
+def _write_table(df, path):
+    table = _to_table(df)
+    with pa.OSFile(path, 'wb') as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+
+
+def _read_table(path):
+    # Arrow buffers point straight into the mapped file; pandas conversion is the only copy
+    with pa.memory_map(path, 'r') as source:
+        return pa.ipc.open_file(source).read_all().to_pandas()
+
+
+class CarData:
+    """Dict-like view of a snapshot's per-driver telemetry, mapped in on first access."""
+
+    def __init__(self, directory, driver_numbers):
+        self._directory = directory
+        self._driver_numbers = set(driver_numbers)
+        self._loaded = {}
+
+    def __contains__(self, driver_number):
+        return str(driver_number) in self._driver_numbers
+
+    def __getitem__(self, driver_number):
+        driver_number = str(driver_number)
+        if driver_number not in self._driver_numbers:
+            raise KeyError(driver_number)
+        if driver_number not in self._loaded:
+            self._loaded[driver_number] = _read_table(os.path.join(self._directory, f"{driver_number}.arrow"))
+        return self._loaded[driver_number]
+
+    def keys(self):
+        return sorted(self._driver_numbers)
+
+
+class SessionSnapshot:
+    """The subset of a FastF1 Session the app reads, backed by a snapshot directory."""
+
+    def __init__(self, path):
+        with open(os.path.join(path, 'meta.json')) as f:
+            meta = json.load(f)
+        self.event = pd.Series(meta['event'], dtype=object)
+        self.results = _read_table(os.path.join(path, 'results.arrow'))
+        self.weather_data = _read_table(os.path.join(path, 'weather.arrow'))
+        self.car_data = CarData(os.path.join(path, 'car_data'), meta['car_data'])
+
+
+def write_snapshot(session, laps, year, race, session_type, weather_data=None, car_data=None):
+    """
+    Persists a loaded session and its merged laps frame; returns the snapshot path.
+    Pass car_data when the grid's telemetry was loaded apart from the session (lazy mode).
+    """
+    path = snapshot_path(year, race, session_type)
+    tmp_path = path + '.tmp'
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    os.makedirs(os.path.join(tmp_path, 'car_data'))
+
+    _write_table(laps, os.path.join(tmp_path, 'laps.arrow'))
+    _write_table(session.results, os.path.join(tmp_path, 'results.arrow'))
+    _write_table(session.weather_data if weather_data is None else weather_data, os.path.join(tmp_path, 'weather.arrow'))
+    if car_data is None:
+        try:
+            car_data = session.car_data
+        except Exception:
+            # Telemetry wasn't loaded for this session
+            car_data = {}
+    for driver_number in car_data.keys():
+        _write_table(car_data[driver_number], os.path.join(tmp_path, 'car_data', f"{driver_number}.arrow"))
+
+    meta = {
+        'version': SNAPSHOT_VERSION,
+        'year': year, 'race': race, 'session_type': session_type,
+        'event': {key: str(value) for key, value in dict(session.event).items()},
+        'car_data': [str(number) for number in car_data.keys()],
+    }
+    with open(os.path.join(tmp_path, 'meta.json'), 'w') as f:
+        json.dump(meta, f)
+
+    # Swap the finished snapshot in whole so readers never see a partial one
+    shutil.rmtree(path, ignore_errors=True)
+    os.replace(tmp_path, path)
+    return path
+
+
+def snapshot_exists(year, race, session_type):
+    """True if a complete snapshot of the current format is on disk."""
+    try:
+        with open(os.path.join(snapshot_path(year, race, session_type), 'meta.json')) as f:
+            return json.load(f).get('version') == SNAPSHOT_VERSION
+    except (OSError, ValueError):
+        return False
+
+
+def load_snapshot(year, race, session_type):
+    """Returns (session, laps) from a snapshot, or None if there is no usable snapshot."""
+    path = snapshot_path(year, race, session_type)
+    if not snapshot_exists(year, race, session_type):
+        return None
+    try:
+        return SessionSnapshot(path), _read_table(os.path.join(path, 'laps.arrow'))
+    except (OSError, ValueError, pa.ArrowException):
+        return None
+
+
+def main():
+    from data import RACES, load_fastf1_session, load_grid_car_data
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--year', type=int, required=True)
+    parser.add_argument('--race', action='append', help="Race to time (repeatable); defaults to the app's race list")
+    parser.add_argument('--session', default='R')
+    args = parser.parse_args()
+
+    print(f"{'Race':<14}{'cold (FastF1)':>15}{'write':>10}{'warm (snapshot)':>17}")
+    for race in args.race or RACES:
+        try:
+            start = time.perf_counter()
+            session, laps = load_fastf1_session(args.year, race, args.session, telemetry=False)
+            car_data = load_grid_car_data(args.year, race, args.session)
+            cold = time.perf_counter() - start
+
+            start = time.perf_counter()
+            write_snapshot(session, laps, args.year, race, args.session, car_data=car_data)
+            write = time.perf_counter() - start
+
+            start = time.perf_counter()
+            load_snapshot(args.year, race, args.session)
+            warm = time.perf_counter() - start
+        except Exception as e:
+            print(f"{race:<14}failed: {e}")
+            continue
+        print(f"{race:<14}{cold:>14.2f}s{write:>9.2f}s{warm:>16.3f}s")
+
+
+if __name__ == '__main__':
+    main()
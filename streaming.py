@@ -0,0 +1,120 @@
+# streaming.py
+"""
+Token streaming for agents whose replies are shown as they are written.
+
+autogen's Groq client collects a streamed completion before returning it, so
+for the Chief Strategist and the Decision Analyst we call Groq directly with
+the agent's own system message and llm_config and yield the text as it
+arrives. Finished replies go into the shared response cache; a cached reply
+is yielded in one piece.
+"""
+import logging
+import time
+
+from groq import Groq
+
+from agents import llm_response_cache
+
+logger = logging.getLogger(__name__)
+# Shortest gap between redraws of a reply that is still streaming in
+REDRAW_SECONDS = 0.1
+
+
+def log_reply_timings():
+    """Prints each streamed reply's first-word and total time to the console (entry points call this)."""
+    logging.basicConfig(format="%(asctime)s %(name)s %(levelname)s: %(message)s")
+    logger.setLevel(logging.INFO)
+
+
+def _request(agent, message):
+    """The chat request autogen would send for a one-turn chat with this agent."""
+    config = agent.llm_config['config_list'][0]
+    return config, {
+        'model': config['model'],
+        'temperature': agent.llm_config.get('temperature'),
+        'messages': [
+            {'role': 'system', 'content': agent.system_message},
+            {'role': 'user', 'content': message},
+        ],
+        'stream': True,
+    }
+
+
+class ReplyStream:
+    """
+    Iterates an agent's reply chunk by chunk while the model generates it.
+
+    After iteration `text` holds the full reply, `first_word` the seconds until
+    the first non-empty chunk and `total` the seconds until the last one.
+    """
+
+    def __init__(self, agent, message, cache=llm_response_cache):
+        self.agent = agent
+        self.message = message
+        self.cache = cache
+        self.text = ""
+        self.first_word = None
+        self.total = None
+        self.cached = False
+
+    def __iter__(self):
+        started = time.perf_counter()
+        config, request = _request(self.agent, self.message)
+
+        cached = self.cache.get(request) if self.cache is not None else None
+        if isinstance(cached, str):
+            self.cached = True
+            chunks = iter([cached])
+        else:
+            chunks = self._generate(config, request)
+
+        for chunk in chunks:
+            if not chunk:
+                continue
+            if self.first_word is None:
+                self.first_word = round(time.perf_counter() - started, 3)
+            self.text += chunk
+            yield chunk
+
+        self.total = round(time.perf_counter() - started, 3)
+        if not self.cached and self.text and self.cache is not None:
+            self.cache.set(request, self.text)
+        source = "cache" if self.cached else config['model']
+        logger.info("%s: first word %ss, full reply %ss (%s)", self.agent.name, self.first_word, self.total, source)
+
+    def _generate(self, config, request):
+        try:
+            response = Groq(api_key=config['api_key']).chat.completions.create(**request)
+        except Exception:
+            # Backend without streaming (or unreachable): take the whole reply through autogen
+            reply = self.agent.generate_reply([{'role': 'user', 'content': self.message}])
+            yield reply.get('content', '') if isinstance(reply, dict) else str(reply or "")
+            return
+        for chunk in response:
+            if chunk.choices:
+                yield chunk.choices[0].delta.content or ""
+
+
+class StreamView:
+    """
+    on_chunk callback that collects a streamed reply and redraws it with draw(text).
+
+    Redraws at most every `interval` seconds rather than once per chunk, so the page
+    is re-sent a bounded number of times however many chunks the reply has. `chunks`
+    counts what arrived; finished replies are shown by the caller.
+    """
+
+    def __init__(self, draw, interval=REDRAW_SECONDS):
+        self.draw = draw
+        self.interval = interval
+        self.text = ""
+        self.chunks = 0
+        self._drawn_at = 0.0
+
+    def __call__(self, chunk):
+        self.text += chunk
+        self.chunks += 1
+        now = time.perf_counter()
+        if now - self._drawn_at >= self.interval:
+            self._drawn_at = now
+            self.draw(self.text)
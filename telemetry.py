@@ -0,0 +1,206 @@
+# telemetry.py
+"""
+Per-driver car telemetry, loaded the first time a driver is viewed.
+
+In the default "lazy" mode a race is loaded with laps, results and weather only;
+FastF1 serves car data as one stream for the whole grid, which the telemetry
+stage parses once in the background and hands over with preload(). A driver's
+slice is tagged with lap numbers and summarised only when the dashboard first
+asks for it, and the raw slice is released then.
+
+Settings come from the environment:
+    PITWALL_TELEMETRY   "lazy" (default) or "eager" to load every car up front
+"""
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+from race_store import measure_nbytes
+
+TELEMETRY_MODE = os.environ.get('PITWALL_TELEMETRY', 'lazy')
+
+
+def with_lap_numbers(telemetry, driver_laps):
+    """Tags each telemetry sample with the lap it was recorded on."""
+    if 'LapNumber' in telemetry.columns or driver_laps.empty:
+        return telemetry
+    time_column = 'SessionTime' if 'SessionTime' in telemetry.columns else 'Time'
+    sample_time = pd.to_timedelta(telemetry[time_column]).dt.total_seconds().to_numpy()
+
+    driver_laps = driver_laps.dropna(subset=['LapNumber', 'Time']).sort_values(by='Time')
+    lap_end = pd.to_timedelta(driver_laps['Time']).dt.total_seconds().to_numpy()
+    lap_numbers = driver_laps['LapNumber'].to_numpy(dtype=float)
+
+    # A sample belongs to the first lap ending at or after it
+    lap_slot = np.searchsorted(lap_end, sample_time, side='left')
+    in_race = lap_slot < len(lap_end)
+    tagged = np.full(len(sample_time), np.nan)
+    tagged[in_race] = lap_numbers[lap_slot[in_race]]
+    return telemetry.assign(LapNumber=tagged)
+
+
+TYRE_TEMP_COLUMNS = ['TyreTempFL', 'TyreTempFR', 'TyreTempRL', 'TyreTempRR']
+# FastF1 DRS codes 10, 12 and 14 mean the flap is open
+DRS_OPEN = 10
+
+
+class LapTelemetry:
+    """
+    Per-lap summaries of one driver's car data, built in a single groupby pass.
+
+    Columns are arrays indexed by lap number (row 0 unused) and hold NaN where a
+    lap has no samples or the channel is missing; tyre temperatures are only
+    present when the feed carries them.
+    """
+
+    def __init__(self, telemetry, total_laps):
+        n_rows = total_laps + 1
+        self.samples = np.zeros(n_rows, dtype=int)
+        self.columns = {}
+
+        frame = telemetry.loc[telemetry['LapNumber'].between(1, total_laps)]
+        if frame.empty:
+            return
+
+        channels = {}
+        aggregations = {}
+        if 'Speed' in frame.columns:
+            channels['Speed'] = frame['Speed'].astype(float)
+            aggregations['LastSpeed'] = ('Speed', 'last')
+            aggregations['MaxSpeed'] = ('Speed', 'max')
+        if 'Throttle' in frame.columns:
+            channels['Throttle'] = frame['Throttle'].astype(float)
+            aggregations['MeanThrottle'] = ('Throttle', 'mean')
+        if 'Brake' in frame.columns:
+            channels['Brake'] = frame['Brake'].astype(float)
+            aggregations['BrakeFraction'] = ('Brake', 'mean')
+        if 'DRS' in frame.columns:
+            channels['DRSOpen'] = (frame['DRS'] >= DRS_OPEN).astype(float)
+            aggregations['DRSFraction'] = ('DRSOpen', 'mean')
+        for column in TYRE_TEMP_COLUMNS:
+            if column in frame.columns:
+                channels[column] = frame[column].astype(float)
+                # 'last' skips missing readings, so this is the last valid temperature of the lap
+                aggregations[column] = (column, 'last')
+
+        grouped = pd.DataFrame(channels, index=frame.index).groupby(frame['LapNumber'].to_numpy(dtype=int), sort=True)
+        counts = grouped.size()
+        self.samples[counts.index.to_numpy(dtype=int)] = counts.to_numpy()
+        if not aggregations:
+            return
+
+        summary = grouped.agg(**aggregations)
+        lap_index = summary.index.to_numpy(dtype=int)
+        for name in aggregations:
+            column = np.full(n_rows, np.nan)
+            column[lap_index] = summary[name].to_numpy(dtype=float)
+            self.columns[name] = column
+
+    def at(self, lap_num):
+        """Returns {column: value} for a lap, or None if the lap has no samples."""
+        if not 0 < lap_num < len(self.samples) or not self.samples[lap_num]:
+            return None
+        return {name: column[lap_num] for name, column in self.columns.items()}
+
+    def describe(self, lap_num):
+        """One-line telemetry summary of a lap for agent prompts; '' if there is none."""
+        lap_stats = self.at(lap_num)
+        if not lap_stats:
+            return ""
+        parts = []
+        if pd.notna(lap_stats.get('MaxSpeed')):
+            parts.append(f"top speed {lap_stats['MaxSpeed']:.0f} km/h")
+        if pd.notna(lap_stats.get('MeanThrottle')):
+            parts.append(f"{lap_stats['MeanThrottle']:.0f}% mean throttle")
+        if pd.notna(lap_stats.get('BrakeFraction')):
+            parts.append(f"braking {lap_stats['BrakeFraction']:.0%} of the lap")
+        if pd.notna(lap_stats.get('DRSFraction')):
+            parts.append(f"DRS open {lap_stats['DRSFraction']:.0%}")
+        return f"Lap {lap_num} telemetry: {', '.join(parts)}." if parts else ""
+
+
+class DriverTelemetry:
+    """Dict-like car data for one race, keyed by driver number and loaded per driver."""
+
+    def __init__(self, laps, source=None, on_grow=None):
+        # on_grow(nbytes) is told how much each newly cached driver adds
+        self._on_grow = on_grow
+        self._laps = laps
+        # Car data already in hand: a snapshot's (mapped per driver on access) or an eagerly loaded session's.
+        # Any mapping with keys() and [] works; it is read one driver at a time, never copied whole
+        self._source = source
+        # Raw grid car data from preload() not yet processed
+        self._raw = {}
+        self._loaded = {}
+        self._summaries = {}
+        self._lock = threading.Lock()
+        lap_numbers = laps['LapNumber'].to_numpy(dtype=float, na_value=np.nan)
+        self._total_laps = int(np.nanmax(lap_numbers)) if np.isfinite(lap_numbers).any() else 0
+
+    def __contains__(self, driver_number):
+        return self.get(driver_number) is not None
+
+    def __getitem__(self, driver_number):
+        telemetry = self.get(driver_number)
+        if telemetry is None:
+            raise KeyError(driver_number)
+        return telemetry
+
+    @property
+    def loaded_drivers(self):
+        return sorted(number for number, telemetry in self._loaded.items() if telemetry is not None)
+
+    @property
+    def has_car_data(self):
+        return bool(self._raw) or bool(self.loaded_drivers) or (self._source is not None and len(self._source.keys()) > 0)
+
+    def preload(self, car_data):
+        """Adds parsed {driver number: car data}; drivers asked for before it arrived are retried."""
+        with self._lock:
+            self._raw.update((str(number), car_data[number]) for number in car_data.keys())
+            self._loaded = {number: telemetry for number, telemetry in self._loaded.items() if telemetry is not None}
+
+    def get(self, driver_number):
+        """Returns a driver's telemetry with a LapNumber column, or None if there is none."""
+        driver_number = str(driver_number)
+        with self._lock:
+            loaded = driver_number in self._loaded
+            if not loaded:
+                self._loaded[driver_number] = self._load(driver_number)
+            telemetry = self._loaded[driver_number]
+        if not loaded:
+            self._grew(telemetry)
+        return telemetry
+
+    def lap_summary(self, driver_number):
+        """Returns the driver's LapTelemetry, aggregated once on first request, or None."""
+        driver_number = str(driver_number)
+        if driver_number not in self._summaries:
+            telemetry = self.get(driver_number)
+            summary = None if telemetry is None else LapTelemetry(telemetry, self._total_laps)
+            with self._lock:
+                added = driver_number not in self._summaries
+                self._summaries.setdefault(driver_number, summary)
+            if added:
+                self._grew(summary)
+        return self._summaries[driver_number]
+
+    def _grew(self, cached):
+        if self._on_grow is not None and cached is not None:
+            self._on_grow(measure_nbytes(cached))
+
+    def _load(self, driver_number):
+        # The processed copy replaces a preloaded raw slice, so each driver is held once
+        telemetry = self._raw.pop(driver_number, None)
+        try:
+            if telemetry is None and self._source is not None and driver_number in self._source:
+                telemetry = self._source[driver_number]
+            if telemetry is None:
+                return None
+            driver_laps = self._laps.loc[self._laps['DriverNumber'].astype(str) == driver_number]
+            return with_lap_numbers(pd.DataFrame(telemetry), driver_laps)
+        except Exception as e:
+            print(f"Could not load telemetry for car {driver_number}: {e}")
+            return None
@@ -0,0 +1,119 @@
+import threading
+import time
+
+import pytest
+from streamlit.runtime.scriptrunner_utils.exceptions import RerunException
+
+import helpers
+from discussions import DISCUSSION_AGENTS, LLM_CALLS_PER_DISCUSSION, DiscussionService
+
+
+def _complete(result):
+    responses, _ = result
+    return not any(reply.startswith("No response") for reply in responses.values())
+
+
+def test_successful_run_is_memoized():
+    service = DiscussionService()
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return {"Chief Strategist": "Plan A"}, {"Total": 1.0}
+
+    service.get("lap-10", compute, complete=_complete)
+    responses, _ = service.get("lap-10", compute, complete=_complete)
+
+    assert responses == {"Chief Strategist": "Plan A"}
+    assert len(calls) == 1
+    assert service.cache_hits == 1
+    assert service.llm_calls_saved == LLM_CALLS_PER_DISCUSSION
+
+
+def test_incomplete_run_is_retried():
+    service = DiscussionService()
+    results = iter([
+        ({"Chief Strategist": "No response (Connection error)"}, {}),
+        ({"Chief Strategist": "Plan A"}, {"Total": 1.0}),
+    ])
+
+    first, _ = service.get("lap-10", lambda: next(results), complete=_complete)
+    second, _ = service.get("lap-10", lambda: next(results), complete=_complete)
+
+    assert first == {"Chief Strategist": "No response (Connection error)"}
+    assert second == {"Chief Strategist": "Plan A"}
+    assert service.computed == 2
+    assert service.cache_hits == 0
+    assert service.llm_calls_saved == 0
+
+
+def test_raising_run_is_retried():
+    service = DiscussionService()
+
+    def fail():
+        raise ConnectionError("Connection error")
+
+    with pytest.raises(ConnectionError):
+        service.get("lap-10", fail, complete=_complete)
+    responses, _ = service.get("lap-10", lambda: ({"Chief Strategist": "Plan A"}, {}), complete=_complete)
+
+    assert responses == {"Chief Strategist": "Plan A"}
+    assert service.computed == 1
+
+
+def test_interrupted_run_is_taken_over_by_a_waiting_session():
+    service = DiscussionService()
+    started, release = threading.Event(), threading.Event()
+
+    class Interrupted(BaseException):
+        pass
+
+    def interrupted():
+        started.set()
+        release.wait(5)
+        raise Interrupted()
+
+    def owner():
+        with pytest.raises(Interrupted):
+            service.get("lap-10", interrupted, complete=_complete)
+
+    owner_thread = threading.Thread(target=owner)
+    owner_thread.start()
+    started.wait(5)
+    joined = {}
+    joiner = threading.Thread(target=lambda: joined.update(
+        result=service.get("lap-10", lambda: ({"Chief Strategist": "Plan A"}, {}), complete=_complete)
+    ))
+    joiner.start()
+    time.sleep(0.1)  # let the joiner start waiting on the owner's run
+    release.set()
+    owner_thread.join(5)
+    joiner.join(5)
+
+    assert joined["result"] == ({"Chief Strategist": "Plan A"}, {})
+    assert service.computed == 1
+
+
+def test_rerun_while_streaming_finishes_the_shared_run(monkeypatch):
+    monkeypatch.setattr(helpers, "discussion_service", DiscussionService())
+    monkeypatch.setattr(helpers, "get_bundled_briefing", lambda *args: None)
+    drawn = []
+
+    def run(*args, on_chief_chunk=None, **kwargs):
+        for chunk in ("Plan ", "A"):
+            on_chief_chunk(chunk)
+        return {name: "Plan A" for name in DISCUSSION_AGENTS}, {}
+
+    def show_chunk(chunk):
+        drawn.append(chunk)
+        raise RerunException(None)
+
+    monkeypatch.setattr(helpers, "run_agent_discussions_with_interruption", run)
+
+    with pytest.raises(RerunException):
+        helpers.get_strategy_discussion(2023, "Test", None, None, None, 10, "VER", on_chief_chunk=show_chunk)
+    responses, _ = helpers.get_strategy_discussion(2023, "Test", None, None, None, 10, "VER")
+
+    assert drawn == ["Plan "]
+    assert responses["Chief Strategist"] == "Plan A"
+    assert helpers.discussion_service.computed == 1
@@ -0,0 +1,57 @@
+import json
+import sqlite3
+
+from llm_cache import LLMResponseCache
+
+REQUEST = {
+    'model': 'llama-3.3-70b-versatile',
+    'temperature': 0.2,
+    'messages': [
+        {'role': 'system', 'content': "You are the Chief Strategist."},
+        {'role': 'user', 'content': "Plan A or Plan B?"},
+    ],
+}
+
+
+def _row(path):
+    conn = sqlite3.connect(path)
+    try:
+        return conn.execute("SELECT model, temperature, system_hash, prompt_hash FROM responses").fetchone()
+    finally:
+        conn.close()
+
+
+def test_serialized_request_is_stored_with_its_metadata(tmp_path):
+    path = str(tmp_path / "responses.sqlite")
+    cache = LLMResponseCache(path)
+
+    cache.set(json.dumps(REQUEST, sort_keys=True), "Plan A")
+
+    model, temperature, system_hash, prompt_hash = _row(path)
+    assert (model, temperature) == ('llama-3.3-70b-versatile', 0.2)
+    assert system_hash and prompt_hash
+    # Either form of the same request finds the entry
+    assert cache.get(REQUEST) == "Plan A"
+
+
+def test_connections_are_closed(tmp_path, monkeypatch):
+    opened = []
+    connect = sqlite3.connect
+
+    def tracking_connect(*args, **kwargs):
+        opened.append(connect(*args, **kwargs))
+        return opened[-1]
+
+    monkeypatch.setattr(sqlite3, 'connect', tracking_connect)
+    cache = LLMResponseCache(str(tmp_path / "responses.sqlite"))
+    cache.set(REQUEST, "Plan A")
+    cache.get(REQUEST)
+    cache.stats()
+
+    assert len(opened) == 4
+    for conn in opened:
+        try:
+            conn.execute("SELECT 1")
+        except sqlite3.ProgrammingError:
+            continue
+        raise AssertionError("connection left open")
@@ -0,0 +1,61 @@
+import numpy as np
+import pandas as pd
+
+from data import LapStore
+from rejoin import RejoinPredictor
+from timeline import RaceTimeline
+
+PIT_LOSS = 20.0
+
+
+def _laps(times):
+    """Laps frame from {lap: {driver: race time in s, or None}}; positions follow the times."""
+    rows = []
+    for lap, by_driver in times.items():
+        for position, (driver, seconds) in enumerate(by_driver.items(), 1):
+            rows.append({
+                'LapNumber': float(lap),
+                'Position': float(position),
+                'Driver': driver,
+                'Time': pd.NaT if seconds is None else pd.to_timedelta(seconds, unit='s'),
+                'LapStartTime': pd.to_timedelta(lap * 90.0, unit='s'),
+                'TrackStatus': '1',
+                'Compound': 'MEDIUM',
+                'TyreLife': float(lap),
+                'TeamColor': '3671C6',
+            })
+    return pd.DataFrame(rows)
+
+
+def _brute_force(timeline, lap_num, driver):
+    """Rejoin worked out car by car for one lap."""
+    frame = timeline.frame(lap_num)
+    gaps = dict(zip(frame['Driver'], frame['GapToLeader']))
+    if np.isnan(gaps[driver]):
+        return None
+    target = gaps[driver] + PIT_LOSS
+    others = sorted((gap, name) for name, gap in gaps.items() if name != driver and not np.isnan(gap))
+    in_front = [name for gap, name in others if gap < target]
+    behind_us = [name for gap, name in others if gap >= target]
+    return {
+        'Position': len(in_front) + 1,
+        'Behind': in_front[-1] if in_front else None,
+        'AheadOf': behind_us[0] if behind_us else None,
+    }
+
+
+def test_rejoin_ignores_cars_without_a_time():
+    laps = _laps({
+        1: {'VER': 100.0, 'PER': 105.0, 'HAM': 130.0, 'LEC': 140.0},
+        # HAM and LEC have no timing on lap 2; they must not be named as cars we rejoin ahead of
+        2: {'VER': 190.0, 'PER': 196.0, 'HAM': None, 'LEC': None},
+        3: {'VER': 280.0, 'PER': 300.0, 'HAM': 301.0, 'LEC': None},
+    })
+    timeline = RaceTimeline(LapStore(laps))
+    predictor = RejoinPredictor(timeline, PIT_LOSS)
+
+    assert predictor.predict(2, 'PER') == {'Position': 2, 'Behind': 'VER', 'AheadOf': None}
+    assert predictor.predict(2, 'HAM') is None
+    for lap_num in (1, 2, 3):
+        for driver in timeline.frame(lap_num)['Driver']:
+            assert predictor.predict(lap_num, driver) == _brute_force(timeline, lap_num, driver), (lap_num, driver)
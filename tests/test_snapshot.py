@@ -0,0 +1,62 @@
+import numpy as np
+import pandas as pd
+
+import data
+import snapshot
+from benchmarks import synthetic_session
+
+
+def _car_data(laps):
+    """A few samples per lap for every driver, stamped in session time like FastF1's."""
+    car_data = {}
+    for number, driver_laps in laps.groupby('DriverNumber'):
+        end = driver_laps['Time'].max().total_seconds()
+        seconds = np.arange(60.0, end, 10.0)
+        car_data[number] = pd.DataFrame({
+            'Time': pd.to_timedelta(seconds, unit='s'),
+            'SessionTime': pd.to_timedelta(seconds, unit='s'),
+            'Speed': np.full(len(seconds), 250.0),
+            'Throttle': np.full(len(seconds), 80.0),
+        })
+    return car_data
+
+
+def _load(year, race):
+    race_load = data.RaceLoad(year, race, 'R').start()
+    assert race_load.wait(60)
+    return race_load
+
+
+def test_race_loads_warm_from_its_snapshot(tmp_path, monkeypatch):
+    monkeypatch.setattr(snapshot, 'SNAPSHOT_DIR', str(tmp_path))
+    session, laps = synthetic_session(n_laps=8, n_drivers=4)
+    del session.car_data  # lazy mode: the session carries no telemetry
+    car_data = _car_data(laps)
+    grid_parses = []
+
+    def load_grid_car_data(*key):
+        grid_parses.append(key)
+        return car_data
+
+    monkeypatch.setattr(data, 'load_fastf1_session', lambda *args, **kwargs: (session, laps))
+    monkeypatch.setattr(data, 'load_weather_data', lambda session: session.weather_data)
+    monkeypatch.setattr(data, 'load_grid_car_data', load_grid_car_data)
+
+    cold = _load(2023, 'Snapshot Test')
+    assert cold.status == {'laps': 'done', 'weather': 'done', 'telemetry': 'done'}
+    assert len(grid_parses) == 1
+    assert snapshot.snapshot_exists(2023, 'Snapshot Test', 'R')
+
+    # A warm start must come entirely from the snapshot, telemetry included
+    def no_fastf1(*args, **kwargs):
+        raise AssertionError("warm start went back to FastF1")
+
+    monkeypatch.setattr(data, 'load_fastf1_session', no_fastf1)
+    monkeypatch.setattr(data, 'load_grid_car_data', no_fastf1)
+
+    warm = _load(2023, 'Snapshot Test')
+    assert warm.status == {'laps': 'done', 'weather': 'done', 'telemetry': 'done'}
+    assert isinstance(warm.session, snapshot.SessionSnapshot)
+    telemetry = warm.telemetry.get('1')
+    assert telemetry is not None and 'LapNumber' in telemetry.columns
+    assert len(telemetry) == len(car_data['1'])
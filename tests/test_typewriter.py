@@ -0,0 +1,44 @@
+import json
+import os
+import re
+import shutil
+import subprocess
+
+import pytest
+
+from typewriter import WORD_PATTERN, _tokens, typing_duration_ms
+
+FRONTEND = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "frontend", "typewriter", "index.html")
+
+SAMPLES = [
+    "",
+    "Box now",
+    "Box  now,\n\nthen push.",
+    "  Leading and trailing  ",
+    "Tabs\tand no-break spaces",
+    "Hard 🟡 → Medium 🔴",
+]
+
+
+def _browser_tokens():
+    """The component's own tokens() function, lifted out of its page."""
+    with open(FRONTEND, encoding="utf-8") as f:
+        page = f.read()
+    return re.search(r"function tokens\(text, unit\) \{.*?\n    \}", page, re.S).group(0)
+
+
+def test_browser_splits_words_on_the_same_pattern():
+    assert f"/{WORD_PATTERN}/g" in _browser_tokens()
+
+
+@pytest.mark.skipif(shutil.which("node") is None, reason="needs node to run the component's script")
+def test_typing_time_matches_what_the_browser_types():
+    script = _browser_tokens() + (
+        "\nconst samples = JSON.parse(process.argv[1]);"
+        "\nconsole.log(JSON.stringify(samples.map(t => [tokens(t, 'word').length, tokens(t, 'char').length])));"
+    )
+    out = subprocess.run(["node", "-e", script, json.dumps(SAMPLES)], capture_output=True, text=True, check=True)
+
+    assert json.loads(out.stdout) == [[_tokens(text, 'word'), _tokens(text, 'char')] for text in SAMPLES]
+    # The browser types every token, so the timing must count all of them
+    assert typing_duration_ms([{'text': "Box  now,\n\nthen push."}], delay_ms=10) == 40
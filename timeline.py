@@ -0,0 +1,164 @@
+# timeline.py
+import numpy as np
+import pandas as pd
+
+
+class LapWeather:
+    """
+    Weather conditions at the start of every lap, mapped once with searchsorted.
+
+    Arrays are indexed by lap number (row 0 unused). `first_rain_lap` holds, for
+    each lap N, the first lap at or after N on which rain is reported (0 if none).
+    """
+
+    def __init__(self, lap_start, weather_data=None):
+        n_rows = len(lap_start)
+        self.rainfall = np.zeros(n_rows, dtype=bool)
+        self.air_temp = np.full(n_rows, np.nan)
+        self.track_temp = np.full(n_rows, np.nan)
+        self.humidity = np.full(n_rows, np.nan)
+        self.first_rain_lap = np.zeros(n_rows, dtype=int)
+
+        if weather_data is None or weather_data.empty or n_rows < 2:
+            return
+
+        weather = weather_data.sort_values(by='Time')
+        sample_time = pd.to_timedelta(weather['Time']).dt.total_seconds().to_numpy()
+        sample_rain = weather['Rainfall'].fillna(False).to_numpy(dtype=bool)
+
+        # Last sample at or before each lap's start
+        has_start = ~np.isnan(lap_start)
+        sample = np.searchsorted(sample_time, np.where(has_start, lap_start, -np.inf), side='right') - 1
+        known = has_start & (sample >= 0)
+        self.rainfall[known] = sample_rain[sample[known]]
+        for column, target in (('AirTemp', self.air_temp), ('TrackTemp', self.track_temp), ('Humidity', self.humidity)):
+            if column in weather.columns:
+                target[known] = weather[column].to_numpy(dtype=float)[sample[known]]
+
+        # Each rain sample belongs to the first lap starting at or after it
+        starts = np.fmax.accumulate(lap_start[1:])
+        starts = np.where(np.isnan(starts), -np.inf, starts)
+        rain_laps = np.searchsorted(starts, sample_time[sample_rain], side='left') + 1
+        is_rain_lap = self.rainfall.copy()
+        is_rain_lap[rain_laps[rain_laps < n_rows]] = True
+
+        # Reverse running minimum of rain lap numbers gives "next rain lap from N"
+        candidates = np.where(is_rain_lap, np.arange(n_rows), n_rows)
+        next_rain = np.minimum.accumulate(candidates[::-1])[::-1]
+        self.first_rain_lap = np.where(next_rain < n_rows, next_rain, 0)
+        self.first_rain_lap[0] = 0
+
+    def rain_lap_from(self, lap_num):
+        """Returns the first rain lap at or after lap_num, or None."""
+        if not 0 < lap_num < len(self.first_rain_lap):
+            return None
+        return int(self.first_rain_lap[lap_num]) or None
+
+
+class RaceTimeline:
+    """
+    Every lap's running order computed once per session.
+
+    Per-lap arrays are indexed [lap, slot], where slot 0 is the leader of that
+    lap; row 0 is unused so lap numbers index directly. Cells past the number of
+    classified cars on a lap hold '' / NaN.
+    """
+
+    def __init__(self, lap_store, weather_data=None):
+        laps = lap_store.laps
+        self.total_laps = lap_store.total_laps
+        n_rows = self.total_laps + 1
+
+        # Lap start (earliest car over the line), in session seconds
+        self.lap_start = np.full(n_rows, np.nan)
+        lap_starts = laps.dropna(subset=['LapNumber']).groupby('LapNumber', sort=True)['LapStartTime'].min()
+        self.lap_start[lap_starts.index.astype(int)] = pd.to_timedelta(lap_starts).dt.total_seconds().to_numpy()
+        self.weather = LapWeather(self.lap_start, weather_data)
+
+        # Track status of each lap, taken from its first row like the dashboard does
+        self.track_status = np.full(n_rows, '', dtype=object)
+        first_status = laps.dropna(subset=['LapNumber']).groupby('LapNumber', sort=True)['TrackStatus'].first().astype(object)
+        self.track_status[first_status.index.astype(int)] = first_status.astype(str).to_numpy()
+
+        # Only cars with a classified position appear in the running order
+        classified = laps.dropna(subset=['LapNumber', 'Position'])
+        lap_index = classified['LapNumber'].to_numpy(dtype=int)
+        # Rows are sorted by (LapNumber, Position), so slot = offset within the lap
+        first_row = np.searchsorted(lap_index, lap_index, side='left')
+        slot_index = np.arange(len(lap_index)) - first_row
+
+        self.counts = np.bincount(lap_index, minlength=n_rows)[:n_rows]
+        n_slots = int(self.counts.max()) if len(self.counts) else 0
+        shape = (n_rows, n_slots)
+
+        def _fill(values, empty, dtype):
+            grid = np.full(shape, empty, dtype=dtype)
+            grid[lap_index, slot_index] = values
+            return grid
+
+        self.drivers = _fill(classified['Driver'].to_numpy(dtype=object), '', object)
+        self.position = _fill(classified['Position'].to_numpy(dtype=float, na_value=np.nan), np.nan, float)
+        self.compound = _fill(classified['Compound'].astype(object).fillna('UNKNOWN').astype(str).to_numpy(), '', object)
+        self.tyre_life = _fill(classified['TyreLife'].to_numpy(dtype=float, na_value=np.nan), np.nan, float)
+        self.team_color = _fill(classified['TeamColor'].astype(object).fillna('808080').astype(str).to_numpy(), '', object)
+        self.race_time = _fill(pd.to_timedelta(classified['Time']).dt.total_seconds().to_numpy(), np.nan, float)
+
+        # Interval to the car ahead and gap to the leader, in seconds
+        self.interval = np.full(shape, np.nan)
+        self.interval[:, 1:] = np.diff(self.race_time, axis=1)
+        self.gap_to_leader = self.race_time - self.race_time[:, :1]
+
+        # The same running order laid out per driver, [lap, driver] in `driver_names` order
+        driver_col, self.driver_names = pd.factorize(classified['Driver'].astype(object), sort=True)
+        self.driver_column = {driver: col for col, driver in enumerate(self.driver_names)}
+        driver_shape = (n_rows, len(self.driver_names))
+        self.slot_matrix = np.full(driver_shape, -1, dtype=int)
+        self.slot_matrix[lap_index, driver_col] = slot_index
+        self.gap_matrix = np.full(driver_shape, np.nan)
+        self.gap_matrix[lap_index, driver_col] = self.gap_to_leader[lap_index, slot_index]
+        self.interval_matrix = np.full(driver_shape, np.nan)
+        self.interval_matrix[lap_index, driver_col] = self.interval[lap_index, slot_index]
+        # Timedelta copy for the timing tower's formatter, converted once
+        self._interval_td = pd.to_timedelta(self.interval.ravel(), unit='s').to_numpy().reshape(shape)
+
+    def attach_weather(self, weather_data):
+        """Maps weather onto the laps; used when weather arrives after the running order."""
+        self.weather = LapWeather(self.lap_start, weather_data)
+
+    def frame(self, lap_num):
+        """Returns read-only views of one lap's running order, keyed by column."""
+        # Row 0 is always empty, so out-of-range laps yield zero-length views
+        row = lap_num if 0 < lap_num <= self.total_laps else 0
+        n = self.counts[row]
+        return {
+            'Driver': self.drivers[row, :n],
+            'Position': self.position[row, :n],
+            'Compound': self.compound[row, :n],
+            'TyreLife': self.tyre_life[row, :n],
+            'TeamColor': self.team_color[row, :n],
+            'Interval': self._interval_td[row, :n],
+            'GapToLeader': self.gap_to_leader[row, :n],
+        }
+
+    def slot_of(self, lap_num, driver):
+        """Returns the driver's slot on a lap, or None if not classified."""
+        col = self.driver_column.get(driver)
+        if col is None or not 0 < lap_num <= self.total_laps:
+            return None
+        slot = self.slot_matrix[lap_num, col]
+        return int(slot) if slot >= 0 else None
+
+    def neighbours(self, lap_num, driver):
+        """Returns ((driver ahead, gap s), (driver behind, gap s)) on a lap; None where the track is clear."""
+        slot = self.slot_of(lap_num, driver)
+        if slot is None:
+            return None, None
+        ahead = (self.drivers[lap_num, slot - 1], self.interval[lap_num, slot]) if slot > 0 else None
+        behind = None
+        if slot + 1 < self.counts[lap_num]:
+            behind = (self.drivers[lap_num, slot + 1], self.interval[lap_num, slot + 1])
+        return ahead, behind
+
+    def leaderboard(self, lap_num):
+        """Returns the ordered timing tower for a lap as a small DataFrame."""
+        return pd.DataFrame(self.frame(lap_num))
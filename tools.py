@@ -1,17 +1,18 @@
 # tools.py
 import pandas as pd
+from data import LapStore
 
 # This function will act as a tool for our agents.
 # In a real scenario, this would fetch live data. Here, it gets data for a specific lap.
-def get_current_lap_data(laps_data: pd.DataFrame, lap_number: int) -> pd.DataFrame:
+def get_current_lap_data(lap_store: LapStore, lap_number: int) -> pd.DataFrame:
     """
     Fetches all race data for a specific lap number.
 
     Args:
-        laps_data (pd.DataFrame): The DataFrame containing all lap data for the race.
+        lap_store (LapStore): The indexed lap data for the race.
         lap_number (int): The current lap number to get data for.
 
     Returns:
-        pd.DataFrame: A DataFrame containing all data for the specified lap.
+        pd.DataFrame: A DataFrame containing all data for the specified lap, ordered by position.
     """
-    return laps_data.loc[laps_data['LapNumber'] == lap_number]
\ No newline at end of file
+    return lap_store.lap(lap_number)
@@ -0,0 +1,204 @@
+# triggers.py
+"""
+Strategy-trigger rules compiled over a whole race.
+
+Each rule is a plain dict naming a rule kind plus its parameters. At load time
+every rule becomes a boolean mask over a (laps x drivers) grid, so playback only
+has to look up the current lap.
+
+Usage (list every decision point of a season):
+    python triggers.py --year 2023
+    python triggers.py --year 2023 --race Monza --driver HAM
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from lean_laps import to_seconds
+
+# Legacy pit-wall triggers first, so reasons keep their historical order
+DEFAULT_TRIGGER_RULES = [
+    {'rule': 'lap_interval', 'every': 10},
+    {'rule': 'track_status', 'statuses': ('4', '5')},
+    {'rule': 'rain_warning', 'laps_ahead': 2},
+    {'rule': 'interruption'},
+    {'rule': 'tyre_age', 'threshold': 30},
+    {'rule': 'degradation_spike', 'seconds': 1.5, 'window': 3},
+    {'rule': 'position_lost', 'places': 3},
+]
+
+INTERRUPTION_LABELS = {
+    '4': "Safety Car / Red Flag", '5': "Safety Car / Red Flag",
+    '6': "Virtual Safety Car", '7': "Virtual Safety Car",
+}
+RAIN_LABEL = "Rainfall / Wet Track"
+
+
+class RaceGrid:
+    """Per-driver lap columns laid out as (lap, driver) arrays; row 0 is unused."""
+
+    def __init__(self, lap_store, timeline):
+        laps = lap_store.laps.dropna(subset=['LapNumber'])
+        self.total_laps = lap_store.total_laps
+        n_rows = self.total_laps + 1
+
+        driver_index, self.drivers = pd.factorize(laps['Driver'].astype(object))
+        lap_index = laps['LapNumber'].to_numpy(dtype=int)
+        shape = (n_rows, len(self.drivers))
+
+        def _grid(values, empty=np.nan):
+            grid = np.full(shape, empty, dtype=float)
+            grid[lap_index, driver_index] = values
+            return grid
+
+        self.lap = np.arange(n_rows)[:, None]
+        self.position = _grid(laps['Position'].to_numpy(dtype=float, na_value=np.nan))
+        self.tyre_life = _grid(laps['TyreLife'].to_numpy(dtype=float, na_value=np.nan))
+        self.lap_time = _grid(to_seconds(laps['LapTime']).to_numpy())
+        self.pit = _grid((laps['PitInTime'].notna() | laps['PitOutTime'].notna()).to_numpy(dtype=float), 0.0) > 0
+
+        self.track_status = timeline.track_status[:, None]
+        self.rainfall = timeline.weather.rainfall[:, None]
+        self.first_rain_lap = timeline.weather.first_rain_lap[:, None]
+
+        # Race-wide interruption label per lap; rain overrides SC/VSC as the dashboard does
+        self.interruption = np.array([INTERRUPTION_LABELS.get(str(s)) for s in timeline.track_status], dtype=object)
+        self.interruption[timeline.weather.rainfall] = RAIN_LABEL
+
+
+# --- Rule compilers: each returns (mask, reason(lap, driver_slot)) ---
+
+def _lap_interval(grid, every=10):
+    mask = (grid.lap > 1) & (grid.lap % every == 0)
+    return mask, lambda lap, d: f"lap_interval({lap})"
+
+
+def _track_status(grid, statuses=('4', '5')):
+    mask = np.isin(grid.track_status, list(statuses))
+    return mask, lambda lap, d: f"track_status({grid.track_status[lap, 0]})"
+
+
+def _rain_warning(grid, laps_ahead=2):
+    laps_to_rain = grid.first_rain_lap - grid.lap
+    mask = (grid.first_rain_lap > 0) & (laps_to_rain >= 1) & (laps_to_rain <= laps_ahead)
+    return mask, lambda lap, d: f"rain_warning(lap {grid.first_rain_lap[lap, 0]})"
+
+
+def _interruption(grid):
+    mask = np.array([label is not None for label in grid.interruption])[:, None]
+    return mask, lambda lap, d: grid.interruption[lap]
+
+
+def _tyre_age(grid, threshold=30):
+    previous = np.vstack([np.zeros((1, grid.tyre_life.shape[1])), grid.tyre_life[:-1]])
+    mask = (grid.tyre_life >= threshold) & ~(np.nan_to_num(previous) >= threshold)
+    return mask, lambda lap, d: f"tyre_age({int(grid.tyre_life[lap, d])} laps)"
+
+
+def _degradation_spike(grid, seconds=1.5, window=3):
+    # Only green-flag laps away from the pit lane are representative of pace
+    green = np.isin(grid.track_status, ['1', '']) & ~grid.pit
+    clean = pd.DataFrame(np.where(green, grid.lap_time, np.nan))
+    baseline = clean.shift(1).rolling(window, min_periods=1).median().to_numpy()
+    delta = clean.to_numpy() - baseline
+    mask = green & (np.nan_to_num(delta) > seconds)
+    return mask, lambda lap, d: f"degradation_spike(+{delta[lap, d]:.1f}s)"
+
+
+def _position_lost(grid, places=3):
+    previous = np.vstack([np.full((1, grid.position.shape[1]), np.nan), grid.position[:-1]])
+    pitted = grid.pit | np.vstack([np.zeros((1, grid.pit.shape[1]), dtype=bool), grid.pit[:-1]])
+    mask = ~pitted & (np.nan_to_num(grid.position - previous) >= places)
+    return mask, lambda lap, d: f"position_lost(P{int(previous[lap, d])}->P{int(grid.position[lap, d])})"
+
+
+RULE_COMPILERS = {
+    'lap_interval': _lap_interval,
+    'track_status': _track_status,
+    'rain_warning': _rain_warning,
+    'interruption': _interruption,
+    'tyre_age': _tyre_age,
+    'degradation_spike': _degradation_spike,
+    'position_lost': _position_lost,
+}
+
+
+class TriggerPlan:
+    """Every trigger lap of a race with its reasons, per driver."""
+
+    def __init__(self, drivers, reasons, interruption):
+        self.drivers = list(drivers)
+        self._reasons = reasons
+        self.interruption = interruption
+
+    def trigger_laps(self, driver):
+        """Returns the sorted trigger laps for a driver."""
+        return sorted(self._reasons.get(driver, {}))
+
+    def reasons_at(self, lap_num, driver):
+        """Returns the trigger reasons for (lap, driver); empty if none."""
+        return list(self._reasons.get(driver, {}).get(lap_num, []))
+
+    def interruption_at(self, lap_num):
+        """Returns the SC / VSC / rain label active on a lap, or None."""
+        if not 0 < lap_num < len(self.interruption):
+            return None
+        return self.interruption[lap_num]
+
+
+def compile_triggers(lap_store, timeline, rules=None):
+    """Compiles trigger rules into a TriggerPlan covering every lap and driver."""
+    grid = RaceGrid(lap_store, timeline)
+    shape = grid.position.shape
+    reasons = {driver: {} for driver in grid.drivers}
+
+    for rule in (rules if rules is not None else DEFAULT_TRIGGER_RULES):
+        params = {key: value for key, value in rule.items() if key != 'rule'}
+        mask, reason = RULE_COMPILERS[rule['rule']](grid, **params)
+        mask = np.broadcast_to(mask, shape).copy()
+        mask[0] = False
+        for lap, d in np.argwhere(mask):
+            driver_reasons = reasons[grid.drivers[d]].setdefault(int(lap), [])
+            label = reason(int(lap), d)
+            if label not in driver_reasons:
+                driver_reasons.append(label)
+
+    return TriggerPlan(grid.drivers, reasons, grid.interruption)
+
+
+def main():
+    from data import RACES, load_session_data
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--year', type=int, required=True)
+    parser.add_argument('--race', action='append', help="Race to scan (repeatable); defaults to the app's race list")
+    parser.add_argument('--driver', help="Only list decision points for this driver")
+    args = parser.parse_args()
+
+    season_start = time.perf_counter()
+    total_points = 0
+    for race in args.race or RACES:
+        try:
+            session, laps, lap_store, timeline, telemetry = load_session_data(args.year, race, 'R')
+        except Exception as e:
+            print(f"{args.year} {race}: could not load ({e})")
+            continue
+
+        compile_start = time.perf_counter()
+        plan = compile_triggers(lap_store, timeline)
+        compile_ms = (time.perf_counter() - compile_start) * 1000
+
+        drivers = [args.driver] if args.driver else plan.drivers
+        print(f"\n{args.year} {race} — compiled in {compile_ms:.1f} ms")
+        for driver in drivers:
+            for lap in plan.trigger_laps(driver):
+                print(f"  {driver} lap {lap:>2}: {', '.join(plan.reasons_at(lap, driver))}")
+                total_points += 1
+
+    print(f"\n{total_points} decision points in {time.perf_counter() - season_start:.1f} s")
+
+
+if __name__ == '__main__':
+    main()
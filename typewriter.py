@@ -0,0 +1,78 @@
+# typewriter.py
+"""
+Typewriter text animated in the browser.
+
+The server sends each message's final text once, inside an HTML shell; the
+component (frontend/typewriter/index.html) types it into the shell's
+`data-typewriter` element client-side. The script thread returns immediately
+and the websocket carries one small payload instead of the whole growing
+block after every word.
+"""
+import json
+import os
+import re
+
+import streamlit.components.v1 as components
+
+# Put this where the typed text goes in a message's HTML shell
+TYPEWRITER_SLOT = '<span data-typewriter></span>'
+
+_component = components.declare_component(
+    "typewriter", path=os.path.join(os.path.dirname(os.path.abspath(__file__)), "frontend", "typewriter")
+)
+
+
+# A word and the whitespace after it (or leading whitespace on its own); the browser splits on the same pattern
+WORD_PATTERN = r'\S+\s*|\s+'
+
+
+def _tokens(text, unit):
+    return len(text) if unit == 'char' else len(re.findall(WORD_PATTERN, text))
+
+
+def typing_duration_ms(messages, unit='word', delay_ms=30):
+    """How long the browser takes to play `messages`, to start the next animation after it."""
+    return sum(
+        message.get('pause_ms', 0) + _tokens(message['text'], unit) * delay_ms + message.get('hold_ms', 0)
+        for message in messages
+    )
+
+
+def typewriter_args(messages, unit='word', delay_ms=30, start_after_ms=0, caret='▌', animate=True):
+    """The payload sent to the browser for one typewriter (also used to measure it)."""
+    return {
+        'messages': [
+            {
+                'html': message['html'],
+                'text': str(message['text']),
+                'waiting': message.get('waiting', ''),
+                'pause_ms': message.get('pause_ms', 0),
+                'hold_ms': message.get('hold_ms', 0),
+            }
+            for message in messages
+        ],
+        'unit': unit,
+        'delay_ms': delay_ms,
+        'start_after_ms': start_after_ms,
+        'caret': caret,
+        'animate': animate,
+    }
+
+
+def typewriter(messages, key=None, unit='word', delay_ms=30, start_after_ms=0, caret='▌', animate=True):
+    """
+    Types out `messages` one after another in the browser.
+
+    Each message is a dict with 'html' (a shell containing TYPEWRITER_SLOT) and 'text',
+    plus optional 'waiting' (HTML shown in the slot during 'pause_ms' before typing)
+    and 'hold_ms' (wait after typing before the next message). With animate=False the
+    final text is shown straight away. Returns the animation's length in ms.
+    """
+    args = typewriter_args(messages, unit, delay_ms, start_after_ms, caret, animate)
+    _component(**args, key=key, default=None)
+    return start_after_ms + typing_duration_ms(messages, unit, delay_ms) if animate else 0
+
+
+def payload_bytes(args):
+    """Bytes of a typewriter payload as serialized for the websocket."""
+    return len(json.dumps(args).encode('utf-8'))
@@ -0,0 +1,82 @@
+# tyre_model.py
+import numpy as np
+import pandas as pd
+
+CORNERS = ('FL', 'FR', 'RL', 'RR')
+
+# Temperature variations by position
+CORNER_OFFSETS = np.array([2, 4, -1, 3])
+# Used when a driver has no lap row (pit lane, retired, before the start)
+FALLBACK_TEMPS = np.array([88, 92, 85, 90])
+
+
+class TyreTemperatureModel:
+    """
+    Tyre temperatures for every (lap, driver, corner), computed once per race.
+
+    `simulated` is an int array of shape (laps + 1, drivers, 4) with corners in
+    CORNERS order; row 0 is unused so lap numbers index directly. Real telemetry
+    readings replace the simulated value per corner once a driver is blended.
+    """
+
+    def __init__(self, lap_store, on_grow=None):
+        # on_grow(nbytes) is told how much each blended driver adds
+        self._on_grow = on_grow
+        laps = lap_store.laps.dropna(subset=['LapNumber'])
+        n_rows = lap_store.total_laps + 1
+
+        driver_index, drivers = pd.factorize(laps['Driver'].astype(object))
+        self.drivers = list(drivers)
+        self._slots = {driver: slot for slot, driver in enumerate(self.drivers)}
+        lap_index = laps['LapNumber'].to_numpy(dtype=int)
+
+        # Fallback everywhere first, then every lap row's modelled temperature on top
+        lap = np.arange(n_rows)
+        fallback = FALLBACK_TEMPS[None, :] + (lap % 5)[:, None]
+        self.simulated = np.repeat(fallback[:, None, :], len(self.drivers), axis=1).astype(np.int16)
+
+        # Base temperature by compound
+        compound = laps['Compound'].astype(object).fillna('').astype(str)
+        base = np.select(
+            [compound.str.contains('SOFT').to_numpy(), compound.str.contains('MEDIUM').to_numpy()], [95, 90], 85
+        )
+        # Tire life effect (older tires run hotter) plus lap-based variation
+        tyre_life = laps['TyreLife'].to_numpy(dtype=float, na_value=np.nan)
+        age_effect = np.where(np.isnan(tyre_life), 0, np.trunc(tyre_life) * 0.5)
+        lap_variation = (lap_index % 7) * 2
+        modelled = (base + age_effect + lap_variation)[:, None] + CORNER_OFFSETS[None, :]
+        self.simulated[lap_index, driver_index] = modelled.astype(np.int16)
+
+        self._blended = {}
+
+    def is_blended(self, driver):
+        return driver in self._blended
+
+    def blend(self, driver, lap_summary):
+        """Overlays a driver's per-lap telemetry tyre readings (a LapTelemetry, or None) once."""
+        slot = self._slots.get(driver)
+        if slot is None:
+            return
+        temps = self.simulated[:, slot].copy()
+        if lap_summary is not None:
+            n_rows = min(len(temps), len(lap_summary.samples))
+            for corner_index, corner in enumerate(CORNERS):
+                readings = lap_summary.columns.get(f'TyreTemp{corner}')
+                if readings is None:
+                    continue
+                readings = readings[:n_rows]
+                valid = ~np.isnan(readings) & (np.nan_to_num(readings) > 0)
+                temps[:n_rows, corner_index][valid] = readings[valid].astype(np.int16)
+        self._blended[driver] = temps
+        if self._on_grow is not None:
+            self._on_grow(temps.nbytes)
+
+    def temperatures(self, lap_num, driver):
+        """Returns {corner: temperature} for a driver on a lap."""
+        slot = self._slots.get(driver)
+        if slot is None or not 0 < lap_num < len(self.simulated):
+            row = FALLBACK_TEMPS + lap_num % 5
+        else:
+            temps = self._blended.get(driver)
+            row = temps[lap_num] if temps is not None else self.simulated[lap_num, slot]
+        return {corner: int(value) for corner, value in zip(CORNERS, row)}
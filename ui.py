@@ -1,4 +1,7 @@
 # ui.py
+import sys
+
+import numpy as np
 import pandas as pd
 
 def get_tire_info(compound):
@@ -15,17 +18,10 @@ def get_tire_info(compound):
         return 'W', '#0067A1'
     return 'U', '#808080' # Unknown
 
-def format_interval(interval_td):
-    """Formats a timedelta interval into a +S.ms string or 'Interval'."""
-    if pd.isna(interval_td):
-        return "Interval"
-    
-    seconds = interval_td.total_seconds()
-    
-    if seconds == 0.0:
-        return "Interval"
-    
-    return f"+{seconds:.3f}"
+def format_interval(intervals):
+    """Formats a column of timedelta intervals into +S.ms strings, 'Interval' for the leader or a missing gap."""
+    seconds = pd.to_timedelta(np.asarray(intervals)).total_seconds()
+    return [f"+{s:.3f}" if s == s and s != 0.0 else "Interval" for s in seconds]
 
 def get_contrast_color(hex_color):
     """
@@ -40,10 +36,10 @@ def get_contrast_color(hex_color):
     return '#000000' if luminance > 140 else '#FFFFFF'
 
 def format_lap_time(td):
-    """Formats a timedelta object into a MM:SS.ms string."""
+    """Formats a timedelta (or lean-layout float seconds) into a MM:SS.ms string."""
     if pd.isna(td):
         return "&nbsp;" # Use HTML non-breaking space for empty cells
-    total_seconds = td.total_seconds()
+    total_seconds = td.total_seconds() if hasattr(td, 'total_seconds') else float(td)
     minutes = int(total_seconds // 60)
     seconds = int(total_seconds % 60)
     milliseconds = int((total_seconds - (minutes * 60) - seconds) * 1000)
@@ -262,9 +258,8 @@ def generate_f1_car_tire_display(tire_temps, driver_name):
     
     return html
 
-def generate_leaderboard_html_broadcast(leaderboard_data):
-    """Generates a broadcast-style animated HTML leaderboard."""
-    html = """
+# Timing tower stylesheet; emitted once per page, not with every tower
+TOWER_STYLESHEET = """
     <style>
         .tower-container {
             display: flex;
@@ -307,24 +302,95 @@ def generate_leaderboard_html_broadcast(leaderboard_data):
             justify-self: right;
         }
     </style>
-    <div class="tower-container">
     """
-    
-    for _, row in leaderboard_data.iterrows():
-        position = int(row['Position'])
-        driver_name = row['Driver']
-        interval_str = format_interval(row['Interval'])
-        tire_letter, tire_color = get_tire_info(row['Compound'])
-        team_color = row['TeamColor'] # Assumes 'TeamColor' is passed in
-        
-        html += f"""
-        <div class="driver-row" style="--order: {position}; border-left-color: #{team_color};">
-            <div class="pos">{position}</div>
-            <div class="driver-name">{driver_name}</div>
-            <div class="interval">{interval_str}</div>
-            <div class="tire" style="background-color: {tire_color}; color: black;">{tire_letter}</div>
-        </div>
-        """
-        
-    html += "</div>"
-    return html
\ No newline at end of file
+
+# One car's row, precompiled: (position, team color, driver, interval, tire color, tire letter)
+_TOWER_ROW = (
+    '<div class="driver-row" style="--order: {0}; border-left-color: #{1};">'
+    '<div class="pos">{0}</div>'
+    '<div class="driver-name">{2}</div>'
+    '<div class="interval">{3}</div>'
+    '<div class="tire" style="background-color: {4}; color: black;">{5}</div>'
+    '</div>'
+).format
+
+def generate_leaderboard_html_broadcast(leaderboard_data, include_style=True):
+    """
+    Generates a broadcast-style animated HTML leaderboard.
+
+    Takes a leaderboard DataFrame or a RaceTimeline.frame() dict of columns and fills
+    the row template column-wise. Pass include_style=False when the page already
+    carries TOWER_STYLESHEET.
+    """
+    positions = np.asarray(leaderboard_data['Position'], dtype=float).astype(int)
+    intervals = format_interval(leaderboard_data['Interval'])
+    compounds = np.asarray(leaderboard_data['Compound'], dtype=object)
+    tires = {compound: get_tire_info(compound) for compound in set(compounds)}
+    rows = ''.join(map(
+        _TOWER_ROW,
+        positions,
+        leaderboard_data['TeamColor'],  # Assumes 'TeamColor' is passed in
+        leaderboard_data['Driver'],
+        intervals,
+        (tires[compound][1] for compound in compounds),
+        (tires[compound][0] for compound in compounds),
+    ))
+    return (TOWER_STYLESHEET if include_style else "") + f'<div class="tower-container">{rows}</div>'
+
+class TimingTower:
+    """
+    Timing tower HTML for each lap of one race, rendered on first request.
+
+    Lives on the race's RaceLoad in the shared race store, so every viewer of
+    the race gets the same rendered string for a lap. Towers omit the stylesheet.
+    """
+
+    def __init__(self, timeline, on_grow=None):
+        self.timeline = timeline
+        # on_grow(nbytes) is told how much each newly rendered lap adds
+        self._on_grow = on_grow
+        self._html = {}
+
+    def html(self, lap_num):
+        html = self._html.get(lap_num)
+        if html is None:
+            frame = self.timeline.frame(lap_num)
+            html = generate_leaderboard_html_broadcast(frame, include_style=False) if len(frame['Driver']) else ""
+            self._html[lap_num] = html
+            if self._on_grow is not None:
+                self._on_grow(sys.getsizeof(html))
+        return html
+
+def generate_chief_plan_html(text, typing=False):
+    """Chief Strategist's plan box; `typing` adds a caret while the reply is still streaming."""
+    caret = '<span style="opacity: 0.7;">|</span>' if typing else ''
+    return f"""
+    <div style="
+        background-color: #1a472a;
+        color: #FFFFFF;
+        padding: 15px;
+        border-radius: 8px;
+        border-left: 4px solid #4CAF50;
+        margin: 10px 0;
+        font-size: 14px;
+    ">
+        {text.strip()}{caret}
+    </div>
+    """
+
+def generate_outcome_html(text, typing=False):
+    """Decision Analyst outcome card; newlines become line breaks."""
+    caret = '<span style="opacity:0.6">|</span>' if typing else ''
+    return f"""
+    <div style="
+        background-color: #0b1220;
+        color: #eaf2fb;
+        padding: 16px;
+        border-radius: 10px;
+        margin: 8px 0;
+        font-size: 14px;
+        line-height:1.5;
+    ">
+        {text.replace(chr(10), "<br>")}{caret}
+    </div>
+    """
@@ -0,0 +1,97 @@
+# warm_cache.py
+"""
+Primes a deployment by loading and snapshotting every (year, race) in the
+sidebar catalogue across a process pool.
+
+Races that already have a snapshot are skipped, so an interrupted run resumes
+where it stopped; per-race timings and failures are kept in a progress file
+next to the snapshots.
+
+Usage:
+    python warm_cache.py --workers 4
+    python warm_cache.py --year 2023 --force
+"""
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from data import YEARS, RACES
+from snapshot import SNAPSHOT_DIR, snapshot_exists
+
+PROGRESS_FILE = os.path.join(SNAPSHOT_DIR, 'warmup_progress.json')
+
+
+def _load_progress():
+    try:
+        with open(PROGRESS_FILE) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_progress(progress):
+    if not os.path.exists(SNAPSHOT_DIR):
+        os.makedirs(SNAPSHOT_DIR)
+    tmp_path = PROGRESS_FILE + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(progress, f, indent=2)
+    os.replace(tmp_path, PROGRESS_FILE)
+
+
+def warm_race(year, race, session_type):
+    """Loads one race through FastF1 and snapshots it; runs in a worker process."""
+    from data import load_fastf1_session, load_grid_car_data
+    from snapshot import write_snapshot
+
+    start = time.perf_counter()
+    # The grid's car data is parsed once here so warm starts never re-parse it
+    session, laps = load_fastf1_session(year, race, session_type, telemetry=False)
+    car_data = load_grid_car_data(year, race, session_type)
+    loaded = time.perf_counter()
+    write_snapshot(session, laps, year, race, session_type, car_data=car_data)
+    return {'load_s': round(loaded - start, 2), 'write_s': round(time.perf_counter() - loaded, 2)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--workers', type=int, default=max(1, (os.cpu_count() or 2) // 2))
+    parser.add_argument('--year', type=int, action='append', help="Year to warm (repeatable); defaults to the sidebar years")
+    parser.add_argument('--race', action='append', help="Race to warm (repeatable); defaults to the sidebar races")
+    parser.add_argument('--session', default='R')
+    parser.add_argument('--force', action='store_true', help="Rebuild snapshots that already exist")
+    args = parser.parse_args()
+
+    progress = _load_progress()
+    combos = [(year, race) for year in (args.year or YEARS) for race in (args.race or RACES)]
+    jobs = [(year, race) for year, race in combos if args.force or not snapshot_exists(year, race, args.session)]
+    print(f"{len(combos) - len(jobs)} of {len(combos)} races already snapshotted; warming {len(jobs)} with {args.workers} workers")
+
+    started = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=args.workers) as executor:
+        futures = {executor.submit(warm_race, year, race, args.session): (year, race) for year, race in jobs}
+        for done, future in enumerate(as_completed(futures), 1):
+            year, race = futures[future]
+            key = f"{year} {race} {args.session}"
+            try:
+                progress[key] = {'status': 'done', **future.result()}
+            except Exception as e:
+                progress[key] = {'status': 'failed', 'error': str(e)}
+            # Record after every race so an interrupted run keeps its timings
+            _save_progress(progress)
+            detail = progress[key].get('error') or f"{progress[key]['load_s'] + progress[key]['write_s']:.1f}s"
+            print(f"  [{done}/{len(jobs)}] {key}: {progress[key]['status']} ({detail})")
+
+    print(f"\n{'Race':<24}{'status':>8}{'load':>9}{'write':>9}")
+    for year, race in combos:
+        entry = progress.get(f"{year} {race} {args.session}", {})
+        status = entry.get('status', 'cached' if snapshot_exists(year, race, args.session) else 'missing')
+        load = f"{entry['load_s']:.2f}s" if 'load_s' in entry else '-'
+        write = f"{entry['write_s']:.2f}s" if 'write_s' in entry else '-'
+        print(f"{year} {race:<19}{status:>8}{load:>9}{write:>9}")
+    print(f"\nWarmed {len(jobs)} races in {time.perf_counter() - started:.1f} s")
+
+
+if __name__ == '__main__':
+    main()